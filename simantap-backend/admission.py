@@ -0,0 +1,158 @@
+"""
+SIMANTAP Admission Control
+================================
+Bounds the inference work main.py takes on, so a burst of uploads is
+refused early instead of queueing behind the models until clients time
+out (the frontend gives up after CLIENT_TIMEOUT_S).
+
+- An AdmissionController is a FIFO of inference slots: `slots` requests
+  run, up to `max_queued` more wait in order for a slot.
+- Before a request is admitted, its completion time is estimated from the
+  work ahead of it and a moving average of recent service times. When the
+  queue is full or the estimate misses `deadline_s`, the request gets
+  429 with Retry-After (seconds until the backlog has drained).
+- AdmissionMiddleware applies this per path before the upload is read,
+  so at most slots + max_queued uploads per controller are held in memory.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+CLIENT_TIMEOUT_S = 30.0           # axios timeout in simantap-frontend/services/api.ts
+DEADLINE_MARGIN_S = 5.0           # Upload + response time on top of inference
+SERVICE_SMOOTHING = 0.2           # Weight of the newest service time in the average
+
+DETECT_SLOTS = min(4, os.cpu_count() or 1)     # Single-frame detection requests running at once
+DETECT_MAX_QUEUED = 16
+DETECT_INITIAL_SERVICE_S = 0.25                # Service time estimate before the first measurement
+BATCH_SLOTS = 1                                # /detect/batch streams hold their slot to the end
+BATCH_MAX_QUEUED = 2
+BATCH_INITIAL_SERVICE_S = 10.0
+
+# ============================================================================
+# CONTROLLER
+# ============================================================================
+class AdmissionController:
+    """Inference slots and their waiting queue; used from the event loop only"""
+
+    def __init__(self, name: str, slots: int, max_queued: int,
+                 deadline_s: float = CLIENT_TIMEOUT_S - DEADLINE_MARGIN_S,
+                 initial_service_s: float = DETECT_INITIAL_SERVICE_S):
+        self.name = name
+        self.slots = slots
+        self.max_queued = max_queued
+        self.deadline_s = deadline_s
+        self.service_s = initial_service_s
+        self.in_flight = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimated_completion_s(self) -> float:
+        """Wait for a slot plus own service time, for a request arriving now"""
+        if self.in_flight < self.slots and not self._waiters:
+            return self.service_s
+        rounds = self.queued // self.slots + 1          # Slot turnovers before ours
+        return (rounds + 1) * self.service_s
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog has drained"""
+        backlog = self.in_flight + self.queued
+        return max(1, math.ceil(backlog * self.service_s / self.slots))
+
+    def admit(self) -> Optional[int]:
+        """None if a request can be taken on now, else its Retry-After"""
+        if self.queued >= self.max_queued or self.estimated_completion_s() > self.deadline_s:
+            self.rejected += 1
+            return self.retry_after()
+        self.admitted += 1
+        return None
+
+    async def acquire(self):
+        """Wait in line for a slot"""
+        if self.in_flight < self.slots and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter                                # release() hands its slot over
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()                          # Handed a slot, but the client left
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, service_s: Optional[float] = None):
+        """Free a slot (to the next waiter, if any) and fold in the measured service time"""
+        if service_s is not None:
+            self.service_s += SERVICE_SMOOTHING * (service_s - self.service_s)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "slots": self.slots,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "deadline_s": self.deadline_s,
+            "service_ms": round(self.service_s * 1000, 1),
+            "estimated_completion_ms": round(self.estimated_completion_s() * 1000, 1),
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
+
+# ============================================================================
+# MIDDLEWARE
+# ============================================================================
+class AdmissionMiddleware:
+    """Pure ASGI: gates POSTs to the given paths before their body is read"""
+
+    def __init__(self, app, routes: Dict[str, AdmissionController]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        controller = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            controller = self.routes.get(scope["path"])
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = controller.admit()
+        if retry_after is not None:
+            response = JSONResponse(
+                status_code=429,
+                content={"error": f"Detection busy ({controller.name}), retry in {retry_after} s",
+                         "retry_after": retry_after},
+                headers={"Retry-After": str(retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        await controller.acquire()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - started)
@@ -0,0 +1,108 @@
+"""
+SIMANTAP Analysis Pool
+================================
+Runs the heuristic PPE / STF analysis (ppe_heuristics, stf_heuristics)
+in worker processes, so a large frame no longer blocks the event loop and
+every core is used.
+
+- The handler decodes the upload (in a thread), copies the uint8 frame
+  into a SharedMemory block and submits only the block's name, shape and
+  dtype; the worker maps the same memory instead of unpickling the pixels.
+- Results are small dicts and come back pickled; the handler awaits them.
+- The block is unlinked by the handler once the result is back (or the
+  call failed), so a crashed worker cannot leak it.
+- workers=0 runs the analysis in a thread of the server process instead
+  (tests, single-core edge nodes).
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional
+
+import numpy as np
+
+from ppe_heuristics import analyze_ppe_array
+from stf_heuristics import frame_scores, stf_scores
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+ANALYSIS_WORKERS = os.cpu_count() or 1
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+def analyze_ppe(frame: np.ndarray, search: bool = False) -> Dict:
+    return analyze_ppe_array(frame, search=search)
+
+def analyze_stf(frame: np.ndarray) -> Dict[str, float]:
+    return frame_scores(stf_scores(frame), 0)
+
+# Task name -> frame analysis; results must be picklable
+ANALYSIS_TASKS = {
+    "ppe": analyze_ppe,
+    "stf": analyze_stf,
+}
+
+def run_shared(task: str, name: str, shape: tuple, dtype: str, kwargs: Dict):
+    """Worker entry point: analyse the frame held in shared memory block `name`"""
+    # Spawned workers report to the server's resource tracker, so attaching
+    # here doesn't change who unlinks the block (the server, in run())
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        try:
+            return ANALYSIS_TASKS[task](frame, **kwargs)
+        finally:
+            del frame                                  # No views may outlive close()
+    finally:
+        shm.close()
+
+def warm_up():
+    """Returns once the worker is up with its imports done"""
+
+# ============================================================================
+# SERVER SIDE
+# ============================================================================
+class AnalysisPool:
+    """Process pool for the heuristic engines (start/shutdown from lifespan)"""
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Spawn the workers now, rather than on the first requests"""
+        if self.workers <= 0 or self._executor is not None:
+            return
+        # spawn: workers don't inherit the server's threads, locks or sockets
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        for future in [self._executor.submit(warm_up) for _ in range(self.workers)]:
+            future.result()
+        print(f"[OK] Analysis pool started ({self.workers} workers)")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            print("[OK] Analysis pool stopped")
+
+    async def run(self, task: str, frame: np.ndarray, **kwargs):
+        """Analyse one decoded frame off the event loop"""
+        if self._executor is None:
+            return await asyncio.to_thread(ANALYSIS_TASKS[task], frame, **kwargs)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(frame.nbytes, 1))
+        try:
+            shared = np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)
+            shared[...] = frame
+            del shared
+            future = self._executor.submit(run_shared, task, shm.name, frame.shape, frame.dtype.str, kwargs)
+            return await asyncio.wrap_future(future)
+        finally:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,169 @@
+"""
+SIMANTAP Auto-Tuner
+================================
+Picks the model input size, torch intra-op threads and batch size for the
+machine the server runs on, against a p95 latency SLO.
+
+- sweep(): every (input size, threads, batch size) candidate runs
+  model_apd then model_stf on a batch of synthetic frames (what the
+  detection endpoints pay per call); p95 call latency and frames/s are
+  measured for each. Larger batches stop once one misses the SLO, since
+  they only get slower.
+- choose(): among the candidates meeting the SLO, the largest input size
+  (most accurate), then the highest throughput. If none meets it, the
+  lowest p95, flagged slo_met=False.
+- The choice is saved to AUTOTUNE_FILE; main.py applies it on boot
+  (TARGET_IMG_SIZE, BATCH_SIZE, torch threads). A file tuned on a machine
+  with a different core count is ignored.
+
+Run from the CLI (python autotune.py [slo_ms]) or on startup with
+SIMANTAP_AUTOTUNE=1.
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from engines import benchmark_frames
+
+try:
+    import torch
+except ImportError:               # No torch: thread count is left alone
+    torch = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+AUTOTUNE_FILE = os.path.join("data", "autotune.json")
+TARGET_P95_MS = 100.0
+CANDIDATE_IMG_SIZES = (320, 416, 512, 640)     # Multiples of the YOLO stride (32)
+CANDIDATE_BATCH_SIZES = (1, 2, 4, 8)
+WARMUP_CALLS = 2
+TIMED_CALLS = 12
+
+# ============================================================================
+# THREADS
+# ============================================================================
+def candidate_threads() -> List[int]:
+    """1, 2, 4 ... up to the core count, and the core count itself"""
+    cores = os.cpu_count() or 1
+    if torch is None:
+        return [cores]
+    threads, n = [], 1
+    while n < cores:
+        threads.append(n)
+        n *= 2
+    return threads + [cores]
+
+def set_threads(threads: int):
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+# ============================================================================
+# SWEEP
+# ============================================================================
+def measure(infer: Callable[[List[np.ndarray], int], None], frames: List[np.ndarray], imgsz: int,
+            calls: int = TIMED_CALLS) -> Dict:
+    """p95 / mean latency of infer(frames, imgsz) and the frames/s it gives"""
+    for _ in range(WARMUP_CALLS):
+        infer(frames, imgsz)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        infer(frames, imgsz)
+        latencies.append((time.perf_counter() - start) * 1000)
+    mean_ms = float(np.mean(latencies))
+    return {
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "mean_ms": round(mean_ms, 2),
+        "frames_per_second": round(len(frames) / mean_ms * 1000, 1)
+    }
+
+def sweep(infer: Callable[[List[np.ndarray], int], None], slo_ms: float = TARGET_P95_MS,
+          img_sizes=CANDIDATE_IMG_SIZES, threads=None, batch_sizes=CANDIDATE_BATCH_SIZES,
+          calls: int = TIMED_CALLS) -> List[Dict]:
+    """Measure every candidate; infer(frames, imgsz) runs the models once on a batch"""
+    threads = threads or candidate_threads()
+    results = []
+    for imgsz in img_sizes:
+        frames = benchmark_frames(max(batch_sizes), imgsz)
+        for thread_count in threads:
+            set_threads(thread_count)
+            for batch_size in batch_sizes:
+                row = {"target_img_size": imgsz, "threads": thread_count, "batch_size": batch_size}
+                row.update(measure(infer, frames[:batch_size], imgsz, calls))
+                results.append(row)
+                print(f"[*] imgsz={imgsz} threads={thread_count} batch={batch_size}: "
+                      f"p95 {row['p95_ms']} ms, {row['frames_per_second']} frames/s")
+                if row["p95_ms"] > slo_ms:
+                    break
+    return results
+
+def choose(results: List[Dict], slo_ms: float = TARGET_P95_MS) -> Dict:
+    """Largest input size meeting the SLO, then best throughput; else the fastest candidate"""
+    feasible = [row for row in results if row["p95_ms"] <= slo_ms]
+    if feasible:
+        best = max(feasible, key=lambda row: (row["target_img_size"], row["frames_per_second"]))
+    else:
+        best = min(results, key=lambda row: row["p95_ms"])
+    return {**best, "slo_ms": slo_ms, "slo_met": bool(feasible)}
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+def machine() -> Dict:
+    return {"cpu_count": os.cpu_count() or 1, "platform": platform.platform(),
+            "torch": torch.__version__ if torch is not None else None}
+
+def tune(infer: Callable[[List[np.ndarray], int], None], slo_ms: float = TARGET_P95_MS,
+         path: str = AUTOTUNE_FILE, **sweep_options) -> Dict:
+    """Sweep, choose and save; returns the saved config"""
+    results = sweep(infer, slo_ms, **sweep_options)
+    config = choose(results, slo_ms)
+    config.update({"machine": machine(), "tuned_at": datetime.now().isoformat(), "candidates": results})
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp_path, path)
+
+    status = "meets" if config["slo_met"] else "MISSES"
+    print(f"[OK] Tuned: imgsz={config['target_img_size']} threads={config['threads']} "
+          f"batch={config['batch_size']} - p95 {config['p95_ms']} ms {status} the {slo_ms} ms SLO")
+    return config
+
+def load_tuning(path: str = AUTOTUNE_FILE) -> Optional[Dict]:
+    """Saved config, or None when missing, unreadable or tuned on different hardware"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[!] Ignoring {path}: {e}")
+        return None
+    missing = [key for key in ("target_img_size", "threads", "batch_size") if not isinstance(config.get(key), int)]
+    if missing:
+        print(f"[!] Ignoring {path}: no {', '.join(missing)}")
+        return None
+    cores = config.get("machine", {}).get("cpu_count")
+    if cores != (os.cpu_count() or 1):
+        print(f"[!] Ignoring {path}: tuned on {cores} cores, this machine has {os.cpu_count()}")
+        return None
+    return config
+
+
+if __name__ == "__main__":
+    import main
+    main.load_models()
+    if not main.models_available:
+        print("[!] No APD model to tune (models/best_apd.pt or yolov8n.pt)")
+        sys.exit(1)
+    main.tune_models(float(sys.argv[1]) if len(sys.argv) > 1 else TARGET_P95_MS)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Load test for the heuristic analysis pool.
+
+CLIENTS concurrent clients each send REQUESTS frames (PPE with worker
+search, then STF, on 640x480 scenes) through AnalysisPool.run, the call
+the main_simple handlers await, and the throughput is measured with:
+  [event loop]  analysis called directly in the handler (before the pool)
+  [N workers]   AnalysisPool(N) for N = 1, 2, 4, ... up to os.cpu_count()
+
+Throughput should grow about linearly with N up to the number of cores.
+
+Usage: python bench_analysis_pool.py [clients]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+from analysis_pool import ANALYSIS_TASKS, AnalysisPool
+from test_ppe_heuristics import make_scene
+
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+REQUESTS = 4
+SCENES = 8
+
+
+async def client(run, frames: list):
+    for img in frames:
+        await run("ppe", img, search=True)
+        await run("stf", img)
+
+
+async def load(run, frames: list) -> float:
+    """Frames analysed per second"""
+    start = time.perf_counter()
+    await asyncio.gather(*[client(run, frames[i % SCENES:i % SCENES + REQUESTS]) for i in range(CLIENTS)])
+    return CLIENTS * REQUESTS / (time.perf_counter() - start)
+
+
+async def on_event_loop(task: str, frame: np.ndarray, **kwargs):
+    return ANALYSIS_TASKS[task](frame, **kwargs)
+
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    print("=" * 60)
+    print(f"Analysis pool load test: {CLIENTS} clients x {REQUESTS} frames, {cores} cores")
+    print("=" * 60)
+    frames = [np.asarray(make_scene(640, 480, seed)) for seed in range(SCENES + REQUESTS)]
+
+    baseline = asyncio.run(load(on_event_loop, frames))
+    print(f"  [event loop] {baseline:7.1f} frames/s")
+
+    workers = 1
+    while True:
+        pool = AnalysisPool(workers)
+        pool.start()
+        try:
+            rate = asyncio.run(load(pool.run, frames))
+        finally:
+            pool.shutdown()
+        print(f"  [{workers:2d} workers] {rate:7.1f} frames/s  ({rate / baseline:.2f}x)")
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+Benchmark the heuristic engines' upload path at phone-photo size.
+
+For SCENES synthetic 12 MP (4000x3000) JPEGs, per upload:
+  [full]       float32 decode of the whole frame (what the STF endpoints
+               did), and a uint8 full decode + PPE analysis
+  [thumbnail]  decode_frame at ANALYSIS_MAX_SIDE (JPEG draft decode + box
+               filter, uint8) + PPE analysis of the thumbnail
+
+Usage: python bench_analysis_size.py [width height]
+"""
+
+import io
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from main_simple import ANALYSIS_MAX_SIDE
+from ppe_heuristics import analyze_ppe_array, decode_frame
+from test_ppe_heuristics import make_scene
+
+WIDTH, HEIGHT = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (4000, 3000)
+SCENES = 4
+REPEAT = 3
+
+
+def timed(fn, inputs) -> float:
+    """Mean milliseconds per input"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for item in inputs:
+            fn(item)
+    return (time.perf_counter() - start) / (REPEAT * len(inputs)) * 1000
+
+
+def decode_float(jpeg: bytes) -> np.ndarray:
+    return np.array(Image.open(io.BytesIO(jpeg)).convert("RGB"), dtype=np.float32)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"Heuristic upload path, {WIDTH}x{HEIGHT} JPEG, {SCENES} scenes")
+    print("=" * 60)
+    jpegs = []
+    for seed in range(SCENES):
+        buf = io.BytesIO()
+        make_scene(WIDTH, HEIGHT, seed, noise=1.5).save(buf, format="JPEG", quality=90)
+        jpegs.append(buf.getvalue())
+
+    full_mb = decode_float(jpegs[0]).nbytes / 1e6
+    thumb_mb = decode_frame(jpegs[0], ANALYSIS_MAX_SIDE)[0].nbytes / 1e6
+    float_ms = timed(decode_float, jpegs)
+    full_ms = timed(lambda jpeg: analyze_ppe_array(decode_frame(jpeg)[0]), jpegs)
+    decode_ms = timed(lambda jpeg: decode_frame(jpeg, ANALYSIS_MAX_SIDE), jpegs)
+    thumb_ms = timed(lambda jpeg: analyze_ppe_array(decode_frame(jpeg, ANALYSIS_MAX_SIDE)[0]), jpegs)
+    print(f"  [full]      float32 decode {float_ms:6.1f} ms ({full_mb:5.1f} MB), decode + analysis {full_ms:6.1f} ms")
+    print(f"  [thumbnail] uint8 decode   {decode_ms:6.1f} ms ({thumb_mb:5.1f} MB), decode + analysis {thumb_ms:6.1f} ms")
+    print(f"  speedup: decode {float_ms / decode_ms:.1f}x, decode + analysis {full_ms / thumb_ms:.1f}x")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark the GET /areas query path: per-request connect vs shared pool.
+
+  [before]  sqlite3.connect + SELECT + close per request, rollback journal
+  [after]   database.fetch_all on the shared pool, WAL + tuned pragmas
+
+Each run uses its own copy of simantap_data.db, with a background thread
+writing detection_history batches the way the history writer does
+(200 rows per transaction every 100 ms), at 1 / 8 / 32 concurrent clients.
+
+Usage: python bench_db_pool.py
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import database as db
+
+DURATION = 2.0
+CONCURRENCY = [1, 8, 32]
+AREA_ROWS = 50
+WRITE_BATCH = 200
+WRITE_INTERVAL = 0.1
+
+HISTORY_SQL = '''CREATE TABLE IF NOT EXISTS detection_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    area_id TEXT,
+    image_name TEXT,
+    detected_classes TEXT,
+    compliance_rate REAL,
+    hazard_level TEXT,
+    alert_message TEXT,
+    created_at TEXT NOT NULL
+)'''
+
+
+def make_db(path: str):
+    """Copy of the bundled DB with AREA_ROWS areas and a history table"""
+    shutil.copy("simantap_data.db", path)
+    conn = sqlite3.connect(path)
+    conn.execute(HISTORY_SQL)
+    now = datetime.now().isoformat()
+    conn.executemany("INSERT OR IGNORE INTO areas VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        (f"bench_{i:03d}", f"Area {i}", "Bench", "Medium", "bench", now, now) for i in range(AREA_ROWS)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def writer_loop(path: str, stop: threading.Event, use_pool: bool):
+    conn = db.connect(path) if use_pool else sqlite3.connect(path, timeout=5.0)
+    now = datetime.now().isoformat()
+    row = (now, "area_001", "x.jpg", "Pekerja,Topi", 66.7, "Medium", "WARN", now)
+    while not stop.is_set():
+        with conn:
+            conn.executemany('''INSERT INTO detection_history
+                (timestamp, area_id, image_name, detected_classes, compliance_rate, hazard_level, alert_message, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', [row] * WRITE_BATCH)
+        time.sleep(WRITE_INTERVAL)
+    conn.close()
+
+
+def get_areas_before(path: str):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM areas")
+    areas = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return areas
+
+
+def get_areas_after(path: str):
+    return db.fetch_all(db.SQL_SELECT_AREAS)
+
+
+def run(label: str, path: str, query, clients: int, use_pool: bool):
+    stop = threading.Event()
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client():
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                query(path)
+                local.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    writer = threading.Thread(target=writer_loop, args=(path, stop, use_pool))
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    writer.start()
+    for t in threads:
+        t.start()
+    time.sleep(DURATION)
+    stop.set()
+    for t in threads + [writer]:
+        t.join()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0
+    print(f"  [{label:<6}] {clients:3d} clients: {len(latencies) / DURATION:9.0f} req/s  "
+          f"p95 {p95:7.2f} ms  errors {errors[0]}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("GET /areas throughput: per-request connect vs pool")
+    print("=" * 60)
+    workdir = tempfile.mkdtemp(prefix="simantap_bench_")
+    try:
+        before_db = os.path.join(workdir, "before.db")
+        after_db = os.path.join(workdir, "after.db")
+        make_db(before_db)
+        make_db(after_db)
+        db.init_pool(after_db, size=max(CONCURRENCY))
+
+        for clients in CONCURRENCY:
+            print(f"\n{clients} concurrent clients:")
+            run("before", before_db, get_areas_before, clients, use_pool=False)
+            run("after", after_db, get_areas_after, clients, use_pool=True)
+    finally:
+        db.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
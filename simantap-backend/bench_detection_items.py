@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Benchmark per-class queries on detection_items at 10M items.
+
+Builds FRAMES frames of history (one worker + each PPE item with p=0.8,
+so ~3.4 detection_items rows per frame: ~10M items for the default
+2.95M frames) spread over DAYS days and AREAS areas, then times
+"how many workers were missing Topi":
+  [python]  load detected_classes of every history row in the window, parse
+  [sql]     database.ppe_stats: per-class totals plus missing counts for
+            every PPE class (one pass over worker rows' worn_mask)
+
+Usage: python bench_detection_items.py [frames]
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import database as db
+from history_writer import INSERT_HISTORY_SQL, INSERT_ITEM_SQL
+from test_query_plan import HISTORY_SQL
+
+FRAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 2_950_000
+DAYS = 30
+AREAS = 20
+CHUNK = 100_000
+PPE_IDS = {"Topi": 0, "Sepatu": 1, "Pakaian": 2}
+PPE = list(PPE_IDS)
+REPEAT = 5
+
+
+def make_db(path: str) -> int:
+    conn = sqlite3.connect(path)
+    conn.execute(HISTORY_SQL)
+    conn.commit()
+    conn.close()
+    db.migrate(path)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA journal_mode = OFF")
+    start = datetime(2025, 1, 1)
+    step = DAYS * 86400 / FRAMES
+    rng = random.Random(7)
+    items = 0
+    for chunk in range(0, FRAMES, CHUNK):
+        history, item_rows = [], []
+        for i in range(chunk, min(chunk + CHUNK, FRAMES)):
+            timestamp = (start + timedelta(seconds=i * step)).isoformat()
+            area_id = f"area_{i % AREAS:03d}"
+            worn = [name for name in PPE if rng.random() < 0.8]
+            missing = len(PPE) - len(worn)
+            hazard = "Low" if missing == 0 else ("Medium" if missing == 1 else "High")
+            history.append((timestamp, area_id, f"frame_{i}.jpg", ",".join(["Pekerja"] + worn),
+                            round(len(worn) / 3 * 100, 1), hazard, "", timestamp))
+            history_id = i + 1
+            worn_mask = sum(1 << PPE_IDS[name] for name in worn)
+            item_rows.append((history_id, 0, timestamp, area_id, 3, "Pekerja", 0.9, 10, 10, 200, 400, 0, worn_mask))
+            for index, name in enumerate(worn, start=1):
+                item_rows.append((history_id, index, timestamp, area_id, PPE_IDS[name], name,
+                                  0.8, 20, 20, 80, 80, 0, None))
+        conn.executemany(INSERT_HISTORY_SQL, history)
+        conn.executemany(INSERT_ITEM_SQL, item_rows)
+        conn.commit()
+        items += len(item_rows)
+        print(f"\r[*] {min(chunk + CHUNK, FRAMES):,} frames, {items:,} items", end="", flush=True)
+    print()
+    conn.execute("ANALYZE")
+    conn.close()
+    return items
+
+
+def missing_in_python(since: str, until: str, area_id: str = None) -> int:
+    """The pre-detection_items way: fetch detected_classes and parse each row"""
+    sql = "SELECT detected_classes FROM detection_history WHERE timestamp >= ? AND timestamp < ?"
+    params = [since, until]
+    if area_id:
+        sql += " AND area_id = ?"
+        params.append(area_id)
+    missing = 0
+    for row in db.fetch_all(sql, params):
+        classes = row["detected_classes"].split(",")
+        if "Pekerja" in classes and "Topi" not in classes:
+            missing += 1
+    return missing
+
+
+def timed(fn) -> float:
+    """Mean milliseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"Per-class queries on detection_items ({FRAMES:,} frames)")
+    print("=" * 60)
+    workdir = tempfile.mkdtemp(prefix="simantap_bench_")
+    try:
+        path = os.path.join(workdir, "items.db")
+        items = make_db(path)
+        print(f"[OK] {items:,} detection_items rows, {os.path.getsize(path) / 1e9:.2f} GB")
+        db.init_pool(path)
+
+        until = (datetime(2025, 1, 1) + timedelta(days=DAYS)).isoformat()
+        week = (datetime(2025, 1, 1) + timedelta(days=DAYS - 7)).isoformat()
+        for label, since, area_id in [("area_003, last week", week, "area_003"),
+                                      ("all areas, last week", week, None),
+                                      ("all areas, 30 days", "2025-01-01T00:00:00", None)]:
+            stats = db.ppe_stats(since, until, "Pekerja", PPE_IDS, area_id)
+            assert stats["missing"]["Topi"] == missing_in_python(since, until, area_id)
+            python_ms = timed(lambda: missing_in_python(since, until, area_id))
+            sql_ms = timed(lambda: db.ppe_stats(since, until, "Pekerja", PPE_IDS, area_id))
+            print(f"\n{label}: {stats['workers']:,} workers, Topi missing {stats['missing']['Topi']:,}")
+            print(f"  [python]  Topi missing only                  {python_ms:9.1f} ms")
+            print(f"  [sql]     class totals + missing, all PPE    {sql_ms:9.1f} ms")
+    finally:
+        db.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
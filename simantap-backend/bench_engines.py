@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+"""
+Rank main.py's detection engines by latency on this machine.
+
+Loads the models the way the server does (models/*.pt, ONNX exports next
+to them) and runs engines.rank_engines: per-frame PPE + STF latency on
+synthetic TARGET_IMG_SIZE frames, fastest first. Same as
+GET /engines/benchmark, without starting the server.
+
+Usage: python bench_engines.py [frames]
+"""
+
+import sys
+
+import main
+from engines import rank_engines
+
+FRAMES = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+if __name__ == "__main__":
+    main.load_models()
+    print("=" * 60)
+    print(f"Detection engines, {FRAMES} frames of {main.TARGET_IMG_SIZE}x{main.TARGET_IMG_SIZE}")
+    print("=" * 60)
+    for row in rank_engines(main.engines, main.TARGET_IMG_SIZE, FRAMES):
+        default = "  (default)" if row["engine"] == main.engines.default else ""
+        if row["available"]:
+            print(f"  {row['rank']}. {row['engine']:<11} {row['ms_per_frame']:8.2f} ms per frame{default}")
+        else:
+            print(f"  -  {row['engine']:<11}      n/a  not available here{default}")
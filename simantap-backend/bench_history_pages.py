@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Benchmark GET /history paging: OFFSET vs keyset cursor.
+
+Builds a detection_history of ROWS rows (PAGE_SIZE per page, so page
+10,000 is the last ~100 rows) and times one page at several depths:
+  [offset]  ORDER BY timestamp DESC, id DESC LIMIT n OFFSET page * n
+  [keyset]  database.history_page(after=<cursor of the previous page>)
+with and without an area filter.
+
+Usage: python bench_history_pages.py
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import database as db
+from test_query_plan import HISTORY_SQL
+
+ROWS = 1_000_100
+PAGE_SIZE = 100
+PAGES = [1, 100, 1000, 10000]
+AREAS = 10
+REPEAT = 20
+
+OFFSET_SQL = f'''SELECT {db.HISTORY_PAGE_COLUMNS}
+    FROM detection_history
+    ORDER BY timestamp DESC, id DESC
+    LIMIT ? OFFSET ?'''
+OFFSET_AREA_SQL = f'''SELECT {db.HISTORY_PAGE_COLUMNS}
+    FROM detection_history
+    WHERE area_id = ?
+    ORDER BY timestamp DESC, id DESC
+    LIMIT ? OFFSET ?'''
+
+
+def make_db(path: str):
+    conn = sqlite3.connect(path)
+    conn.execute(HISTORY_SQL)
+    start = datetime(2025, 1, 1)
+    now = datetime.now().isoformat()
+    for chunk in range(0, ROWS, 100_000):
+        conn.executemany('''INSERT INTO detection_history
+            (timestamp, area_id, image_name, detected_classes, compliance_rate, hazard_level, alert_message, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', [(
+                (start + timedelta(seconds=i // 2)).isoformat(),   # Two rows per second: ties on timestamp
+                f"area_{i % AREAS:03d}", f"frame_{i}.jpg", "Pekerja,Topi,Pakaian",
+                66.7, "Medium", "WARN - Missing: Sepatu", now
+            ) for i in range(chunk, min(chunk + 100_000, ROWS))])
+    conn.commit()
+    conn.close()
+    db.migrate(path)
+
+
+def timed(fn) -> float:
+    """Mean milliseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def cursor_before(page: int, area_id: str = None):
+    """Keyset cursor a client holds when asking for `page` (1-based)"""
+    if page == 1:
+        return None
+    last_offset = (page - 1) * PAGE_SIZE - 1
+    if area_id:
+        row = db.fetch_one(OFFSET_AREA_SQL, (area_id, 1, last_offset))
+    else:
+        row = db.fetch_one(OFFSET_SQL, (1, last_offset))
+    return row["timestamp"], row["id"]
+
+
+def run(area_id: str = None):
+    label = f"area {area_id}" if area_id else "all areas"
+    print(f"\n{label}:")
+    for page in PAGES:
+        if area_id and page * PAGE_SIZE > ROWS // AREAS:
+            continue
+        offset = (page - 1) * PAGE_SIZE
+        if area_id:
+            offset_ms = timed(lambda: db.fetch_all(OFFSET_AREA_SQL, (area_id, PAGE_SIZE, offset)))
+        else:
+            offset_ms = timed(lambda: db.fetch_all(OFFSET_SQL, (PAGE_SIZE, offset)))
+
+        after = cursor_before(page, area_id)
+        rows, _ = db.history_page(PAGE_SIZE, area_id=area_id, after=after)
+        expected = db.fetch_all(OFFSET_AREA_SQL, (area_id, PAGE_SIZE, offset)) if area_id \
+            else db.fetch_all(OFFSET_SQL, (PAGE_SIZE, offset))
+        assert rows == expected, f"page {page}: keyset and OFFSET disagree"
+        keyset_ms = timed(lambda: db.history_page(PAGE_SIZE, area_id=area_id, after=after))
+
+        print(f"  page {page:6d}:  [offset] {offset_ms:8.2f} ms   [keyset] {keyset_ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"GET /history paging, {ROWS:,} rows, {PAGE_SIZE} per page")
+    print("=" * 60)
+    workdir = tempfile.mkdtemp(prefix="simantap_bench_")
+    try:
+        path = os.path.join(workdir, "history.db")
+        print("[*] Building history table...")
+        make_db(path)
+        db.init_pool(path)
+        run()
+        run("area_003")
+    finally:
+        db.close_pool()
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Benchmark MessagePack vs JSON result encoding.
+
+For 10 / 50 / 200 detections per frame, compares encode + decode time
+and payload size of a /detect/realtime body:
+  [json]          stdlib json (what JSONResponse uses)
+  [orjson]        orjson (ORJSONResponse)
+  [msgpack]       result_codec (Accept: application/msgpack)
+  [msgpack-cmp]   result_codec on the ?compact=true body
+
+Usage: python bench_msgpack.py
+"""
+
+import json
+import time
+
+import orjson
+
+from bench_serialization import STF, synthetic_arrays
+from main import assess_compliance, build_compact_payload, detections_from_arrays
+from result_codec import decode_msgpack, encode_msgpack
+
+ITERATIONS = 2000
+DETECTION_COUNTS = [10, 50, 200]
+
+
+def timed(fn) -> float:
+    """Mean microseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def run(n: int):
+    xyxy, class_ids, confidences = synthetic_arrays(n)
+    detections = detections_from_arrays(xyxy, class_ids, confidences)
+    compliance = assess_compliance(detections)
+    full = {
+        "detections": detections,
+        "compliance": compliance,
+        "stf": STF,
+        "timestamp": "2025-01-01T00:00:00"
+    }
+    compact = build_compact_payload(xyxy, class_ids, confidences, compliance, STF)
+
+    # Sanity: msgpack round-trips to the same result as JSON
+    assert decode_msgpack(encode_msgpack(full)) == json.loads(json.dumps(full))
+
+    codecs = [
+        ("json", lambda: json.dumps(full, ensure_ascii=False, separators=(",", ":")).encode(), json.loads),
+        ("orjson", lambda: orjson.dumps(full), orjson.loads),
+        ("msgpack", lambda: encode_msgpack(full), decode_msgpack),
+        ("msgpack-cmp", lambda: encode_msgpack(compact), decode_msgpack),
+    ]
+
+    base_bytes = None
+    for name, encode, decode in codecs:
+        payload = encode()
+        enc_us = timed(encode)
+        dec_us = timed(lambda: decode(payload))
+        base_bytes = base_bytes or len(payload)
+        print(f"  [{name:<11}] encode {enc_us:8.1f} us  decode {dec_us:8.1f} us  "
+              f"{len(payload):7d} bytes ({len(payload) / base_bytes:5.1%})")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("MessagePack vs JSON result encoding benchmark")
+    print("=" * 60)
+    for n in DETECTION_COUNTS:
+        print(f"\n{n} detections per frame:")
+        run(n)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Benchmark the heuristic PPE analyzer (main_simple.py) per image at 1080p.
+
+Times the band scoring of SCENES synthetic 1920x1080 worker scenes with:
+  [per-region]  test_ppe_heuristics.RegionFeatures - grayscale, np.gradient,
+                saturation and skin masks recomputed for every region
+  [shared]      ppe_heuristics.FeatureMaps - computed once, sliced per region
+plus JPEG decode: the per-region analyzer needed a float32 copy of the
+frame, FeatureMaps reads the decoded uint8 array directly.
+
+Then the sliding-window worker search over the same frames: every
+candidate window scored from slice sums (cost grows with window area)
+vs score_windows on summed-area tables (four lookups per sum).
+
+Usage: python bench_ppe_heuristics.py [width height]
+"""
+
+import io
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from ppe_heuristics import (COLOR_CONTRAST, BODY_EDGES, SEARCH_HEIGHT, FeatureMaps, detect_ppe_regions,
+                            score_windows, worker_windows)
+from test_ppe_heuristics import RegionFeatures, make_scene, same_decisions
+
+WIDTH, HEIGHT = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (1920, 1080)
+SCENES = 8
+REPEAT = 5
+
+
+def timed(fn, inputs) -> float:
+    """Mean milliseconds per input"""
+    for item in inputs[:1]:
+        fn(item)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        for item in inputs:
+            fn(item)
+    return (time.perf_counter() - start) / (REPEAT * len(inputs)) * 1000
+
+
+def decode_float(jpeg: bytes) -> np.ndarray:
+    """What main_simple did before: float32 copy of the decoded frame"""
+    return np.array(Image.open(io.BytesIO(jpeg)).convert("RGB"), dtype=np.float32)
+
+
+def decode(jpeg: bytes) -> np.ndarray:
+    return np.asarray(Image.open(io.BytesIO(jpeg)).convert("RGB"))
+
+
+def score_windows_slices(features, windows: np.ndarray) -> np.ndarray:
+    """score_windows with every sum taken over the window's pixels"""
+    img_height, img_width = features.rgb.shape[:2]
+    planes = [features.r.astype(np.int64), features.g.astype(np.int64), features.b.astype(np.int64)]
+    scores = []
+    for top, bottom, left, right in windows.T:
+        height, width = bottom - top, right - left
+        head = features.skin[top + height // 10:top + height * 3 // 10]
+        face_left, face_right = width // 4, width - width // 4
+        face = max(head[:, left + face_left:left + face_right].mean()
+                   - (head[:, left:left + face_left].sum() + head[:, left + face_right:right].sum())
+                   / (head.shape[0] * (width - (face_right - face_left))), 0)
+        rows = slice(top + height * 28 // 100, top + height * 85 // 100)
+        side_left, side_right = max(left - width // 2, 0), min(right + width // 2, img_width)
+        distance = 0.0
+        for plane in planes:
+            body = plane[rows, left + width * 15 // 100:right - width * 15 // 100].mean()
+            sides = np.concatenate([plane[rows, side_left:left], plane[rows, right:side_right]], axis=1)
+            background = sides.mean() if sides.size else plane.mean()
+            distance += (body - background) ** 2
+        distance = np.sqrt(distance)
+        edges = features.edge_mask[rows, left:right].mean()
+        scores.append(np.sqrt(face) * distance / (distance + COLOR_CONTRAST)
+                      * (0.5 + 0.5 * min(edges / BODY_EDGES, 1)))
+    return np.array(scores)
+
+
+def search_tables(img: np.ndarray) -> np.ndarray:
+    search = FeatureMaps(img).reduced(max(1, img.shape[0] // SEARCH_HEIGHT))
+    return score_windows(search, worker_windows(*search.rgb.shape[:2]))
+
+
+def search_slices(img: np.ndarray) -> np.ndarray:
+    search = FeatureMaps(img).reduced(max(1, img.shape[0] // SEARCH_HEIGHT))
+    return score_windows_slices(search, worker_windows(*search.rgb.shape[:2]))
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"Heuristic PPE analyzer, {WIDTH}x{HEIGHT}, {SCENES} scenes")
+    print("=" * 60)
+    jpegs = []
+    for seed in range(SCENES):
+        buf = io.BytesIO()
+        make_scene(WIDTH, HEIGHT, seed).save(buf, format="JPEG", quality=90)
+        jpegs.append(buf.getvalue())
+    floats = [decode_float(jpeg) for jpeg in jpegs]
+    arrays = [decode(jpeg) for jpeg in jpegs]
+
+    for img, img_float in zip(arrays, floats):
+        assert same_decisions(detect_ppe_regions(FeatureMaps(img)), detect_ppe_regions(RegionFeatures(img_float)))
+
+    float_ms = timed(decode_float, jpegs)
+    decode_ms = timed(decode, jpegs)
+    region_ms = timed(lambda img: detect_ppe_regions(RegionFeatures(img)), floats)
+    shared_ms = timed(lambda img: detect_ppe_regions(FeatureMaps(img)), arrays)
+    print(f"  [per-region] decode + float32 {float_ms:6.1f} ms + analysis {region_ms:6.1f} ms"
+          f" = {float_ms + region_ms:6.1f} ms per image")
+    print(f"  [shared]     decode (uint8)   {decode_ms:6.1f} ms + analysis {shared_ms:6.1f} ms"
+          f" = {decode_ms + shared_ms:6.1f} ms per image")
+    print(f"  speedup: analysis {region_ms / shared_ms:.2f}x, per image "
+          f"{(float_ms + region_ms) / (decode_ms + shared_ms):.2f}x")
+
+    print("-" * 60)
+    search = FeatureMaps(arrays[0]).reduced(max(1, HEIGHT // SEARCH_HEIGHT))
+    windows = worker_windows(*search.rgb.shape[:2])
+    assert np.allclose(score_windows(search, windows), score_windows_slices(search, windows))
+    slices_ms = timed(search_slices, arrays)
+    tables_ms = timed(search_tables, arrays)
+    print(f"  window search, {windows.shape[1]} windows on {search.rgb.shape[1]}x{search.rgb.shape[0]}:")
+    print(f"  [slices] {slices_ms:6.1f} ms   [tables] {tables_ms:6.1f} ms   speedup {slices_ms / tables_ms:.1f}x")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Benchmark realtime response serialization.
+
+Compares, per frame:
+  [json]     default path - per-box dicts + jsonable_encoder + JSONResponse
+  [orjson]   per-box dicts + ORJSONResponse
+  [compact]  parallel arrays + ORJSONResponse (?compact=true)
+
+Usage: python bench_serialization.py
+"""
+
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from main import assess_compliance, build_compact_payload, detections_from_arrays
+
+ITERATIONS = 2000
+DETECTION_COUNTS = [10, 50, 200]
+STF = {"hazard_type": "Normal", "confidence": 1.0, "safe": True}
+
+
+def synthetic_arrays(n: int, seed: int = 0):
+    """n detections: ~1/4 persons (class 3), rest PPE (classes 0-2)"""
+    rng = np.random.default_rng(seed)
+    xy = rng.integers(0, 600, size=(n, 2))
+    wh = rng.integers(10, 200, size=(n, 2))
+    xyxy = np.concatenate([xy, np.minimum(xy + wh, 640)], axis=1).astype(np.int32)
+    class_ids = rng.integers(0, 4, size=n).astype(np.int32)
+    class_ids[0] = 3
+    order = np.argsort(class_ids != 3, kind="stable")
+    confidences = rng.uniform(0.5, 1.0, size=n).astype(np.float32)
+    return xyxy[order], class_ids[order], confidences[order]
+
+
+def timed(fn) -> float:
+    """Mean microseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def run(n: int):
+    xyxy, class_ids, confidences = synthetic_arrays(n)
+    compliance = assess_compliance(detections_from_arrays(xyxy, class_ids, confidences))
+
+    def full_payload():
+        return {
+            "detections": detections_from_arrays(xyxy, class_ids, confidences),
+            "compliance": compliance,
+            "stf": STF,
+            "timestamp": "2025-01-01T00:00:00"
+        }
+
+    def baseline():
+        return JSONResponse(jsonable_encoder(full_payload())).body
+
+    def orjson_full():
+        return ORJSONResponse(full_payload()).body
+
+    def orjson_compact():
+        return ORJSONResponse(build_compact_payload(xyxy, class_ids, confidences, compliance, STF)).body
+
+    rows = [("json", baseline), ("orjson", orjson_full), ("compact", orjson_compact)]
+    base_us = base_bytes = None
+    for name, fn in rows:
+        us = timed(fn)
+        size = len(fn())
+        base_us = base_us or us
+        base_bytes = base_bytes or size
+        print(f"  [{name:<7}] {us:9.1f} us/frame ({base_us / us:4.1f}x)  {size:7d} bytes ({size / base_bytes:5.1%})")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Realtime response serialization benchmark")
+    print("=" * 60)
+    for n in DETECTION_COUNTS:
+        print(f"\n{n} detections per frame:")
+        run(n)
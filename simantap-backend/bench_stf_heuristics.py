@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Benchmark the heuristic STF analyzer per frame.
+
+Scores BATCH synthetic floors at 640x640 (main.py's model input size) with:
+  [closures]  test_stf_heuristics.reference_scores - the per-image code the
+              endpoints ran, float np.gradient/np.std on one frame
+  [single]    stf_scores on one frame at a time
+  [stacked]   stf_scores on all BATCH frames in one call
+
+Usage: python bench_stf_heuristics.py [batch]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from stf_heuristics import stf_scores
+from test_analysis_size import make_floor
+from test_stf_heuristics import reference_scores
+
+BATCH = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+SIZE = 640
+REPEAT = 5
+
+
+def timed(fn) -> float:
+    """Mean milliseconds per frame"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / (REPEAT * BATCH) * 1000
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print(f"Heuristic STF analyzer, {BATCH} frames of {SIZE}x{SIZE}")
+    print("=" * 60)
+    frames = [np.asarray(make_floor(SIZE, SIZE, seed)) for seed in range(BATCH)]
+    stack = np.stack(frames)
+
+    closures_ms = timed(lambda: [reference_scores(img) for img in frames])
+    single_ms = timed(lambda: [stf_scores(img) for img in frames])
+    stacked_ms = timed(lambda: stf_scores(stack))
+    print(f"  [closures] {closures_ms:6.2f} ms per frame")
+    print(f"  [single]   {single_ms:6.2f} ms per frame")
+    print(f"  [stacked]  {stacked_ms:6.2f} ms per frame")
+    print(f"  speedup: single {closures_ms / single_ms:.2f}x, stacked {closures_ms / stacked_ms:.2f}x")
@@ -0,0 +1,190 @@
+"""
+SIMANTAP Bulk Import
+================================
+Loads many areas / APD items (or training logs, for seeding) in one go:
+
+- Input is a JSON array of objects or NDJSON (one object per line),
+  see parse_records().
+- Every record is validated up front, and keys already in the table (or
+  repeated within the upload) are found with one IN query per chunk, so
+  each bad record is reported by index instead of failing the batch
+  halfway.
+- The lookup and the insert share ONE write transaction (BEGIN IMMEDIATE),
+  so a concurrent insert cannot slip in between and turn the executemany
+  into an IntegrityError: on_error="abort" writes nothing if any record is
+  bad, on_error="skip" writes the rest.
+
+Used by POST /areas/bulk, POST /apd/bulk and seed_data.py.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import database as db
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+BULK_MAX_RECORDS = 10000
+BULK_KEY_CHUNK = 500             # Keys per "already exists" lookup (SQLite variable limit)
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# kind -> table, key column, INSERT statement, fields (name, type, required),
+# and how many created_at/updated_at values close each row
+IMPORT_SPECS = {
+    "areas": {
+        "table": "areas",
+        "key": "area_id",
+        "sql": db.SQL_INSERT_AREA,
+        "fields": [("area_id", str, True), ("area_name", str, True), ("location", str, True),
+                   ("risk_level", str, True), ("description", str, False)],
+        "timestamps": 2
+    },
+    "apd": {
+        "table": "apd_items",
+        "key": "item_id",
+        "sql": db.SQL_INSERT_APD,
+        "fields": [("item_id", str, True), ("item_name", str, True), ("category", str, True),
+                   ("description", str, False), ("training_samples", int, False), ("accuracy", float, False)],
+        "timestamps": 2
+    },
+    "training_logs": {
+        "table": "training_logs",
+        "key": "log_id",
+        "sql": db.SQL_INSERT_TRAINING_LOG,
+        "fields": [("log_id", str, True), ("date", str, True), ("epoch", int, True), ("loss", float, True),
+                   ("accuracy", float, True), ("validation_accuracy", float, True),
+                   ("area_id", str, False), ("apd_categories", str, False)],
+        "timestamps": 1
+    }
+}
+
+class BulkImportError(ValueError):
+    """The upload as a whole is unusable (bad JSON, too many records)"""
+
+# ============================================================================
+# PARSING
+# ============================================================================
+def parse_records(body: bytes, content_type: Optional[str] = None) -> List[Any]:
+    """
+    JSON array, or NDJSON when the content type says so or the body does
+    not start with '['. An NDJSON line that is not JSON stays in the list
+    as a str, so validation reports it under its line index.
+    """
+    text = body.decode("utf-8-sig").strip()
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in NDJSON_MEDIA_TYPES and text.startswith("["):
+        try:
+            records = json.loads(text)
+        except ValueError as e:
+            raise BulkImportError(f"Invalid JSON: {e}")
+    else:
+        records = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(line)
+    if len(records) > BULK_MAX_RECORDS:
+        raise BulkImportError(f"Too many records ({len(records)} > {BULK_MAX_RECORDS})")
+    return records
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+def _check_type(value: Any, kind: type) -> bool:
+    if kind is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, kind)
+
+def validate_record(spec: Dict, record: Any) -> Tuple[Optional[Tuple], Optional[str]]:
+    """(values in field order, None) or (None, error message)"""
+    if not isinstance(record, dict):
+        return None, "Not a JSON object"
+    values = []
+    for name, kind, required in spec["fields"]:
+        value = record.get(name)
+        if value is None or value == "":
+            if required:
+                return None, f"Missing field: {name}"
+            values.append(None)
+            continue
+        if not _check_type(value, kind):
+            return None, f"Field {name} must be {kind.__name__}"
+        values.append(value)
+    return tuple(values), None
+
+def existing_keys(conn: sqlite3.Connection, spec: Dict, keys: List[str]) -> set:
+    found = set()
+    for start in range(0, len(keys), BULK_KEY_CHUNK):
+        chunk = keys[start:start + BULK_KEY_CHUNK]
+        sql = (f"SELECT {spec['key']} FROM {spec['table']} "
+               f"WHERE {spec['key']} IN ({', '.join('?' * len(chunk))})")
+        found.update(row[0] for row in conn.execute(sql, chunk))
+    return found
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+def import_records(conn: sqlite3.Connection, kind: str, records: List[Any],
+                   on_error: str = "abort") -> Dict:
+    """
+    Validate and insert `records` in one transaction on `conn`.
+    on_error="abort": any bad record -> nothing written.
+    on_error="skip":  bad records are left out, the rest written.
+    Returns received / inserted / errors[{index, key, error}].
+    """
+    spec = IMPORT_SPECS[kind]
+    key_index = [name for name, _, _ in spec["fields"]].index(spec["key"])
+    errors = []
+    valid = []                       # (index, values)
+    seen = set()
+    for index, record in enumerate(records):
+        values, error = validate_record(spec, record)
+        key = record.get(spec["key"]) if isinstance(record, dict) else None
+        if error is None and values[key_index] in seen:
+            error = f"Duplicate {spec['key']} in upload"
+        if error:
+            errors.append({"index": index, "key": key, "error": error})
+            continue
+        seen.add(values[key_index])
+        valid.append((index, values))
+
+    inserted = 0
+    conn.execute("BEGIN IMMEDIATE")          # Write lock from the existence check to the insert
+    try:
+        exists = existing_keys(conn, spec, [values[key_index] for _, values in valid])
+        if exists:
+            for index, values in valid:
+                if values[key_index] in exists:
+                    errors.append({"index": index, "key": values[key_index], "error": "Already exists"})
+            valid = [(index, values) for index, values in valid if values[key_index] not in exists]
+            errors.sort(key=lambda error: error["index"])
+
+        if valid and not (errors and on_error == "abort"):
+            now = datetime.now().isoformat()
+            stamps = (now,) * spec["timestamps"]
+            inserted = conn.executemany(spec["sql"], [values + stamps for _, values in valid]).rowcount
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        "kind": kind,
+        "received": len(records),
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors
+    }
+
+def import_pooled(kind: str, records: List[Any], on_error: str = "abort") -> Dict:
+    """import_records on a connection borrowed from the module pool"""
+    with db.get_pool().connection() as conn:
+        return import_records(conn, kind, records, on_error)
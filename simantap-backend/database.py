@@ -0,0 +1,484 @@
+"""
+SIMANTAP Database Layer
+================================
+Shared SQLite access for all backend variants (main.py, main_simple.py,
+main_final.py) and the background workers.
+
+- One pool of long-lived connections instead of connect/close per request
+- WAL journal mode: readers no longer block behind the history writer
+- Per-connection pragmas (synchronous=NORMAL, mmap, page cache) set ONCE,
+  when the connection is created
+- Statements are reused: the sqlite3 module keeps a per-connection cache of
+  compiled statements keyed by SQL text, which only pays off when connections
+  live long and the SQL text is identical - so queries shared by several apps
+  live here as constants
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+DB_FILE = "simantap_data.db"
+POOL_SIZE = 8
+POOL_TIMEOUT = 10.0            # Seconds to wait for a free connection
+BUSY_TIMEOUT_MS = 5000         # Wait on a locked DB instead of failing at once
+STATEMENT_CACHE_SIZE = 256     # Compiled statements kept per connection
+STATS_WINDOW_HOURS = 24.0      # Default /stats/summary window
+
+CONNECTION_PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",    # Safe with WAL, fsync only at checkpoints
+    "PRAGMA mmap_size = 268435456",   # 256 MB memory-mapped reads
+    "PRAGMA cache_size = -65536",     # 64 MB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+]
+
+# ============================================================================
+# SHARED STATEMENTS
+# ============================================================================
+SQL_SELECT_AREAS = "SELECT * FROM areas"
+SQL_INSERT_AREA = '''INSERT INTO areas
+    (area_id, area_name, location, risk_level, description, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)'''
+
+SQL_SELECT_APD = "SELECT * FROM apd_items"
+SQL_INSERT_APD = '''INSERT INTO apd_items
+    (item_id, item_name, category, description, training_samples, accuracy, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+
+SQL_INSERT_TRAINING_LOG = '''INSERT INTO training_logs
+    (log_id, date, epoch, loss, accuracy, validation_accuracy, area_id, apd_categories, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+# Stats over a time window [since, until), optionally for one area.
+# Served by idx_history_time / idx_history_area_time (see MIGRATIONS).
+SQL_HISTORY_TOTALS = '''SELECT COUNT(*) AS total, AVG(compliance_rate) AS avg_compliance
+    FROM detection_history
+    WHERE timestamp >= ? AND timestamp < ?'''
+SQL_HISTORY_TOTALS_AREA = '''SELECT COUNT(*) AS total, AVG(compliance_rate) AS avg_compliance
+    FROM detection_history
+    WHERE area_id = ? AND timestamp >= ? AND timestamp < ?'''
+SQL_HISTORY_BY_HAZARD = '''SELECT hazard_level, COUNT(*) AS count
+    FROM detection_history
+    WHERE timestamp >= ? AND timestamp < ?
+    GROUP BY hazard_level'''
+SQL_HISTORY_BY_HAZARD_AREA = '''SELECT hazard_level, COUNT(*) AS count
+    FROM detection_history
+    WHERE area_id = ? AND timestamp >= ? AND timestamp < ?
+    GROUP BY hazard_level'''
+
+# ============================================================================
+# ROLLUP TABLES
+# ============================================================================
+# Per-minute / per-hour / per-day counts of detection_history rows by area and
+# hazard level. Bucket keys are prefixes of the ISO timestamp, so a row's
+# bucket is timestamp[:length]. Kept up to date by the history writer
+# (rollups.apply_rollups); compliance is stored as a sum so buckets add up.
+ROLLUP_GRANULARITIES = {
+    # name: (table, bucket prefix length, bucket seconds)
+    "minute": ("history_rollup_minute", 16, 60),      # 2025-01-01T10:15
+    "hour": ("history_rollup_hour", 13, 3600),        # 2025-01-01T10
+    "day": ("history_rollup_day", 10, 86400),         # 2025-01-01
+}
+
+def _rollup_schema(table: str) -> List[str]:
+    return [
+        f'''CREATE TABLE IF NOT EXISTS {table} (
+            bucket TEXT NOT NULL,
+            area_id TEXT NOT NULL,          -- '' for detections without an area
+            hazard_level TEXT NOT NULL,
+            detections INTEGER NOT NULL,
+            compliance_sum REAL NOT NULL,
+            PRIMARY KEY (bucket, area_id, hazard_level)
+        ) WITHOUT ROWID''',
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_area ON {table} (area_id, bucket)",
+    ]
+
+def rollup_rebuild_sql(table: str, prefix: int, windowed: bool = False) -> List[str]:
+    """
+    Statements recomputing one rollup table from raw history. Windowed, each
+    takes the first bucket to rebuild as its one parameter and leaves older
+    buckets alone.
+    """
+    bucket_filter = " WHERE bucket >= ?" if windowed else ""
+    history_filter = "WHERE timestamp >= ?" if windowed else ""
+    return [
+        f"DELETE FROM {table}{bucket_filter}",
+        f'''INSERT INTO {table} (bucket, area_id, hazard_level, detections, compliance_sum)
+            SELECT substr(timestamp, 1, {prefix}), COALESCE(area_id, ''), COALESCE(hazard_level, ''),
+                   COUNT(*), TOTAL(compliance_rate)
+            FROM detection_history
+            {history_filter}
+            GROUP BY 1, 2, 3''',
+    ]
+
+def rollup_upsert_sql(table: str) -> str:
+    return f'''INSERT INTO {table} (bucket, area_id, hazard_level, detections, compliance_sum)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (bucket, area_id, hazard_level) DO UPDATE SET
+            detections = detections + excluded.detections,
+            compliance_sum = compliance_sum + excluded.compliance_sum'''
+
+def rollup_series_sql(table: str, by_area: bool) -> str:
+    area_filter = "area_id = ? AND " if by_area else ""
+    return f'''SELECT bucket, hazard_level, SUM(detections) AS detections, SUM(compliance_sum) AS compliance_sum
+        FROM {table}
+        WHERE {area_filter}bucket >= ? AND bucket <= ?
+        GROUP BY bucket, hazard_level
+        ORDER BY bucket'''
+
+# ============================================================================
+# SCHEMA MIGRATIONS
+# ============================================================================
+# (version, statements) - applied in order, tracked in PRAGMA user_version.
+# Run after the app has created its base tables.
+MIGRATIONS = [
+    (1, [
+        # Time-window stats; hazard + compliance make it covering
+        '''CREATE INDEX IF NOT EXISTS idx_history_time
+            ON detection_history (timestamp, hazard_level, compliance_rate)''',
+        # Per-area stats
+        '''CREATE INDEX IF NOT EXISTS idx_history_area_time
+            ON detection_history (area_id, timestamp, hazard_level, compliance_rate)''',
+    ]),
+    # Rollup tables, backfilled from existing history
+    (2, [
+        statement
+        for table, prefix, _ in ROLLUP_GRANULARITIES.values()
+        for statement in _rollup_schema(table) + rollup_rebuild_sql(table, prefix)
+    ]),
+    # Keyset pagination: (timestamp) and (area_id, timestamp) end in the rowid,
+    # so they deliver ORDER BY timestamp DESC, id DESC without a sort
+    (3, [
+        "CREATE INDEX IF NOT EXISTS idx_history_page ON detection_history (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_history_area_page ON detection_history (area_id, timestamp)",
+    ]),
+    # One row per detected box, child of detection_history. timestamp and
+    # area_id are copied from the parent so per-class queries never join it.
+    (4, [
+        '''CREATE TABLE IF NOT EXISTS detection_items (
+            history_id INTEGER NOT NULL REFERENCES detection_history (id),
+            item_index INTEGER NOT NULL,    -- Position in the response's detections
+            timestamp TEXT NOT NULL,
+            area_id TEXT,
+            class_id INTEGER NOT NULL,
+            class_name TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            x1 INTEGER NOT NULL,
+            y1 INTEGER NOT NULL,
+            x2 INTEGER NOT NULL,
+            y2 INTEGER NOT NULL,
+            worker_id INTEGER,              -- Person (by order in the frame) the box belongs to
+            worn_mask INTEGER,              -- Person rows: OR of 1 << class_id of their boxes
+            PRIMARY KEY (history_id, item_index)
+        ) WITHOUT ROWID''',
+        '''CREATE INDEX IF NOT EXISTS idx_items_class_time
+            ON detection_items (class_name, timestamp, confidence, worn_mask)''',
+        '''CREATE INDEX IF NOT EXISTS idx_items_area_class_time
+            ON detection_items (area_id, class_name, timestamp, confidence, worn_mask)''',
+    ]),
+]
+
+# ============================================================================
+# CONNECTIONS
+# ============================================================================
+_wal_lock = threading.Lock()
+_wal_enabled = set()
+
+def connect(db_file: str = DB_FILE) -> sqlite3.Connection:
+    """
+    Open a tuned connection. Used by the pool and by background workers
+    that own a dedicated connection (history writer, live metrics, retention).
+    """
+    conn = sqlite3.connect(
+        db_file,
+        timeout=BUSY_TIMEOUT_MS / 1000.0,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    conn.row_factory = sqlite3.Row
+
+    # journal_mode is stored in the DB file itself - switch it once per file
+    with _wal_lock:
+        if db_file not in _wal_enabled:
+            conn.execute("PRAGMA journal_mode = WAL")
+            _wal_enabled.add(db_file)
+
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def migrate(db_file: str = DB_FILE) -> int:
+    """Apply pending MIGRATIONS; returns the resulting schema version"""
+    conn = connect(db_file)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            with conn:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {target}")
+            print(f"[OK] Database migrated to schema v{target}")
+            version = target
+        return version
+    finally:
+        conn.close()
+
+class ConnectionPool:
+    """Fixed-size pool of tuned SQLite connections, created lazily"""
+
+    def __init__(self, db_file: str = DB_FILE, size: int = POOL_SIZE):
+        self.db_file = db_file
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return connect(self.db_file)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=POOL_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError(f"No database connection free after {POOL_TIMEOUT}s")
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; rolled back if the block raises"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+# ============================================================================
+# MODULE-LEVEL POOL + HELPERS
+# ============================================================================
+_pool: Optional[ConnectionPool] = None
+
+def init_pool(db_file: str = DB_FILE, size: int = POOL_SIZE) -> ConnectionPool:
+    """Create the shared pool (call from the app's lifespan)"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = ConnectionPool(db_file, size)
+    return _pool
+
+def get_pool() -> ConnectionPool:
+    if _pool is None:
+        return init_pool()
+    return _pool
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+def fetch_all(sql: str, params: Sequence = ()) -> List[Dict]:
+    with get_pool().connection() as conn:
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+def fetch_one(sql: str, params: Sequence = ()) -> Optional[Dict]:
+    with get_pool().connection() as conn:
+        row = conn.execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+def execute(sql: str, params: Sequence = ()) -> int:
+    """Run one write statement in its own transaction; returns rowcount"""
+    with get_pool().connection() as conn:
+        with conn:
+            return conn.execute(sql, params).rowcount
+
+def executemany(sql: str, rows: Iterable[Sequence]) -> int:
+    """Run a write statement for many rows in ONE transaction"""
+    with get_pool().connection() as conn:
+        with conn:
+            return conn.executemany(sql, rows).rowcount
+
+# ============================================================================
+# HISTORY STATS
+# ============================================================================
+def stats_window(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 hours: float = STATS_WINDOW_HOURS) -> Tuple[str, str]:
+    """
+    Resolve a [since, until) window to the ISO strings stored in
+    detection_history.timestamp (naive local time, so they compare as text).
+    """
+    until = local_time(until) if until else datetime.now()
+    since = local_time(since) if since else until - timedelta(hours=hours)
+    return since.isoformat(), until.isoformat()
+
+def local_time(value: datetime) -> datetime:
+    """Naive local time, the way detection_history stores timestamps"""
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+def history_stats(since: str, until: str, area_id: Optional[str] = None) -> Dict:
+    """Detection count, hazard breakdown and mean compliance for a window"""
+    params = (area_id, since, until) if area_id else (since, until)
+    totals_sql = SQL_HISTORY_TOTALS_AREA if area_id else SQL_HISTORY_TOTALS
+    hazard_sql = SQL_HISTORY_BY_HAZARD_AREA if area_id else SQL_HISTORY_BY_HAZARD
+
+    with get_pool().connection() as conn:
+        total, avg_compliance = conn.execute(totals_sql, params).fetchone()
+        hazards = {row[0]: row[1] for row in conn.execute(hazard_sql, params)}
+
+    return {
+        "total_detections": total,
+        "hazard_levels": hazards,
+        "avg_compliance_rate": round(avg_compliance, 1) if avg_compliance is not None else None,
+        "area_id": area_id,
+        "since": since,
+        "until": until
+    }
+
+# ============================================================================
+# PER-CLASS STATS (detection_items)
+# ============================================================================
+SQL_CLASS_TOTALS = '''SELECT COUNT(*) AS detections, AVG(confidence) AS avg_confidence
+    FROM detection_items
+    WHERE class_name = ? AND timestamp >= ? AND timestamp < ?'''
+SQL_CLASS_TOTALS_AREA = '''SELECT COUNT(*) AS detections, AVG(confidence) AS avg_confidence
+    FROM detection_items
+    WHERE area_id = ? AND class_name = ? AND timestamp >= ? AND timestamp < ?'''
+
+def workers_missing_sql(classes: int, by_area: bool) -> str:
+    """
+    Worker rows in a window, and per PPE class how many lacked it: one pass
+    over the worker rows, testing the class bits (1 << class_id) of worn_mask
+    """
+    missing = ", ".join("SUM((worn_mask & ?) = 0)" for _ in range(classes))
+    area_filter = "area_id = ? AND " if by_area else ""
+    return f'''SELECT COUNT(*) AS workers, {missing}
+        FROM detection_items
+        WHERE {area_filter}class_name = ? AND timestamp >= ? AND timestamp < ?'''
+
+def ppe_stats(since: str, until: str, worker_class: str, ppe_classes: Dict[str, int],
+              area_id: Optional[str] = None) -> Dict:
+    """
+    Per-class detection counts and, for each PPE class ({name: class_id}),
+    how many workers were seen without it - all computed in SQL on detection_items
+    """
+    def scoped(class_name: str) -> Tuple:
+        return (area_id, class_name, since, until) if area_id else (class_name, since, until)
+
+    totals_sql = SQL_CLASS_TOTALS_AREA if area_id else SQL_CLASS_TOTALS
+    missing_sql = workers_missing_sql(len(ppe_classes), bool(area_id))
+    classes = {}
+    with get_pool().connection() as conn:
+        for class_name in [worker_class, *ppe_classes]:
+            count, confidence = conn.execute(totals_sql, scoped(class_name)).fetchone()
+            classes[class_name] = {
+                "detections": count,
+                "avg_confidence": round(confidence, 3) if confidence is not None else None
+            }
+        bits = tuple(1 << class_id for class_id in ppe_classes.values())
+        workers, *counts = conn.execute(missing_sql, bits + scoped(worker_class)).fetchone()
+
+    missing = {name: count or 0 for name, count in zip(ppe_classes, counts)}
+    return {
+        "area_id": area_id,
+        "since": since,
+        "until": until,
+        "workers": workers,
+        "classes": classes,
+        "missing": missing,
+        "missing_rate": {
+            name: round(count / workers * 100, 1) if workers else None for name, count in missing.items()
+        }
+    }
+
+# ============================================================================
+# HISTORY PAGES
+# ============================================================================
+HISTORY_PAGE_COLUMNS = ("id, timestamp, area_id, image_name, detected_classes, "
+                        "compliance_rate, hazard_level, alert_message")
+
+def history_page_sql(area_id: bool = False, hazard_level: bool = False, since: bool = False,
+                     until: bool = False, missing_ppe: bool = False, after: bool = False) -> str:
+    """
+    Newest-first page of detection_history. Filters are ANDed in a fixed order
+    (matching history_page's parameters) so each combination is one cached
+    statement. `after` is the keyset cursor: rows strictly older than (timestamp, id).
+    """
+    clauses = []
+    if area_id:
+        clauses.append("area_id = ?")
+    if hazard_level:
+        clauses.append("hazard_level = ?")
+    if since:
+        clauses.append("timestamp >= ?")
+    if until:
+        clauses.append("timestamp < ?")
+    if missing_ppe:
+        # A worker was in frame (hazard above Low) and the class is absent
+        clauses.append("hazard_level != 'Low' AND instr(',' || detected_classes || ',', ?) = 0")
+    if after:
+        clauses.append("(timestamp, id) < (?, ?)")
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f'''SELECT {HISTORY_PAGE_COLUMNS}
+        FROM detection_history
+        {where}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT ?'''
+
+def history_page(limit: int, area_id: Optional[str] = None, hazard_level: Optional[str] = None,
+                 since: Optional[str] = None, until: Optional[str] = None,
+                 missing_ppe: Optional[str] = None,
+                 after: Optional[Tuple[str, int]] = None) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+    """
+    One page of history, newest first. Returns (rows, next_key); pass next_key
+    back as `after` for the following page. next_key is None on the last page.
+    """
+    sql = history_page_sql(bool(area_id), bool(hazard_level), bool(since), bool(until),
+                           bool(missing_ppe), after is not None)
+    params = [value for value in (area_id, hazard_level, since, until) if value]
+    if missing_ppe:
+        params.append(f",{missing_ppe},")
+    if after is not None:
+        params.extend(after)
+    params.append(limit + 1)    # One extra row tells us whether there is a next page
+
+    rows = fetch_all(sql, params)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["timestamp"], rows[-1]["id"])
@@ -0,0 +1,100 @@
+"""
+SIMANTAP Frame Deadlines
+================================
+A realtime frame is only worth analysing for a short time. Every
+detection request gets a deadline when it reaches the server; work whose
+deadline has passed by the time the model would run is dropped with a
+cheap "expired" answer instead.
+
+- The deadline is the X-Deadline-Ms request header (milliseconds from
+  arrival, clamped to MAX_DEADLINE_MS), or the endpoint's default from
+  DEFAULT_DEADLINES_MS.
+- DeadlineMiddleware stamps it on arrival, before admission queueing and
+  upload parsing, as request.state.deadline (time.monotonic()) and
+  request.state.deadline_ms.
+- ExpiredFrames counts the dropped frames per camera (area_id), for
+  GET /stats/expired.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from admission import CLIENT_TIMEOUT_S, DEADLINE_MARGIN_S
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+DEADLINE_HEADER = "x-deadline-ms"
+REALTIME_DEADLINE_MS = 2000.0                    # A camera frame older than this is stale
+DETECT_DEADLINE_MS = (CLIENT_TIMEOUT_S - DEADLINE_MARGIN_S) * 1000   # Single uploads: the client gives up
+MAX_DEADLINE_MS = CLIENT_TIMEOUT_S * 1000
+DEFAULT_DEADLINES_MS = {
+    "/detect/realtime": REALTIME_DEADLINE_MS,
+    "/detect/stf/realtime": REALTIME_DEADLINE_MS,
+    "/detect/ppe": DETECT_DEADLINE_MS,
+    "/detect/stf": DETECT_DEADLINE_MS,
+}
+UNASSIGNED_AREA = "unassigned"                   # Frames sent without area_id
+
+# ============================================================================
+# DEADLINES
+# ============================================================================
+def deadline_budget_ms(header: Optional[bytes], default_ms: Optional[float]) -> Optional[float]:
+    """Budget from the header if it is a finite number, else the endpoint default"""
+    if header is not None:
+        try:
+            budget_ms = float(header)
+        except ValueError:
+            return default_ms
+        if math.isfinite(budget_ms):
+            return min(max(budget_ms, 0.0), MAX_DEADLINE_MS)
+    return default_ms
+
+def remaining_ms(deadline: Optional[float]) -> Optional[float]:
+    """Milliseconds left before the deadline (negative once passed); None without one"""
+    if deadline is None:
+        return None
+    return (deadline - time.monotonic()) * 1000
+
+def deadline_passed(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+class DeadlineMiddleware:
+    """Pure ASGI: stamps request.state.deadline on arrival for the given paths"""
+
+    def __init__(self, app, defaults_ms: Dict[str, float] = DEFAULT_DEADLINES_MS):
+        self.app = app
+        self.defaults_ms = defaults_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.defaults_ms:
+            header = dict(scope["headers"]).get(DEADLINE_HEADER.encode())
+            budget_ms = deadline_budget_ms(header, self.defaults_ms[scope["path"]])
+            state = scope.setdefault("state", {})
+            state["deadline"] = time.monotonic() + budget_ms / 1000
+            state["deadline_ms"] = budget_ms
+        await self.app(scope, receive, send)
+
+# ============================================================================
+# EXPIRED FRAME COUNTS
+# ============================================================================
+class ExpiredFrames:
+    """Dropped frames per camera since startup; thread-safe"""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._since = datetime.now().isoformat()
+        self._lock = threading.Lock()
+
+    def record(self, area_id: Optional[str]):
+        area = area_id or UNASSIGNED_AREA
+        with self._lock:
+            self._counts[area] = self._counts.get(area, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(sorted(self._counts.items()))
+        return {"total": sum(counts.values()), "by_area": counts, "since": self._since}
@@ -0,0 +1,126 @@
+"""
+SIMANTAP Load-Adaptive Degradation
+================================
+Keeps /detect/realtime answers timely when a shift change floods the
+floor with workers and cameras, by trading accuracy for latency in steps.
+
+- QUALITY_LEVELS go from full quality down: smaller model input, the nano
+  APD model instead of the full one, then no STF at all.
+- DegradationController.request() wraps every realtime request: it counts
+  the requests in flight and records end-to-end latency. Queue depth is
+  those plus the backlog() waiting for admission (admission.py).
+- Overload (p95 of the recent latencies over LATENCY_BUDGET_MS, or a
+  queue depth over QUEUE_HIGH) steps one level down; a quiet spell (p95
+  under RECOVER_BELOW_MS and a queue depth of at most QUEUE_LOW) steps one
+  level back up. Stepping up waits longer than stepping down, and the
+  latency window restarts at every change, so the controller judges each
+  level on its own latencies and does not flap.
+- Every response carries the level it was produced at (describe()).
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# imgsz None = the configured TARGET_IMG_SIZE (also the cap on the others,
+# see main.level_imgsz); model "lite" = the nano APD
+# model (full model when none is loaded); stf False = STF is skipped
+QUALITY_LEVELS = [
+    {"name": "full", "imgsz": None, "model": "full", "stf": True},
+    {"name": "reduced", "imgsz": 480, "model": "full", "stf": True},
+    {"name": "fast", "imgsz": 416, "model": "lite", "stf": True},
+    {"name": "minimal", "imgsz": 320, "model": "lite", "stf": False},
+]
+LATENCY_BUDGET_MS = 150.0      # Recent p95 above this: step down
+RECOVER_BELOW_MS = 75.0        # Recent p95 below this (and queue quiet): step up
+QUEUE_HIGH = 4                 # Queue depth above this: step down
+QUEUE_LOW = 1                  # At most this queue depth to step up
+LATENCY_WINDOW = 32            # Recent requests the p95 is taken over
+MIN_SAMPLES = 8                # Latencies needed before judging a level on them
+STEP_DOWN_AFTER_S = 2.0        # Minimum time at a level before degrading further
+STEP_UP_AFTER_S = 10.0         # Minimum time at a level before recovering
+
+# ============================================================================
+# CONTROLLER
+# ============================================================================
+class DegradationController:
+    """Thread-safe; one per app, shared by the realtime requests"""
+
+    def __init__(self, levels: List[Dict] = QUALITY_LEVELS, backlog: Callable[[], int] = lambda: 0):
+        self.levels = levels
+        self.backlog = backlog
+        self.level = 0
+        self._in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._changed_at = time.monotonic()
+        self._changes = 0
+        self._lock = threading.Lock()
+
+    def describe(self, level: Optional[int] = None) -> Dict:
+        """Quality level as reported in responses"""
+        level = self.level if level is None else level
+        return {"level": level, **self.levels[level]}
+
+    @contextmanager
+    def request(self):
+        """Count one request in flight; yields the quality level to produce it at"""
+        with self._lock:
+            self._in_flight += 1
+            level = self.level
+            self._adjust(time.monotonic())
+        started = time.perf_counter()
+        try:
+            yield self.describe(level)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._in_flight -= 1
+                if level == self.level:                 # Only latencies of the current level count
+                    self._latencies.append(elapsed_ms)
+                self._adjust(time.monotonic())
+
+    def _p95(self) -> Optional[float]:
+        if len(self._latencies) < MIN_SAMPLES:
+            return None
+        return float(np.percentile(self._latencies, 95))
+
+    def _adjust(self, now: float):
+        """Step one level down on overload, one up after a quiet spell (caller holds the lock)"""
+        p95 = self._p95()
+        depth = self._in_flight + self.backlog()
+        dwell = now - self._changed_at
+        overloaded = depth > QUEUE_HIGH or (p95 is not None and p95 > LATENCY_BUDGET_MS)
+        quiet = depth <= QUEUE_LOW and p95 is not None and p95 < RECOVER_BELOW_MS
+
+        if overloaded and self.level < len(self.levels) - 1 and dwell >= STEP_DOWN_AFTER_S:
+            self._set_level(self.level + 1, now, f"p95 {p95} ms, queue depth {depth}")
+        elif quiet and self.level > 0 and dwell >= STEP_UP_AFTER_S:
+            self._set_level(self.level - 1, now, f"p95 {p95:.1f} ms, queue depth {depth}")
+
+    def _set_level(self, level: int, now: float, reason: str):
+        direction = "down" if level > self.level else "up"
+        print(f"[!] Realtime quality {direction} to {self.levels[level]['name']} ({reason})")
+        self.level = level
+        self._changed_at = now
+        self._changes += 1
+        self._latencies.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            p95 = self._p95()
+            return {
+                "quality": self.describe(),
+                "in_flight": self._in_flight,
+                "queued": self.backlog(),
+                "recent_p95_ms": round(p95, 1) if p95 is not None else None,
+                "seconds_at_level": round(time.monotonic() - self._changed_at, 1),
+                "level_changes": self._changes,
+                "levels": [self.describe(i) for i in range(len(self.levels))]
+            }
@@ -0,0 +1,239 @@
+"""
+SIMANTAP Detection Engines
+================================
+One app, several ways to run detection. Every engine takes decoded RGB
+frames (main.py's preprocess_image output) and answers in main.py's
+response schema - person + PPE detections and an STF result
+{"hazard_type", "confidence", "safe"} - so a client cannot tell which
+engine answered except by latency and accuracy:
+
+- heuristic   no model: ppe_heuristics (worker search + body bands) and
+              stf_heuristics; what main_simple.py / main_backup_old.py's
+              detect_ppe_numpy ran
+- yolo-torch  the APD/STF YOLO models (.pt) on PyTorch
+- yolo-onnx   the same weights exported to ONNX, next to the .pt files
+              (yolo export model=models/best_apd.pt format=onnx)
+- cascade     heuristic first; only frames where it sees a worker (PPE) or
+              a hazard (STF) are run again on the best model engine
+
+main.py registers the engines; the deployment picks the default
+(SIMANTAP_ENGINE) and a request may pick another with ?engine=.
+rank_engines times every available engine on the current machine.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ppe_heuristics import analyze_ppe_array
+from stf_heuristics import analyze_stf_batch
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+BENCHMARK_FRAMES = 4             # Synthetic frames per engine in rank_engines
+BENCHMARK_REPEAT = 3
+
+# ============================================================================
+# ENGINES
+# ============================================================================
+class EngineError(ValueError):
+    """Unknown engine (400), or one that cannot run on this deployment (503)"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Engine:
+    """
+    A named detector. detect_ppe(frames) returns a detection list per frame
+    (persons first, empty when no person is found), detect_stf(frames) an
+    STF result per frame; available() says whether it can run right now.
+    """
+
+    def __init__(self, name: str, description: str,
+                 detect_ppe: Callable[[List[np.ndarray]], List[List[Dict]]],
+                 detect_stf: Callable[[List[np.ndarray]], List[Dict]],
+                 available: Callable[[], bool] = lambda: True):
+        self.name = name
+        self.description = description
+        self.detect_ppe = detect_ppe
+        self.detect_stf = detect_stf
+        self.available = available
+
+    def describe(self) -> Dict:
+        return {"name": self.name, "description": self.description, "available": self.available()}
+
+
+class EngineRegistry:
+    """Engines by name, plus the deployment default"""
+
+    def __init__(self, default: str):
+        self.default = default
+        self._engines: Dict[str, Engine] = OrderedDict()
+
+    def register(self, engine: Engine) -> Engine:
+        self._engines[engine.name] = engine
+        return engine
+
+    def names(self) -> List[str]:
+        return list(self._engines)
+
+    def lookup(self, name: Optional[str] = None) -> Engine:
+        """Engine by name (default when None), available or not"""
+        name = name or self.default
+        if name not in self._engines:
+            raise EngineError(f"Unknown engine '{name}', expected one of: {', '.join(self._engines)}")
+        return self._engines[name]
+
+    def get(self, name: Optional[str] = None) -> Engine:
+        """Engine by name (default when None) that can run now"""
+        engine = self.lookup(name)
+        if not engine.available():
+            raise EngineError(f"Engine '{engine.name}' is not available on this deployment", status_code=503)
+        return engine
+
+    def first_available(self, names: List[str]) -> Optional[Engine]:
+        for name in names:
+            if name in self._engines and self._engines[name].available():
+                return self._engines[name]
+        return None
+
+    def describe(self) -> Dict:
+        return {"default": self.default, "engines": [engine.describe() for engine in self._engines.values()]}
+
+# ============================================================================
+# HEURISTIC ENGINE
+# ============================================================================
+def heuristic_detections(frame: np.ndarray, class_ids: Dict[str, int], person_name: str) -> List[Dict]:
+    """
+    ppe_heuristics result in the model schema: one person per worker found
+    by the window search (the whole frame when it only had the bands to
+    go on), then the PPE items with the model's class IDs.
+    """
+    result = analyze_ppe_array(frame, search=True)
+    if not result["has_worker"]:
+        return []
+
+    height, width = frame.shape[:2]
+    ppe_confidence = max((det["confidence"] for det in result["detections"]), default=0.0)
+    workers = result.get("workers") or [
+        {"score": ppe_confidence, "bbox": {"x1": 0, "y1": 0, "x2": width, "y2": height}}
+    ]
+
+    detections = []
+    for worker in workers:
+        bbox = dict(worker["bbox"])
+        detections.append({
+            "class_id": class_ids[person_name],
+            "class_name": person_name,
+            "confidence": round(float(worker["score"]), 3),
+            "bbox": bbox,
+            "area_x1": bbox["x1"], "area_y1": bbox["y1"], "area_x2": bbox["x2"], "area_y2": bbox["y2"]
+        })
+    for det in result["detections"]:
+        detections.append({
+            "class_id": class_ids[det["class_name"]],
+            "class_name": det["class_name"],
+            "confidence": round(float(det["confidence"]), 3),
+            "bbox": dict(det["bbox"])
+        })
+    return detections
+
+
+def heuristic_engine(class_names: Dict[int, str], person_name: str) -> Engine:
+    """class_names: the APD model's class ID -> name map, so IDs match the YOLO engines"""
+    class_ids = {name: class_id for class_id, name in class_names.items()}
+    return Engine(
+        "heuristic", "Image statistics only, no model (fastest, least accurate)",
+        detect_ppe=lambda frames: [heuristic_detections(frame, class_ids, person_name) for frame in frames],
+        detect_stf=analyze_stf_batch
+    )
+
+# ============================================================================
+# CASCADE ENGINE
+# ============================================================================
+def escalate(frames: List[np.ndarray], screened: List, needs_model: Callable,
+             detect: Optional[Callable]) -> List:
+    """Replace the screened results that need_model with detect() on those frames only"""
+    if detect is None:
+        return screened
+    indices = [i for i, result in enumerate(screened) if needs_model(result)]
+    if indices:
+        for i, result in zip(indices, detect([frames[i] for i in indices])):
+            screened[i] = result
+    return screened
+
+
+def cascade_engine(screen: Engine, registry: EngineRegistry, confirm_with: List[str]) -> Engine:
+    """
+    screen every frame, and send only the interesting ones to the first
+    available engine of confirm_with (the heuristic answer stands when
+    none is available).
+    """
+    def model() -> Optional[Engine]:
+        return registry.first_available(confirm_with)
+
+    def detect_ppe(frames: List[np.ndarray]) -> List[List[Dict]]:
+        confirm = model()
+        return escalate(frames, screen.detect_ppe(frames), bool, confirm and confirm.detect_ppe)
+
+    def detect_stf(frames: List[np.ndarray]) -> List[Dict]:
+        confirm = model()
+        return escalate(frames, screen.detect_stf(frames), lambda stf: not stf["safe"], confirm and confirm.detect_stf)
+
+    return Engine(
+        "cascade", "Heuristic screen, model only for frames with a worker or hazard",
+        detect_ppe=detect_ppe, detect_stf=detect_stf
+    )
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+def benchmark_frames(count: int, size: int) -> List[np.ndarray]:
+    """Deterministic test frames: smooth gradients with blocks, not noise"""
+    rng = np.random.default_rng(0)
+    ramp = np.linspace(40, 200, size, dtype=np.float32)
+    frames = []
+    for _ in range(count):
+        frame = np.empty((size, size, 3), dtype=np.float32)
+        frame[:] = ramp[:, None, None] * rng.uniform(0.6, 1.2, 3)
+        for _ in range(6):
+            y, x = rng.integers(0, size - size // 4, 2)
+            frame[y:y + size // 4, x:x + size // 8] = rng.uniform(0, 255, 3)
+        frames.append(np.clip(frame, 0, 255).astype(np.uint8))
+    return frames
+
+
+def rank_engines(registry: EngineRegistry, size: int, count: int = BENCHMARK_FRAMES,
+                 repeat: int = BENCHMARK_REPEAT) -> List[Dict]:
+    """
+    Per-frame latency (PPE + STF, one frame per call, as the realtime
+    endpoints run) of every available engine, fastest first; engines that
+    cannot run here are listed last without a figure.
+    """
+    frames = benchmark_frames(count, size)
+    ranked, unavailable = [], []
+    for name in registry.names():
+        engine = registry.lookup(name)
+        if not engine.available():
+            unavailable.append({"engine": name, "available": False, "ms_per_frame": None})
+            continue
+        for frame in frames[:1]:                                # Warm-up (lazy model init)
+            engine.detect_ppe([frame])
+            engine.detect_stf([frame])
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for frame in frames:
+                engine.detect_ppe([frame])
+                engine.detect_stf([frame])
+        ms = (time.perf_counter() - start) / (repeat * len(frames)) * 1000
+        ranked.append({"engine": name, "available": True, "ms_per_frame": round(ms, 2)})
+
+    ranked.sort(key=lambda row: row["ms_per_frame"])
+    for rank, row in enumerate(ranked, 1):
+        row["rank"] = rank
+    return ranked + unavailable
@@ -0,0 +1,194 @@
+"""
+SIMANTAP History Writer
+================================
+Write-behind persistence for detection_history.
+
+Detection handlers call submit(), which only puts the record on a bounded
+in-memory queue and never touches disk. A single background thread owns the
+SQLite connection and flushes queued rows in ONE transaction per batch,
+whenever HISTORY_BATCH_SIZE rows are waiting or the oldest waiting row is
+HISTORY_FLUSH_MS old. Each record's boxes go to the detection_items child
+table and the rollup tables (rollups.py) are updated in the same
+transaction. When the queue is full, new records are dropped (and counted)
+rather than slowing down frame handling.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from database import connect
+from rollups import apply_rollups
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+HISTORY_BATCH_SIZE = 200       # Flush once this many rows are waiting...
+HISTORY_FLUSH_MS = 500         # ...or once the oldest waiting row is this old
+HISTORY_MAX_QUEUE = 10000      # Bounded: ~10k pending rows max in memory
+
+INSERT_HISTORY_SQL = '''INSERT INTO detection_history
+    (timestamp, area_id, image_name, detected_classes, compliance_rate, hazard_level, alert_message, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+INSERT_ITEM_SQL = '''INSERT INTO detection_items
+    (history_id, item_index, timestamp, area_id, class_id, class_name, confidence, x1, y1, x2, y2, worker_id, worn_mask)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+# ============================================================================
+# DETECTION ITEMS
+# ============================================================================
+def assign_workers(detections: List[Dict]) -> List[Optional[int]]:
+    """
+    worker_id per detection: persons (rows carrying area_x1..) are numbered in
+    order; a PPE box belongs to the smallest person box containing its centre.
+    None when no person contains it.
+    """
+    persons = [(i, d["bbox"]) for i, d in enumerate(detections) if "area_x1" in d]
+    worker_of = {index: worker for worker, (index, _) in enumerate(persons)}
+    assigned = []
+    for index, det in enumerate(detections):
+        if index in worker_of:
+            assigned.append(worker_of[index])
+            continue
+        box = det["bbox"]
+        cx, cy = (box["x1"] + box["x2"]) / 2, (box["y1"] + box["y2"]) / 2
+        best, best_area = None, None
+        for worker, (_, p) in enumerate(persons):
+            if p["x1"] <= cx <= p["x2"] and p["y1"] <= cy <= p["y2"]:
+                area = (p["x2"] - p["x1"]) * (p["y2"] - p["y1"])
+                if best_area is None or area < best_area:
+                    best, best_area = worker, area
+        assigned.append(best)
+    return assigned
+
+def item_rows(history_id: int, record: Dict) -> List[tuple]:
+    """
+    detection_items rows for one history record. Person rows also get
+    worn_mask, the class bits of the boxes assigned to them, so per-class
+    "worker without X" counts need no self-join.
+    """
+    detections = record.get("detections") or []
+    workers = assign_workers(detections)
+    worn = {}
+    for det, worker in zip(detections, workers):
+        if worker is not None and "area_x1" not in det:
+            worn[worker] = worn.get(worker, 0) | (1 << det["class_id"])
+    return [(
+        history_id, index, record["timestamp"], record.get("area_id"),
+        det["class_id"], det["class_name"], det["confidence"],
+        det["bbox"]["x1"], det["bbox"]["y1"], det["bbox"]["x2"], det["bbox"]["y2"],
+        worker, worn.get(worker, 0) if "area_x1" in det else None
+    ) for index, (det, worker) in enumerate(zip(detections, workers))]
+
+# ============================================================================
+# WRITER
+# ============================================================================
+class HistoryWriter:
+    """Background batch writer for detection_history rows"""
+
+    def __init__(self, db_file: str, batch_size: int = HISTORY_BATCH_SIZE,
+                 flush_interval_ms: int = HISTORY_FLUSH_MS, max_queue: int = HISTORY_MAX_QUEUE):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()   # Counters: written by producers and the writer, read by stats()
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ---- lifecycle --------------------------------------------------------
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything still queued, then stop the thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        print(f"[OK] History writer stopped ({self.written} rows written, {self.dropped} dropped)")
+
+    # ---- producer side ----------------------------------------------------
+    def submit(self, record: Dict) -> bool:
+        """
+        Queue one detection_history record. Never blocks.
+        Returns False if the queue is full and the record was dropped.
+        """
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches
+            }
+
+    # ---- writer thread ----------------------------------------------------
+    def _flush(self, conn: sqlite3.Connection, batch: List[Dict]):
+        rows = [(
+            r["timestamp"], r.get("area_id"), r.get("image_name"), r["detected_classes"],
+            r["compliance_rate"], r["hazard_level"], r["alert_message"], r["created_at"]
+        ) for r in batch]
+        try:
+            with conn:
+                conn.executemany(INSERT_HISTORY_SQL, rows)
+                # The batch holds the write lock, so its ids are consecutive
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                first_id = last_id - len(rows) + 1
+                conn.executemany(INSERT_ITEM_SQL, [
+                    item for offset, record in enumerate(batch) for item in item_rows(first_id + offset, record)
+                ])
+                apply_rollups(conn, rows)
+            with self._lock:
+                self.written += len(rows)
+                self.batches += 1
+        except Exception as e:
+            with self._lock:
+                self.failed += len(rows)
+            print(f"[!] History flush failed ({len(rows)} rows): {e}")
+
+    def _run(self):
+        conn = connect(self.db_file)
+        batch = []
+        deadline = 0.0
+        try:
+            while True:
+                wait = max(0.0, deadline - time.monotonic()) if batch else self.flush_interval
+                try:
+                    batch.append(self._queue.get(timeout=wait))
+                    if len(batch) == 1:
+                        deadline = time.monotonic() + self.flush_interval
+                except queue.Empty:
+                    pass
+
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self._flush(conn, batch)
+                    batch = []
+
+                if self._stop.is_set() and self._queue.empty():
+                    break
+
+            if batch:
+                self._flush(conn, batch)
+        finally:
+            conn.close()
@@ -0,0 +1,298 @@
+"""
+SIMANTAP Live Metrics
+================================
+In-memory dashboard counters fed by every detection result, so
+/stats/summary never touches the database.
+
+- All-time totals: inspections, compliance, violations, per-PPE-item counts
+- Today: inspections, violations and areas with a High hazard (reset at
+  local midnight)
+- Rolling compliance over sliding windows (1m / 5m / 15m / 1h): one ring
+  buffer of per-second slots plus a running sum per window. Recording a
+  result and reading a window are both O(1); advancing the clock subtracts
+  the slots that fall out of each window.
+
+State is checkpointed to SQLite (table live_metrics) every
+METRICS_CHECKPOINT_SECONDS and on shutdown, and restored on startup.
+"""
+
+import json
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from database import connect
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+METRICS_WINDOWS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+METRICS_CHECKPOINT_SECONDS = 30
+METRICS_PPE_ITEMS = {"helmet": "Topi", "vest": "Pakaian", "shoes": "Sepatu"}
+
+CREATE_METRICS_SQL = '''CREATE TABLE IF NOT EXISTS live_metrics (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    saved_at TEXT NOT NULL
+)'''
+SELECT_METRICS_SQL = "SELECT state FROM live_metrics WHERE name = ?"
+UPSERT_METRICS_SQL = '''INSERT INTO live_metrics (name, state, saved_at) VALUES (?, ?, ?)
+    ON CONFLICT (name) DO UPDATE SET state = excluded.state, saved_at = excluded.saved_at'''
+
+# ============================================================================
+# SLIDING WINDOWS
+# ============================================================================
+class RollingWindows:
+    """
+    Per-second ring buffer shared by several window lengths. Slot i holds
+    (worker inspections, compliance sum, violations) of second i % size.
+    """
+
+    def __init__(self, windows: Dict[str, int]):
+        self.windows = dict(windows)
+        self.size = max(self.windows.values())
+        self.counts = [0] * self.size
+        self.sums = [0.0] * self.size
+        self.violations = [0] * self.size
+        self.totals = {name: [0, 0.0, 0] for name in self.windows}
+        self.head = int(time.time())
+
+    def reset(self, now: int):
+        self.counts = [0] * self.size
+        self.sums = [0.0] * self.size
+        self.violations = [0] * self.size
+        self.totals = {name: [0, 0.0, 0] for name in self.windows}
+        self.head = now
+
+    def advance(self, now: int):
+        """Move the head to `now`, dropping expired seconds from every window"""
+        if now <= self.head:
+            return
+        if now - self.head >= self.size:
+            self.reset(now)
+            return
+        for second in range(self.head + 1, now + 1):
+            for name, length in self.windows.items():
+                expired = (second - length) % self.size
+                total = self.totals[name]
+                total[0] -= self.counts[expired]
+                total[1] -= self.sums[expired]
+                total[2] -= self.violations[expired]
+            slot = second % self.size
+            self.counts[slot] = 0
+            self.sums[slot] = 0.0
+            self.violations[slot] = 0
+        self.head = now
+
+    def add(self, now: int, compliance_rate: float, violation: bool):
+        self.advance(now)
+        slot = now % self.size
+        self.counts[slot] += 1
+        self.sums[slot] += compliance_rate
+        self.violations[slot] += int(violation)
+        for total in self.totals.values():
+            total[0] += 1
+            total[1] += compliance_rate
+            total[2] += int(violation)
+
+    def snapshot(self, now: int) -> Dict:
+        self.advance(now)
+        return {
+            name: {
+                "inspections": count,
+                "compliance_rate": round(compliance / count, 1) if count else None,
+                "violations": violations
+            }
+            for name, (count, compliance, violations) in self.totals.items()
+        }
+
+    # ---- checkpoint -------------------------------------------------------
+    def to_state(self) -> Dict:
+        """Non-empty slots only, as [second, count, sum, violations]"""
+        slots = []
+        for second in range(self.head - self.size + 1, self.head + 1):
+            slot = second % self.size
+            if self.counts[slot]:
+                slots.append([second, self.counts[slot], self.sums[slot], self.violations[slot]])
+        return {"head": self.head, "slots": slots}
+
+    def load_state(self, state: Dict):
+        self.reset(state["head"])
+        for second, count, compliance, violations in state["slots"]:
+            slot = second % self.size
+            self.counts[slot], self.sums[slot], self.violations[slot] = count, compliance, violations
+            for name, length in self.windows.items():
+                if second > self.head - length:
+                    total = self.totals[name]
+                    total[0] += count
+                    total[1] += compliance
+                    total[2] += violations
+
+# ============================================================================
+# AGGREGATOR
+# ============================================================================
+class LiveMetrics:
+    """Thread-safe live counters with periodic SQLite checkpoints"""
+
+    def __init__(self, db_file: str, name: str = "default",
+                 checkpoint_seconds: float = METRICS_CHECKPOINT_SECONDS):
+        self.db_file = db_file
+        self.name = name
+        self.checkpoint_seconds = checkpoint_seconds
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.windows = RollingWindows(METRICS_WINDOWS)
+        self.total_inspections = 0        # Every result, worker or not
+        self.worker_inspections = 0       # Results with a worker in frame
+        self.compliance_sum = 0.0
+        self.total_violations = 0
+        self.complete = 0                 # Worker with every PPE item
+        self.ppe_counts = {item: 0 for item in METRICS_PPE_ITEMS.values()}
+        self.day = date.today().isoformat()
+        self.inspections_today = 0
+        self.violations_today = 0
+        self.high_risk_areas_today = set()
+
+    # ---- lifecycle --------------------------------------------------------
+    def start(self):
+        self.restore()
+        self._thread = threading.Thread(target=self._run, name="live-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+        self.checkpoint()
+        print(f"[OK] Live metrics checkpointed ({self.total_inspections} inspections)")
+
+    def _run(self):
+        while not self._stop.wait(self.checkpoint_seconds):
+            self.checkpoint()
+
+    # ---- producer side ----------------------------------------------------
+    def record(self, compliance: Dict, area_id: Optional[str] = None):
+        """Count one detection result (the `compliance` dict of a response)"""
+        has_worker = compliance.get("has_worker", False)
+        hazard_level = compliance.get("hazard_level")
+        violation = has_worker and hazard_level != "Low"
+        now = time.time()
+
+        with self._lock:
+            self._roll_day()
+            self.total_inspections += 1
+            self.inspections_today += 1
+            if not has_worker:
+                return
+
+            rate = compliance.get("compliance_rate", 0.0)
+            detected = set(compliance.get("detected_ppe", []))
+            self.worker_inspections += 1
+            self.compliance_sum += rate
+            self.complete += int(not compliance.get("missing_ppe"))
+            for item in self.ppe_counts:
+                self.ppe_counts[item] += int(item in detected)
+            if violation:
+                self.total_violations += 1
+                self.violations_today += 1
+            if hazard_level == "High" and area_id:
+                self.high_risk_areas_today.add(area_id)
+            self.windows.add(int(now), rate, violation)
+
+    def _roll_day(self):
+        today = date.today().isoformat()
+        if today != self.day:
+            self.day = today
+            self.inspections_today = 0
+            self.violations_today = 0
+            self.high_risk_areas_today = set()
+
+    # ---- read side --------------------------------------------------------
+    def summary(self) -> Dict:
+        """Dashboard summary (StatsResponse in the frontend) plus rolling windows"""
+        with self._lock:
+            self._roll_day()
+            workers = self.worker_inspections
+
+            def percent(count: int) -> float:
+                return round(count / workers * 100, 1) if workers else 0.0
+
+            breakdown = {key: percent(self.ppe_counts[item]) for key, item in METRICS_PPE_ITEMS.items()}
+            breakdown["complete"] = percent(self.complete)
+            return {
+                "total_inspections": self.total_inspections,
+                "compliance_rate": round(self.compliance_sum / workers, 1) if workers else 0.0,
+                "violations_today": self.violations_today,
+                "high_risk_areas": len(self.high_risk_areas_today),
+                "ppe_breakdown": breakdown,
+                "inspections_today": self.inspections_today,
+                "total_violations": self.total_violations,
+                "rolling": self.windows.snapshot(int(time.time())),
+                "timestamp": datetime.now().isoformat()
+            }
+
+    # ---- checkpoint -------------------------------------------------------
+    def _state(self) -> Dict:
+        return {
+            "total_inspections": self.total_inspections,
+            "worker_inspections": self.worker_inspections,
+            "compliance_sum": self.compliance_sum,
+            "total_violations": self.total_violations,
+            "complete": self.complete,
+            "ppe_counts": self.ppe_counts,
+            "day": self.day,
+            "inspections_today": self.inspections_today,
+            "violations_today": self.violations_today,
+            "high_risk_areas_today": sorted(self.high_risk_areas_today),
+            "windows": self.windows.to_state()
+        }
+
+    def checkpoint(self):
+        with self._lock:
+            state = json.dumps(self._state())
+        try:
+            conn = connect(self.db_file)
+            try:
+                with conn:
+                    conn.execute(CREATE_METRICS_SQL)
+                    conn.execute(UPSERT_METRICS_SQL, (self.name, state, datetime.now().isoformat()))
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"[!] Live metrics checkpoint failed: {e}")
+
+    def restore(self) -> bool:
+        """Load the last checkpoint, if any"""
+        try:
+            conn = connect(self.db_file)
+            try:
+                with conn:
+                    conn.execute(CREATE_METRICS_SQL)
+                row = conn.execute(SELECT_METRICS_SQL, (self.name,)).fetchone()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"[!] Live metrics restore failed: {e}")
+            return False
+        if row is None:
+            return False
+
+        state = json.loads(row[0])
+        with self._lock:
+            self.total_inspections = state["total_inspections"]
+            self.worker_inspections = state["worker_inspections"]
+            self.compliance_sum = state["compliance_sum"]
+            self.total_violations = state["total_violations"]
+            self.complete = state["complete"]
+            self.ppe_counts.update(state["ppe_counts"])
+            self.day = state["day"]
+            self.inspections_today = state["inspections_today"]
+            self.violations_today = state["violations_today"]
+            self.high_risk_areas_today = set(state["high_risk_areas_today"])
+            self.windows.load_state(state["windows"])
+            self._roll_day()
+        print(f"[OK] Live metrics restored ({self.total_inspections} inspections)")
+        return True
@@ -10,22 +10,60 @@ Model Strategy:
 - Primary: YOLOv8/v12 custom trained model (APD)
 - Secondary: YOLOv8/v12 custom trained model (STF)
 - Fallback: None (return empty if model fails)
+
+Engines (see engines.py): heuristic, yolo-torch, yolo-onnx, cascade -
+default per deployment (SIMANTAP_ENGINE), or per request with ?engine=.
+
+Under load /detect/realtime steps down through degradation.QUALITY_LEVELS
+(smaller input, nano APD model, no STF) and back up when load subsides.
+Detection requests that cannot finish in time get 429 + Retry-After
+(admission.py); frames whose deadline passed before the model ran get a
+cheap "expired" answer (deadlines.py).
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from contextlib import asynccontextmanager
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import os
 import io
-import sqlite3
+import json
+import base64
+import hashlib
+import threading
+import time
+import zipfile
+import uuid
 from datetime import datetime
 import numpy as np
 from PIL import Image
 import cv2
-from ultralytics import YOLO
+import asyncio
+try:
+    from ultralytics import YOLO
+except ImportError:                 # Heuristic engine only
+    YOLO = None
+from video_jobs import VideoJobManager, DEFAULT_SAMPLE_FPS
+from result_codec import negotiate
+from history_writer import HistoryWriter
+from live_metrics import LiveMetrics
+from retention import RetentionJob
+from reference_data import ReferenceData, etag_response
+from bulk_import import BulkImportError, import_pooled, parse_records
+from rollups import ROLLUP_MAX_BUCKETS, bucket_count, rollup_stats
+from stf_heuristics import analyze_stf_batch
+from engines import (Engine, EngineError, EngineRegistry, cascade_engine, heuristic_engine,
+                     rank_engines)
+from degradation import DegradationController
+from admission import (AdmissionController, AdmissionMiddleware, DETECT_SLOTS, DETECT_MAX_QUEUED,
+                       BATCH_SLOTS, BATCH_MAX_QUEUED, BATCH_INITIAL_SERVICE_S)
+from deadlines import DeadlineMiddleware, ExpiredFrames, deadline_passed, remaining_ms
+import autotune
+import database as db
 
 # ============================================================================
 # CONFIGURATION
@@ -36,19 +74,71 @@ DATA_DIR = "data"
 # Model Paths - CRITICAL: Pastikan file ini ada!
 MODEL_APD_PATH = "models/best_apd.pt"  # YOLOv8/v12 trained on APD dataset
 MODEL_STF_PATH = "models/best_stf.pt"  # YOLOv8/v12 trained on STF dataset
+MODEL_APD_LITE_PATH = "models/best_apd_nano.pt"  # Nano APD model for degraded realtime levels (optional)
 
 # Fallback model if custom models not available
 MODEL_FALLBACK_PATH = "yolov8n.pt"  # Generic fallback for testing
 
-# Image preprocessing
+# Detection engine used when a request has no ?engine= (see engines.py)
+DETECTION_ENGINE = os.environ.get("SIMANTAP_ENGINE", "yolo-torch")
+
+# Image preprocessing (TARGET_IMG_SIZE and BATCH_SIZE are replaced by the
+# auto-tuned values when autotune.AUTOTUNE_FILE exists, see apply_tuning)
 TARGET_IMG_SIZE = 640
 CONFIDENCE_THRESHOLD = 0.50
 
+# Re-tune on every start (SIMANTAP_AUTOTUNE=1) instead of only via the CLI
+AUTOTUNE_ON_START = os.environ.get("SIMANTAP_AUTOTUNE") == "1"
+
+# Batch detection (/detect/batch)
+BATCH_SIZE = 8                    # Images per model call
+BATCH_DECODE_WORKERS = min(8, os.cpu_count() or 1)
+MAX_BATCH_IMAGES = 1000           # Per request, after ZIP expansion
+MAX_BATCH_IMAGE_BYTES = 20 * 1024 * 1024     # Per image (ZIP members: uncompressed size)
+MAX_BATCH_TOTAL_BYTES = 512 * 1024 * 1024    # All images of one request, after ZIP expansion
+BATCH_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+BATCH_UPLOAD_CHUNK = 1024 * 1024  # Uploads are read 1 MB at a time, limits checked per chunk
+
+# Annotated images (?annotate=true)
+ANNOTATE_DEFAULT_FORMAT = "webp"  # "webp" or "jpeg"
+ANNOTATE_DEFAULT_QUALITY = 80
+ANNOTATION_CACHE_SIZE = 256       # Rendered frames kept, keyed by frame and overlay hash
+
+# Offline video jobs (/jobs/video)
+VIDEO_DIR = os.path.join(DATA_DIR, "videos")
+VIDEO_UPLOAD_CHUNK = 1024 * 1024  # Stream uploads to disk 1 MB at a time
+
+# Detection history API (/history)
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGE_SIZE = 500
+
 # Global Models
 model_apd = None
 model_stf = None
+model_apd_lite = None               # Nano APD model (degradation "lite" levels)
+model_apd_onnx = None               # ONNX exports of the loaded models (yolo-onnx engine)
+model_stf_onnx = None
 models_available = False
 using_fallback_model = False  # Track if we're using fallback model vs custom
+video_job_manager = None
+history_writer = None
+live_metrics = None
+retention_job = None
+reference_data = ReferenceData()    # Areas + APD items, loaded in lifespan, reloaded on POST
+detect_admission = AdmissionController("detect", DETECT_SLOTS, DETECT_MAX_QUEUED)
+batch_admission = AdmissionController("batch", BATCH_SLOTS, BATCH_MAX_QUEUED,
+                                      initial_service_s=BATCH_INITIAL_SERVICE_S)
+degradation = DegradationController(backlog=lambda: detect_admission.queued)   # Realtime quality level under load
+expired_frames = ExpiredFrames()    # Frames dropped past their deadline, per camera
+
+# One lock per loaded model (by id): ultralytics models aren't safe to call
+# from several threads at once; decoding and encoding stay parallel
+model_locks: Dict[int, threading.Lock] = {}
+model_locks_guard = threading.Lock()
+
+# Rendered annotated images: (frame hash, overlay hash, format, quality) -> data URL
+annotation_cache = OrderedDict()
+annotation_cache_lock = threading.Lock()
 
 
 # ============================================================================
@@ -70,6 +160,22 @@ CLASS_NAMES_STF = {
 
 PPE_REQUIREMENTS = ["Topi", "Sepatu", "Pakaian"]
 
+# Overlay colors (BGR) for annotated images
+CLASS_COLORS = {
+    "Pekerja": (244, 133, 66),
+    "Person": (244, 133, 66),
+    "Topi": (83, 168, 52),
+    "Sepatu": (5, 188, 251),
+    "Pakaian": (67, 112, 255)
+}
+HAZARD_COLORS = {"Low": (83, 168, 52), "Medium": (5, 188, 251), "High": (53, 67, 234)}
+
+# format -> (extension, OpenCV quality flag, MIME type)
+ANNOTATION_FORMATS = {
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, "image/webp"),
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, "image/jpeg")
+}
+
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
@@ -90,50 +196,50 @@ class APDItem(BaseModel):
 # DATABASE INITIALIZATION
 # ============================================================================
 def init_database():
-    """Initialize SQLite database"""
-    if not os.path.exists(DB_FILE):
-        try:
-            conn = sqlite3.connect(DB_FILE)
-            cursor = conn.cursor()
-            
-            cursor.execute('''CREATE TABLE IF NOT EXISTS areas (
-                area_id TEXT PRIMARY KEY,
-                area_name TEXT NOT NULL,
-                location TEXT NOT NULL,
-                risk_level TEXT NOT NULL,
-                description TEXT,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )''')
-            
-            cursor.execute('''CREATE TABLE IF NOT EXISTS apd_items (
-                item_id TEXT PRIMARY KEY,
-                item_name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                description TEXT,
-                training_samples INTEGER,
-                accuracy REAL,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )''')
-            
-            cursor.execute('''CREATE TABLE IF NOT EXISTS detection_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                area_id TEXT,
-                image_name TEXT,
-                detected_classes TEXT,
-                compliance_rate REAL,
-                hazard_level TEXT,
-                alert_message TEXT,
-                created_at TEXT NOT NULL
-            )''')
-            
-            conn.commit()
-            conn.close()
-            print("[OK] Database initialized")
-        except Exception as e:
-            print(f"[!] Database error: {e}")
+    """Initialize SQLite database (idempotent - also upgrades older files)"""
+    try:
+        conn = db.connect(DB_FILE)
+        cursor = conn.cursor()
+        
+        cursor.execute('''CREATE TABLE IF NOT EXISTS areas (
+            area_id TEXT PRIMARY KEY,
+            area_name TEXT NOT NULL,
+            location TEXT NOT NULL,
+            risk_level TEXT NOT NULL,
+            description TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )''')
+        
+        cursor.execute('''CREATE TABLE IF NOT EXISTS apd_items (
+            item_id TEXT PRIMARY KEY,
+            item_name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT,
+            training_samples INTEGER,
+            accuracy REAL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )''')
+        
+        cursor.execute('''CREATE TABLE IF NOT EXISTS detection_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            area_id TEXT,
+            image_name TEXT,
+            detected_classes TEXT,
+            compliance_rate REAL,
+            hazard_level TEXT,
+            alert_message TEXT,
+            created_at TEXT NOT NULL
+        )''')
+        
+        conn.commit()
+        conn.close()
+        db.migrate(DB_FILE)
+        print("[OK] Database initialized")
+    except Exception as e:
+        print(f"[!] Database error: {e}")
 
 # ============================================================================
 # MODEL LOADING
@@ -143,19 +249,25 @@ def load_models():
     Load YOLOv8/v12 models for APD and STF detection.
     Fallback: Use generic yolov8n.pt for testing if custom models unavailable.
     """
-    global model_apd, model_stf, models_available, using_fallback_model
+    global model_apd, model_stf, model_apd_lite, model_apd_onnx, model_stf_onnx, models_available, using_fallback_model
+    
+    if YOLO is None:
+        print("[!] ultralytics not installed - only the heuristic engine is available")
+        return
     
     try:
         # Load APD Model
         if os.path.exists(MODEL_APD_PATH):
             print(f"[*] Loading APD Model: {MODEL_APD_PATH}")
             model_apd = YOLO(MODEL_APD_PATH)
+            model_apd_onnx = load_onnx_export(MODEL_APD_PATH)
             print("[OK] APD Model (custom) loaded")
             using_fallback_model = False
         elif os.path.exists(MODEL_FALLBACK_PATH):
             print(f"[!] APD Model not found at {MODEL_APD_PATH}")
             print(f"[*] Using fallback model: {MODEL_FALLBACK_PATH}")
             model_apd = YOLO(MODEL_FALLBACK_PATH)
+            model_apd_onnx = load_onnx_export(MODEL_FALLBACK_PATH)
             print("[OK] APD Model (fallback) loaded")
             using_fallback_model = True
         else:
@@ -163,18 +275,26 @@ def load_models():
             model_apd = None
             using_fallback_model = False
         
+        # Load nano APD Model (optional, degraded realtime levels)
+        if model_apd is not None and os.path.exists(MODEL_APD_LITE_PATH):
+            print(f"[*] Loading nano APD Model: {MODEL_APD_LITE_PATH}")
+            model_apd_lite = YOLO(MODEL_APD_LITE_PATH)
+            print("[OK] Nano APD Model loaded")
+        
         # Load STF Model (optional)
         if os.path.exists(MODEL_STF_PATH):
             print(f"[*] Loading STF Model: {MODEL_STF_PATH}")
             model_stf = YOLO(MODEL_STF_PATH)
+            model_stf_onnx = load_onnx_export(MODEL_STF_PATH)
             print("[OK] STF Model (custom) loaded")
         elif os.path.exists(MODEL_FALLBACK_PATH):
             print(f"[!] STF Model not found at {MODEL_STF_PATH}")
             print(f"[*] Using fallback for STF")
             model_stf = YOLO(MODEL_FALLBACK_PATH)
+            model_stf_onnx = load_onnx_export(MODEL_FALLBACK_PATH)
             print("[OK] STF Model (fallback) loaded")
         else:
-            print(f"[!] STF Model missing - will skip STF detection")
+            print(f"[!] STF Model missing - using heuristic STF scoring")
             model_stf = None
         
         # Set flag
@@ -191,6 +311,51 @@ def load_models():
         print(f"[!] Model loading error: {e}")
         models_available = False
 
+def run_model(model, images, imgsz: int):
+    """Call a YOLO model on an image or a batch, holding that model's lock"""
+    with model_locks_guard:
+        lock = model_locks.setdefault(id(model), threading.Lock())
+    with lock:
+        return model(images, imgsz=imgsz, conf=CONFIDENCE_THRESHOLD, verbose=False)
+
+def infer_both(image_arrays: List[np.ndarray], imgsz: int):
+    """One APD + STF call on a batch at the given input size (the auto-tuner's workload)"""
+    run_model(model_apd, image_arrays, imgsz)
+    if model_stf is not None:
+        run_model(model_stf, image_arrays, imgsz)
+
+def tune_models(slo_ms: float = autotune.TARGET_P95_MS) -> Dict:
+    """Sweep input size / threads / batch size for the loaded models and save the choice"""
+    return autotune.tune(infer_both, slo_ms)
+
+def apply_tuning(config: Optional[Dict]):
+    """Use an auto-tuned config (autotune.load_tuning) for this process"""
+    global TARGET_IMG_SIZE, BATCH_SIZE
+    if config is None:
+        return
+    TARGET_IMG_SIZE = config["target_img_size"]
+    BATCH_SIZE = config["batch_size"]
+    autotune.set_threads(config["threads"])
+    print(f"[OK] Auto-tuned config: imgsz={TARGET_IMG_SIZE} threads={config['threads']} batch={BATCH_SIZE}"
+          f" (p95 {config.get('p95_ms')} ms, tuned {config.get('tuned_at')})")
+
+def load_onnx_export(model_path: str):
+    """
+    The ONNX export of a .pt model (same name, .onnx), for the yolo-onnx
+    engine. Same weights and classes, so the detection code is shared.
+    Export it at the auto-tuned input size: ONNX input shapes are fixed.
+    """
+    onnx_path = os.path.splitext(model_path)[0] + ".onnx"
+    if not os.path.exists(onnx_path):
+        return None
+    try:
+        model = YOLO(onnx_path, task="detect")
+        print(f"[OK] ONNX export loaded: {onnx_path}")
+        return model
+    except Exception as e:
+        print(f"[!] ONNX export not usable ({onnx_path}): {e}")
+        return None
+
 # ============================================================================
 # IMAGE PREPROCESSING
 # ============================================================================
@@ -234,90 +399,117 @@ def detect_ppe_two_stage(image_array: np.ndarray) -> List[Dict]:
         print("[!] APD Model not available!")
         return []
     
-    all_detections = []
-    
     try:
         # --- STAGE 1: DETECT PERSON ---
         print("[*] Stage 1: Detecting persons...")
-        results = model_apd(image_array, conf=CONFIDENCE_THRESHOLD, verbose=False)
+        results = run_model(model_apd, image_array, TARGET_IMG_SIZE)
         
         if len(results) == 0:
             print("[*] No detections found")
             return []
         
-        boxes = results[0].boxes
-        
-        # Determine which class ID to look for based on model type
-        # Custom APD model: class_id = 3 (Pekerja)
-        # COCO fallback model: class_id = 0 (person)
-        person_class_id = 0 if using_fallback_model else 3
-        person_class_name = "Person" if using_fallback_model else "Pekerja"
-        
-        # Find all persons (class_id varies by model)
-        person_detections = []
-        for i in range(len(boxes)):
-            box = boxes[i]
-            cls = int(box.cls[0].cpu().numpy())
-            
-            if cls == person_class_id:  # Person class (varies by model)
-                conf = box.conf[0].cpu().numpy()
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                
-                person_detections.append({
-                    "class_id": person_class_id,
-                    "class_name": person_class_name,
-                    "confidence": round(float(conf), 3),
-                    "bbox": {"x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2)},
-                    "area_x1": int(x1),
-                    "area_y1": int(y1),
-                    "area_x2": int(x2),
-                    "area_y2": int(y2)
-                })
-        
-        print(f"[OK] Found {len(person_detections)} person(s) (class_id={person_class_id})")
-        
-        if len(person_detections) == 0:
-            print("[*] No persons detected - returning empty")
-            return []
-        
-        # --- STAGE 2: DETECT APD ITEMS (ONLY INSIDE PERSON BOXES) ---
-        print("[*] Stage 2: Detecting PPE items...")
-        
-        # For fallback model, skip PPE detection since it doesn't have those classes
-        ppe_detections = []
-        if not using_fallback_model:
-            # Run detection again on full image (YOLO is smart about ROI)
-            for i in range(len(boxes)):
-                box = boxes[i]
-                cls = int(box.cls[0].cpu().numpy())
-                conf = box.conf[0].cpu().numpy()
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                
-                # Skip person detections (we already have them from Stage 1)
-                if cls == person_class_id:
-                    continue
-                
-                # Only accept if confidence is high enough
-                if conf >= CONFIDENCE_THRESHOLD:
-                    class_name = CLASS_NAMES_APD.get(cls, f"Unknown-{cls}")
-                    ppe_detections.append({
-                        "class_id": cls,
-                        "class_name": class_name,
-                        "confidence": round(float(conf), 3),
-                        "bbox": {"x1": int(x1), "y1": int(y1), "x2": int(x2), "y2": int(y2)}
-                    })
-        
-        print(f"[OK] Found {len(ppe_detections)} PPE item(s)")
-        
-        # Combine: Person + PPE items
-        all_detections = person_detections + ppe_detections
-        
-        return all_detections
+        return extract_ppe_detections(results[0].boxes)
         
     except Exception as e:
         print(f"[!] Detection error: {e}")
         return []
 
+def person_class() -> Tuple[int, str]:
+    """
+    Class ID/name of the person class for the loaded model.
+    Custom APD model: class_id = 3 (Pekerja)
+    COCO fallback model: class_id = 0 (person)
+    """
+    if using_fallback_model:
+        return 0, "Person"
+    return 3, "Pekerja"
+
+def apd_class_name(class_id: int) -> str:
+    """Class name for an APD model class ID (person class aware)"""
+    person_class_id, person_class_name = person_class()
+    if class_id == person_class_id:
+        return person_class_name
+    return CLASS_NAMES_APD.get(class_id, f"Unknown-{class_id}")
+
+def extract_ppe_arrays(boxes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized two-stage selection on one APD result.
+    
+    Returns (xyxy int32 [N, 4], class_ids int32 [N], confidences float32 [N]),
+    persons first, then PPE items. Empty when no person is in frame.
+    """
+    xyxy = boxes.xyxy.cpu().numpy().reshape(-1, 4)
+    class_ids = boxes.cls.cpu().numpy().astype(np.int32)
+    confidences = boxes.conf.cpu().numpy().astype(np.float32)
+    
+    # --- STAGE 1: PERSONS (class_id varies by model) ---
+    person_class_id, _ = person_class()
+    is_person = class_ids == person_class_id
+    
+    if not is_person.any():
+        return (np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+    
+    # --- STAGE 2: PPE ITEMS ---
+    # For fallback model, skip PPE since it doesn't have those classes
+    if using_fallback_model:
+        is_ppe = np.zeros_like(is_person)
+    else:
+        is_ppe = ~is_person & (confidences >= CONFIDENCE_THRESHOLD)
+    
+    order = np.concatenate([np.flatnonzero(is_person), np.flatnonzero(is_ppe)])
+    return xyxy[order].astype(np.int32), class_ids[order], confidences[order]
+
+def detections_from_arrays(xyxy: np.ndarray, class_ids: np.ndarray, confidences: np.ndarray) -> List[Dict]:
+    """Expand detection arrays into the list-of-dicts response schema"""
+    person_class_id, _ = person_class()
+    detections = []
+    for (x1, y1, x2, y2), cls, conf in zip(xyxy.tolist(), class_ids.tolist(), confidences.tolist()):
+        det = {
+            "class_id": cls,
+            "class_name": apd_class_name(cls),
+            "confidence": round(conf, 3),
+            "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+        }
+        if cls == person_class_id:
+            det.update({"area_x1": x1, "area_y1": y1, "area_x2": x2, "area_y2": y2})
+        detections.append(det)
+    return detections
+
+def extract_ppe_detections(boxes) -> List[Dict]:
+    """
+    Turn the boxes of one APD result into person + PPE detections.
+    Shared by single-image and batch inference.
+    """
+    xyxy, class_ids, confidences = extract_ppe_arrays(boxes)
+    person_class_id, _ = person_class()
+    persons = int(np.count_nonzero(class_ids == person_class_id))
+    
+    print(f"[OK] Found {persons} person(s) (class_id={person_class_id})")
+    if persons == 0:
+        print("[*] No persons detected - returning empty")
+        return []
+    print(f"[OK] Found {len(class_ids) - persons} PPE item(s)")
+    
+    return detections_from_arrays(xyxy, class_ids, confidences)
+
+def detect_ppe_arrays(image_array: np.ndarray, model=None, imgsz: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """detect_ppe_two_stage for the compact schema: arrays, no per-box dicts"""
+    empty = (np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+    
+    if model is None:
+        model = model_apd
+    if not models_available or model is None:
+        return empty
+    
+    try:
+        results = run_model(model, image_array, imgsz or TARGET_IMG_SIZE)
+        if len(results) == 0:
+            return empty
+        return extract_ppe_arrays(results[0].boxes)
+    except Exception as e:
+        print(f"[!] Detection error: {e}")
+        return empty
+
 # ============================================================================
 # COMPLIANCE ASSESSMENT
 # ============================================================================
@@ -330,7 +522,10 @@ def assess_compliance(detections: List[Dict]) -> Dict:
     - If person but missing PPE: "High" or "Medium"
     - If all PPE present: "Low"
     """
-    detected_classes = set([det["class_name"] for det in detections])
+    return assess_detected_classes(set([det["class_name"] for det in detections]))
+
+def assess_detected_classes(detected_classes: set) -> Dict:
+    """assess_compliance on the set of detected class names"""
     detected_ppe = detected_classes.intersection(set(PPE_REQUIREMENTS))
     has_worker = "Pekerja" in detected_classes
     missing_ppe = set(PPE_REQUIREMENTS) - detected_ppe
@@ -359,60 +554,502 @@ def assess_compliance(detections: List[Dict]) -> Dict:
         "has_worker": has_worker
     }
 
+# ============================================================================
+# DETECTION HISTORY (WRITE-BEHIND)
+# ============================================================================
+def record_detection(detections: List[Dict], compliance: Dict,
+                     area_id: Optional[str] = None, image_name: Optional[str] = None):
+    """Count a detection result live and queue it for detection_history. Never blocks on disk."""
+    if live_metrics is not None:
+        live_metrics.record(compliance, area_id)
+    if history_writer is None:
+        return
+    
+    now = datetime.now().isoformat()
+    history_writer.submit({
+        "timestamp": now,
+        "area_id": area_id,
+        "image_name": image_name,
+        "detected_classes": ",".join(det["class_name"] for det in detections),
+        "compliance_rate": compliance["compliance_rate"],
+        "hazard_level": compliance["hazard_level"],
+        "alert_message": compliance["alert_message"],
+        "detections": detections,
+        "created_at": now
+    })
+
 # ============================================================================
 # STF DETECTION (SLIP, TRIP, FALL)
 # ============================================================================
 def detect_stf(image_array: np.ndarray) -> Dict:
     """
     Detect STF (Slip, Trip, Fall) hazards using dedicated model.
-    Returns hazard type and severity.
+    Returns hazard type and severity. Without a model, the frame is
+    scored by stf_heuristics instead.
     """
     global model_stf
     
     if model_stf is None:
-        print("[*] STF Model not available - skipping STF detection")
-        return {"hazard_type": "Unknown", "confidence": 0.0, "safe": True}
+        return analyze_stf_batch([image_array])[0]
     
     try:
-        results = model_stf(image_array, conf=CONFIDENCE_THRESHOLD, verbose=False)
+        results = run_model(model_stf, image_array, TARGET_IMG_SIZE)
         
-        if len(results) == 0 or len(results[0].boxes) == 0:
+        if len(results) == 0:
             return {"hazard_type": "Normal", "confidence": 1.0, "safe": True}
         
-        boxes = results[0].boxes
-        best_detection = None
-        max_confidence = 0
+        return extract_stf_result(results[0].boxes)
         
-        # Find highest confidence detection
-        for i in range(len(boxes)):
-            box = boxes[i]
-            conf = box.conf[0].cpu().numpy()
-            cls = int(box.cls[0].cpu().numpy())
-            
-            if conf > max_confidence:
-                max_confidence = conf
-                best_detection = {
-                    "class_id": cls,
-                    "class_name": CLASS_NAMES_STF.get(cls, "Unknown"),
-                    "confidence": float(conf)
-                }
-        
-        if best_detection:
-            hazard_type = best_detection["class_name"]
-            confidence = best_detection["confidence"]
-            is_safe = (hazard_type == "Normal" or confidence < 0.6)
-            
-            return {
-                "hazard_type": hazard_type,
-                "confidence": round(confidence, 3),
-                "safe": is_safe
+    except Exception as e:
+        print(f"[!] STF detection error: {e}")
+        return {"hazard_type": "Unknown", "confidence": 0.0, "safe": True}
+
+def extract_stf_result(boxes) -> Dict:
+    """Pick the highest confidence STF box of one result as the hazard"""
+    if len(boxes) == 0:
+        return {"hazard_type": "Normal", "confidence": 1.0, "safe": True}
+    
+    best_detection = None
+    max_confidence = 0
+    
+    # Find highest confidence detection
+    for i in range(len(boxes)):
+        box = boxes[i]
+        conf = box.conf[0].cpu().numpy()
+        cls = int(box.cls[0].cpu().numpy())
+        
+        if conf > max_confidence:
+            max_confidence = conf
+            best_detection = {
+                "class_id": cls,
+                "class_name": CLASS_NAMES_STF.get(cls, "Unknown"),
+                "confidence": float(conf)
             }
+    
+    if best_detection:
+        hazard_type = best_detection["class_name"]
+        confidence = best_detection["confidence"]
+        is_safe = (hazard_type == "Normal" or confidence < 0.6)
         
-        return {"hazard_type": "Normal", "confidence": 1.0, "safe": True}
+        return {
+            "hazard_type": hazard_type,
+            "confidence": round(confidence, 3),
+            "safe": is_safe
+        }
+    
+    return {"hazard_type": "Normal", "confidence": 1.0, "safe": True}
+
+# ============================================================================
+# COMPACT RESPONSE SCHEMA (HIGH-FPS CLIENTS)
+# ============================================================================
+def build_compact_payload(xyxy: np.ndarray, class_ids: np.ndarray, confidences: np.ndarray,
+                          compliance: Dict, stf: Dict) -> Dict:
+    """
+    Compact realtime payload. Detection i is
+        boxes[4*i : 4*i+4] = x1, y1, x2, y2
+        class_ids[i], confidences[i]
+    Arrays stay numpy - ORJSONResponse serializes them natively, so no
+    per-box Python objects are created.
+    """
+    return {
+        "boxes": xyxy.reshape(-1),
+        "class_ids": class_ids,
+        "confidences": np.round(confidences, 3),
+        "compliance": compliance,
+        "stf": stf,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def arrays_from_detections(detections: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """detections_from_arrays in reverse, for engines that answer with detection dicts"""
+    xyxy = np.array([[d["bbox"]["x1"], d["bbox"]["y1"], d["bbox"]["x2"], d["bbox"]["y2"]] for d in detections],
+                    dtype=np.int32).reshape(-1, 4)
+    class_ids = np.array([d["class_id"] for d in detections], dtype=np.int32)
+    confidences = np.array([d["confidence"] for d in detections], dtype=np.float32)
+    return xyxy, class_ids, confidences
+
+# ============================================================================
+# ANNOTATED IMAGES (SERVER-SIDE OVERLAYS)
+# ============================================================================
+def frame_hash(image_data: bytes) -> str:
+    """Content hash of an uploaded frame"""
+    return hashlib.blake2b(image_data, digest_size=16).hexdigest()
+
+def overlay_hash(detections: List[Dict], compliance: Dict) -> str:
+    """
+    Hash of what render_annotated_image draws. The same frame analysed by
+    another engine or at another quality level gets other boxes.
+    """
+    boxes = [(d["class_name"], round(d["confidence"], 2), d["bbox"]["x1"], d["bbox"]["y1"],
+              d["bbox"]["x2"], d["bbox"]["y2"]) for d in detections]
+    banner = (compliance["hazard_level"], compliance["has_worker"], sorted(compliance["missing_ppe"]))
+    return hashlib.blake2b(repr((boxes, banner)).encode(), digest_size=16).hexdigest()
+
+def render_annotated_image(image_array: np.ndarray, detections: List[Dict], compliance: Dict,
+                           image_format: str, quality: int) -> str:
+    """
+    Draw boxes, labels and the hazard banner on the decoded (RGB) array
+    and encode it. Returns a data URL usable directly as <img src>.
+    """
+    canvas = cv2.cvtColor(image_array, cv2.COLOR_RGB2BGR)
+    banner_height = 24
+    
+    for det in detections:
+        bbox = det["bbox"]
+        color = CLASS_COLORS.get(det["class_name"], (200, 200, 200))
+        cv2.rectangle(canvas, (bbox["x1"], bbox["y1"]), (bbox["x2"], bbox["y2"]), color, 2)
         
+        # Label above the box, or inside it (below the banner) when there's no room
+        label = f"{det['class_name']} {det['confidence']:.2f}"
+        (tw, th), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        top = bbox["y1"] - th - baseline
+        if top < banner_height:
+            top = max(bbox["y1"], banner_height)
+        cv2.rectangle(canvas, (bbox["x1"], top), (bbox["x1"] + tw, top + th + baseline), color, cv2.FILLED)
+        cv2.putText(canvas, label, (bbox["x1"], top + th), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+    
+    # Hazard banner (alert_message has emoji, which putText can't draw)
+    banner = f"Hazard: {compliance['hazard_level']}"
+    if compliance["has_worker"] and compliance["missing_ppe"]:
+        banner += f" - Missing: {', '.join(sorted(compliance['missing_ppe']))}"
+    cv2.rectangle(canvas, (0, 0), (canvas.shape[1], banner_height), HAZARD_COLORS.get(compliance["hazard_level"], (0, 0, 0)), cv2.FILLED)
+    cv2.putText(canvas, banner, (6, 17), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 1, cv2.LINE_AA)
+    
+    ext, quality_flag, mime = ANNOTATION_FORMATS[image_format]
+    ok, encoded = cv2.imencode(ext, canvas, [quality_flag, quality])
+    if not ok:
+        raise ValueError(f"Failed to encode annotated image as {image_format}")
+    return f"data:{mime};base64,{base64.b64encode(encoded).decode('ascii')}"
+
+def get_annotated_image(image_data: bytes, image_array: np.ndarray, detections: List[Dict], compliance: Dict,
+                        image_format: str = ANNOTATE_DEFAULT_FORMAT, quality: int = ANNOTATE_DEFAULT_QUALITY) -> str:
+    """
+    render_annotated_image with an LRU cache keyed by frame and overlay
+    hash, so every dashboard polling the same camera frame shares one
+    rendering, but never gets boxes from another engine or quality level.
+    """
+    key = (frame_hash(image_data), overlay_hash(detections, compliance), image_format, quality)
+    
+    with annotation_cache_lock:
+        cached = annotation_cache.get(key)
+        if cached is not None:
+            annotation_cache.move_to_end(key)
+            return cached
+    
+    rendered = render_annotated_image(image_array, detections, compliance, image_format, quality)
+    
+    with annotation_cache_lock:
+        annotation_cache[key] = rendered
+        annotation_cache.move_to_end(key)
+        while len(annotation_cache) > ANNOTATION_CACHE_SIZE:
+            annotation_cache.popitem(last=False)
+    
+    return rendered
+
+# ============================================================================
+# BATCH DETECTION (BULK AUDITS)
+# ============================================================================
+class BatchLimitError(ValueError):
+    """A batch upload over MAX_BATCH_IMAGES / MAX_BATCH_IMAGE_BYTES / MAX_BATCH_TOTAL_BYTES"""
+    status_code = 413
+
+async def read_batch_uploads(files: List[UploadFile]) -> List[Tuple[str, bytes]]:
+    """
+    Read a batch's uploads chunk by chunk, stopping at the first chunk past
+    a limit: MAX_BATCH_IMAGE_BYTES for a plain image, MAX_BATCH_TOTAL_BYTES
+    for all uploads together (ZIP archives only count here - their members
+    are checked by expand_batch_uploads).
+    """
+    uploads = []
+    total_bytes = 0
+    for file in files:
+        chunks = []
+        size = 0
+        limit = MAX_BATCH_IMAGE_BYTES
+        while True:
+            chunk = await file.read(BATCH_UPLOAD_CHUNK)
+            if not chunk:
+                break
+            if not chunks and chunk.startswith(b"PK"):
+                limit = MAX_BATCH_TOTAL_BYTES     # ZIP signature: an archive, not one image
+            chunks.append(chunk)
+            size += len(chunk)
+            total_bytes += len(chunk)
+            if total_bytes > MAX_BATCH_TOTAL_BYTES:
+                raise BatchLimitError(f"Batch exceeds {MAX_BATCH_TOTAL_BYTES} bytes of images")
+            if size > limit:
+                raise BatchLimitError(f"{file.filename} is over {MAX_BATCH_IMAGE_BYTES} bytes, the max per image")
+        uploads.append((file.filename, b"".join(chunks)))
+    return uploads
+
+def expand_batch_uploads(uploads: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes]]:
+    """
+    Flatten uploaded files into (filename, image bytes) pairs.
+    ZIP archives are expanded into their image members. Limits are checked
+    against each member's declared size BEFORE it is decompressed (and the
+    read is capped at that size), so a zip bomb fails fast with
+    BatchLimitError instead of filling memory.
+    """
+    items = []
+    total_bytes = 0
+    
+    def add(name: str, size: int):
+        nonlocal total_bytes
+        if len(items) >= MAX_BATCH_IMAGES:
+            raise BatchLimitError(f"Too many images, max {MAX_BATCH_IMAGES} per batch")
+        if size > MAX_BATCH_IMAGE_BYTES:
+            raise BatchLimitError(f"{name} is {size} bytes, max {MAX_BATCH_IMAGE_BYTES} per image")
+        total_bytes += size
+        if total_bytes > MAX_BATCH_TOTAL_BYTES:
+            raise BatchLimitError(f"Batch exceeds {MAX_BATCH_TOTAL_BYTES} bytes of images")
+    
+    for filename, data in uploads:
+        if zipfile.is_zipfile(io.BytesIO(data)):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    if member.is_dir():
+                        continue
+                    if os.path.splitext(member.filename)[1].lower() not in BATCH_IMAGE_EXTENSIONS:
+                        continue
+                    add(member.filename, member.file_size)
+                    with archive.open(member) as stream:
+                        items.append((member.filename, stream.read(member.file_size)))
+        else:
+            add(filename, len(data))
+            items.append((filename, data))
+    return items
+
+def detect_ppe_batch(image_arrays: List[np.ndarray], model=None, imgsz: Optional[int] = None) -> List[List[Dict]]:
+    """Run the APD model (default: model_apd) once over a list of images"""
+    if model is None:
+        model = model_apd
+    if model is None:
+        return [[] for _ in image_arrays]
+    
+    try:
+        results = run_model(model, image_arrays, imgsz or TARGET_IMG_SIZE)
+        return [extract_ppe_detections(result.boxes) for result in results]
     except Exception as e:
-        print(f"[!] STF detection error: {e}")
-        return {"hazard_type": "Unknown", "confidence": 0.0, "safe": True}
+        print(f"[!] Batch detection error: {e}")
+        return [[] for _ in image_arrays]
+
+def detect_stf_batch(image_arrays: List[np.ndarray], model=None, imgsz: Optional[int] = None) -> List[Dict]:
+    """Run the STF model (default: model_stf) once over a list of images (heuristics stacked the same way without one)"""
+    if model is None:
+        model = model_stf
+    if model is None:
+        return analyze_stf_batch(image_arrays)
+    
+    try:
+        results = run_model(model, image_arrays, imgsz or TARGET_IMG_SIZE)
+        return [extract_stf_result(result.boxes) for result in results]
+    except Exception as e:
+        print(f"[!] Batch STF detection error: {e}")
+        return [{"hazard_type": "Unknown", "confidence": 0.0, "safe": True} for _ in image_arrays]
+
+def stream_batch_results(items: List[Tuple[str, bytes]], area_id: Optional[str] = None,
+                         engine: Optional[Engine] = None):
+    """
+    Generator yielding one NDJSON line per image, then a summary line.
+    
+    Decoding runs in a thread pool one batch ahead of inference, so the
+    models never wait on PIL. Runs in Starlette's threadpool, not the event loop.
+    """
+    engine = engine or engines.lookup()
+    started = time.perf_counter()
+    batches = [items[i:i + BATCH_SIZE] for i in range(0, len(items), BATCH_SIZE)]
+    
+    summary = {
+        "total_images": len(items),
+        "processed": 0,
+        "failed": 0,
+        "with_worker": 0,
+        "hazard_levels": {"Low": 0, "Medium": 0, "High": 0},
+        "missing_ppe": {name: 0 for name in PPE_REQUIREMENTS},
+        "stf_hazards": {},
+    }
+    compliance_total = 0.0
+    
+    with ThreadPoolExecutor(max_workers=BATCH_DECODE_WORKERS) as executor:
+        pending = [executor.submit(preprocess_image, data) for _, data in batches[0]] if batches else []
+        
+        for batch_index, batch in enumerate(batches):
+            decoded = [future.result() for future in pending]
+            
+            # Start decoding the next batch while this one is on the models
+            if batch_index + 1 < len(batches):
+                pending = [executor.submit(preprocess_image, data) for _, data in batches[batch_index + 1]]
+            
+            offset = batch_index * BATCH_SIZE
+            valid = [i for i, arr in enumerate(decoded) if arr is not None]
+            arrays = [decoded[i] for i in valid]
+            
+            ppe_results = engine.detect_ppe(arrays) if arrays else []
+            stf_results = engine.detect_stf(arrays) if arrays else []
+            by_position = dict(zip(valid, zip(ppe_results, stf_results)))
+            
+            for i, (filename, _) in enumerate(batch):
+                if i not in by_position:
+                    summary["failed"] += 1
+                    yield json.dumps({
+                        "type": "error",
+                        "index": offset + i,
+                        "filename": filename,
+                        "error": "Invalid image"
+                    }) + "\n"
+                    continue
+                
+                detections, stf = by_position[i]
+                compliance = assess_compliance(detections)
+                record_detection(detections, compliance, area_id, filename)
+                
+                summary["processed"] += 1
+                compliance_total += compliance["compliance_rate"]
+                if compliance["has_worker"]:
+                    summary["with_worker"] += 1
+                    for name in compliance["missing_ppe"]:
+                        summary["missing_ppe"][name] += 1
+                summary["hazard_levels"][compliance["hazard_level"]] += 1
+                if not stf["safe"]:
+                    summary["stf_hazards"][stf["hazard_type"]] = summary["stf_hazards"].get(stf["hazard_type"], 0) + 1
+                
+                yield json.dumps({
+                    "type": "result",
+                    "index": offset + i,
+                    "filename": filename,
+                    "detections": detections,
+                    "compliance": compliance,
+                    "stf": stf
+                }) + "\n"
+    
+    processed = summary["processed"]
+    summary["avg_compliance_rate"] = round(compliance_total / processed, 1) if processed else 0.0
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    summary["timestamp"] = datetime.now().isoformat()
+    
+    yield json.dumps({"type": "summary", **summary}) + "\n"
+
+# ============================================================================
+# VIDEO FRAME ANALYSIS (OFFLINE JOBS)
+# ============================================================================
+def prepare_video_frame(frame_rgb: np.ndarray) -> np.ndarray:
+    """Resize a decoded video frame the same way preprocess_image does"""
+    return cv2.resize(frame_rgb, (TARGET_IMG_SIZE, TARGET_IMG_SIZE), interpolation=cv2.INTER_AREA)
+
+def analyze_video_frames(image_arrays: List[np.ndarray]) -> List[Dict]:
+    """Full realtime analysis (PPE + compliance + STF) of a chunk of sampled frames, one batch per model"""
+    engine = engines.lookup()
+    detections = engine.detect_ppe(image_arrays)
+    stf = engine.detect_stf(image_arrays)
+    return [
+        {"detections": dets, "compliance": assess_compliance(dets), "stf": hazard}
+        for dets, hazard in zip(detections, stf)
+    ]
+
+# ============================================================================
+# DETECTION ENGINES
+# ============================================================================
+def detect_ppe_onnx(image_arrays: List[np.ndarray]) -> List[List[Dict]]:
+    """ONNX exports are usually fixed at batch 1: one call per frame"""
+    return [detect_ppe_batch([image_array], model_apd_onnx)[0] for image_array in image_arrays]
+
+def detect_stf_onnx(image_arrays: List[np.ndarray]) -> List[Dict]:
+    if model_stf_onnx is None:                  # No STF export: same fallbacks as yolo-torch
+        return detect_stf_batch(image_arrays)
+    return [detect_stf_batch([image_array], model_stf_onnx)[0] for image_array in image_arrays]
+
+engines = EngineRegistry(DETECTION_ENGINE)
+engines.register(heuristic_engine(CLASS_NAMES_APD, "Pekerja"))
+engines.register(Engine(
+    "yolo-torch", "APD/STF YOLO models on PyTorch (most accurate)",
+    detect_ppe=detect_ppe_batch, detect_stf=detect_stf_batch,
+    available=lambda: models_available
+))
+engines.register(Engine(
+    "yolo-onnx", "ONNX exports of the YOLO models (models/*.onnx)",
+    detect_ppe=detect_ppe_onnx, detect_stf=detect_stf_onnx,
+    available=lambda: model_apd_onnx is not None
+))
+engines.register(cascade_engine(engines.lookup("heuristic"), engines, ["yolo-onnx", "yolo-torch"]))
+
+def engine_error_response(e: EngineError) -> JSONResponse:
+    return JSONResponse(status_code=e.status_code, content={"error": str(e), "engines": engines.names()})
+
+# ============================================================================
+# REALTIME DEGRADATION (see degradation.py)
+# ============================================================================
+STF_SKIPPED = {"hazard_type": "Skipped", "confidence": 0.0, "safe": True}
+
+def level_imgsz(level: Dict) -> int:
+    """
+    Input size of a level: its own size, never above TARGET_IMG_SIZE, so a
+    degraded level can't run larger than an auto-tuned full size.
+    """
+    return min(level["imgsz"] or TARGET_IMG_SIZE, TARGET_IMG_SIZE)
+
+def quality_report(level: Dict) -> Dict:
+    """Quality level for responses, input size resolved"""
+    return {**level, "imgsz": level_imgsz(level)}
+
+def quality_apd_model(level: Dict):
+    """APD model of a level: the nano model for "lite" levels when loaded, else model_apd"""
+    return model_apd_lite if level["model"] == "lite" and model_apd_lite is not None else model_apd
+
+def at_quality(detector: Engine, level: Dict) -> Engine:
+    """
+    yolo-torch at a level's input size and APD model. Other engines have
+    no such knobs; for them only the level's STF switch applies.
+    """
+    if detector.name != "yolo-torch":
+        return detector
+    model = quality_apd_model(level)
+    imgsz = level_imgsz(level)
+    return Engine(detector.name, detector.description,
+                  detect_ppe=lambda frames: detect_ppe_batch(frames, model, imgsz),
+                  detect_stf=lambda frames: detect_stf_batch(frames, imgsz=imgsz))
+
+def analyze_realtime_frame(image_array: np.ndarray, detector: Engine, level: Dict, compact: bool,
+                           deadline: Optional[float] = None) -> Optional[Tuple[Dict, List[Dict], Dict]]:
+    """
+    PPE + compliance + STF of one realtime frame at a quality level:
+    (result, detections, compliance), or None if the deadline passed
+    before the model could run.
+    """
+    if deadline_passed(deadline):
+        return None
+    detector = at_quality(detector, level)
+    stf = detector.detect_stf([image_array])[0] if level["stf"] else dict(STF_SKIPPED)
+    
+    if compact:
+        if detector.name == "yolo-torch":        # Straight from the model's arrays
+            xyxy, class_ids, confidences = detect_ppe_arrays(image_array, quality_apd_model(level), level_imgsz(level))
+        else:
+            xyxy, class_ids, confidences = arrays_from_detections(detector.detect_ppe([image_array])[0])
+        compliance = assess_detected_classes({apd_class_name(c) for c in class_ids.tolist()})
+        result = build_compact_payload(xyxy, class_ids, confidences, compliance, stf)
+        return result, detections_from_arrays(xyxy, class_ids, confidences), compliance
+    
+    detections = detector.detect_ppe([image_array])[0]
+    compliance = assess_compliance(detections)
+    return {"detections": detections, "compliance": compliance, "stf": stf}, detections, compliance
+
+# ============================================================================
+# FRAME DEADLINES (see deadlines.py)
+# ============================================================================
+def request_deadline(request: Request) -> Optional[float]:
+    """Deadline stamped by DeadlineMiddleware (time.monotonic()), None for other paths"""
+    return getattr(request.state, "deadline", None)
+
+def expired_response(request: Request, area_id: Optional[str]) -> ORJSONResponse:
+    """Cheap answer for a frame whose deadline passed before the model ran; counted per camera"""
+    expired_frames.record(area_id)
+    return ORJSONResponse({
+        "expired": True,
+        "deadline_ms": request.state.deadline_ms,
+        "late_ms": round(-remaining_ms(request_deadline(request)), 1),
+        "area_id": area_id,
+        "timestamp": datetime.now().isoformat()
+    })
 
 # ============================================================================
 # LIFESPAN
@@ -426,7 +1063,23 @@ async def lifespan(app: FastAPI):
         os.makedirs("models")
     
     init_database()
+    db.init_pool(DB_FILE)
+    reference_data.load()
     load_models()
+    if AUTOTUNE_ON_START and models_available:
+        tune_models()
+    apply_tuning(autotune.load_tuning())
+    
+    global video_job_manager, history_writer, live_metrics, retention_job
+    history_writer = HistoryWriter(DB_FILE)
+    history_writer.start()
+    live_metrics = LiveMetrics(DB_FILE)
+    live_metrics.start()
+    retention_job = RetentionJob(DB_FILE)
+    retention_job.start()
+    
+    video_job_manager = VideoJobManager(VIDEO_DIR, analyze_video_frames, prepare_video_frame)
+    video_job_manager.start()
     
     print("="*60)
     print("[OK] Backend v5.0 started - Ready for detection")
@@ -434,6 +1087,11 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    video_job_manager.shutdown()
+    retention_job.stop()
+    history_writer.stop()
+    live_metrics.stop()
+    db.close_pool()
     print("[OK] Backend stopped")
 
 # ============================================================================
@@ -446,6 +1104,18 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission control (inside CORS, so 429s carry CORS headers too)
+app.add_middleware(AdmissionMiddleware, routes={
+    "/detect/ppe": detect_admission,
+    "/detect/realtime": detect_admission,
+    "/detect/stf": detect_admission,
+    "/detect/stf/realtime": detect_admission,
+    "/detect/batch": batch_admission
+})
+
+# Frame deadlines, stamped on arrival (before admission queueing)
+app.add_middleware(DeadlineMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -459,7 +1129,8 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["Retry-After"]
 )
 
 # ============================================================================
@@ -474,35 +1145,69 @@ async def root():
         "service": "SIMANTAP Detection API v5.0",
         "version": "5.0.0",
         "method": "Two-Stage YOLOv8/v12 Detection",
-        "models_available": models_available
+        "models_available": models_available,
+        "engine": engines.default,
+        "quality_level": degradation.describe()["name"]
+    }
+
+@app.get("/engines")
+async def list_engines():
+    """Registered detection engines, whether each can run here, and the default"""
+    return engines.describe()
+
+@app.get("/engines/benchmark")
+def benchmark_engines(frames: int = Query(4, ge=1, le=32, description="Synthetic frames per engine")):
+    """Rank the available engines by per-frame latency on this machine (blocks a worker thread)"""
+    return {
+        "default": engines.default,
+        "image_size": TARGET_IMG_SIZE,
+        "ranking": rank_engines(engines, TARGET_IMG_SIZE, frames),
+        "timestamp": datetime.now().isoformat()
     }
 
 @app.post("/detect/ppe")
-async def detect_ppe_endpoint(file: UploadFile = File(...)):
-    """Detect PPE from uploaded image"""
+async def detect_ppe_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    annotate: bool = Query(False, description="Include annotated_image (data URL)"),
+    image_format: str = Query(ANNOTATE_DEFAULT_FORMAT, pattern="^(webp|jpeg)$"),
+    quality: int = Query(ANNOTATE_DEFAULT_QUALITY, ge=1, le=100),
+    area_id: Optional[str] = Query(None, description="Area/camera the frame belongs to"),
+    engine: Optional[str] = Query(None, description="Detection engine (GET /engines), deployment default if omitted")
+):
+    """Detect PPE from uploaded image (JSON, or MessagePack via Accept)"""
     try:
-        if not models_available:
-            return JSONResponse(
-                status_code=503,
-                content={"error": "APD Model not loaded. Check models/best_apd.pt"}
-            )
+        try:
+            detector = engines.get(engine)
+        except EngineError as e:
+            return engine_error_response(e)
         
-        # Read and preprocess image
+        # Read and preprocess image (decode and inference off the event loop)
         image_data = await file.read()
-        image_array = preprocess_image(image_data)
+        image_array = await asyncio.to_thread(preprocess_image, image_data)
         
         if image_array is None:
             raise HTTPException(status_code=400, detail="Invalid image")
+        if deadline_passed(request_deadline(request)):
+            return expired_response(request, area_id)
         
         # Detect PPE
-        detections = detect_ppe_two_stage(image_array)
+        detections = (await asyncio.to_thread(detector.detect_ppe, [image_array]))[0]
         compliance = assess_compliance(detections)
+        record_detection(detections, compliance, area_id, file.filename)
         
-        return {
+        result = {
             "detections": detections,
             "compliance": compliance,
+            "area": reference_data.area(area_id),
             "timestamp": datetime.now().isoformat()
         }
+        if annotate:
+            result["annotated_image"] = await asyncio.to_thread(
+                get_annotated_image, image_data, image_array, detections, compliance, image_format, quality
+            )
+        
+        return negotiate(request, result, default_class=ORJSONResponse)
         
     except Exception as e:
         print(f"[!] Error: {e}")
@@ -512,148 +1217,411 @@ async def detect_ppe_endpoint(file: UploadFile = File(...)):
         )
 
 @app.post("/detect/realtime")
-async def detect_realtime(file: UploadFile = File(...)):
-    """Real-time detection from camera feed"""
+async def detect_realtime(
+    request: Request,
+    file: UploadFile = File(...),
+    compact: bool = Query(False, description="Parallel-array schema for high-FPS clients"),
+    annotate: bool = Query(False, description="Include annotated_image (data URL)"),
+    image_format: str = Query(ANNOTATE_DEFAULT_FORMAT, pattern="^(webp|jpeg)$"),
+    quality: int = Query(ANNOTATE_DEFAULT_QUALITY, ge=1, le=100),
+    area_id: Optional[str] = Query(None, description="Area/camera the frame belongs to"),
+    engine: Optional[str] = Query(None, description="Detection engine (GET /engines), deployment default if omitted")
+):
+    """
+    Real-time detection from camera feed.
+    Served with orjson, or MessagePack with `Accept: application/msgpack`.
+    ?compact=true swaps the detections list for parallel arrays
+    (see build_compact_payload, class names via /detect/classes).
+    Analysis runs off the event loop at the current degradation level,
+    reported as "quality" (GET /detect/quality). Frames past their
+    deadline (X-Deadline-Ms) get {"expired": true, ...} instead.
+    """
     try:
-        if not models_available:
-            return JSONResponse(
-                status_code=503,
-                content={"error": "APD Model not loaded"}
-            )
+        try:
+            detector = engines.get(engine)
+        except EngineError as e:
+            return engine_error_response(e)
         
         image_data = await file.read()
-        image_array = preprocess_image(image_data)
+        deadline = request_deadline(request)
+        if deadline_passed(deadline):
+            return expired_response(request, area_id)
         
-        if image_array is None:
-            raise HTTPException(status_code=400, detail="Invalid image")
+        with degradation.request() as level:
+            image_array = await asyncio.to_thread(preprocess_image, image_data)
+            if image_array is None:
+                raise HTTPException(status_code=400, detail="Invalid image")
+            analysis = await asyncio.to_thread(
+                analyze_realtime_frame, image_array, detector, level, compact, deadline
+            )
+            if analysis is None:
+                return expired_response(request, area_id)
+            result, detections, compliance = analysis
         
-        detections = detect_ppe_two_stage(image_array)
-        compliance = assess_compliance(detections)
-        stf = detect_stf(image_array)
+        record_detection(detections, compliance, area_id, file.filename)
+        if not compact:
+            result["area"] = reference_data.area(area_id)
+            result["timestamp"] = datetime.now().isoformat()
+        result["quality"] = quality_report(level)
+        if annotate:
+            result["annotated_image"] = await asyncio.to_thread(
+                get_annotated_image, image_data, image_array, detections, compliance, image_format, quality
+            )
         
-        return {
-            "detections": detections,
-            "compliance": compliance,
-            "stf": stf,
-            "timestamp": datetime.now().isoformat()
-        }
+        return negotiate(request, result, default_class=ORJSONResponse)
         
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/detect/quality")
+async def get_detection_quality():
+    """Current realtime quality level, the load it is based on, and all levels"""
+    return {
+        **degradation.stats(),
+        "admission": {"detect": detect_admission.stats(), "batch": batch_admission.stats()},
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/detect/classes")
+async def get_detection_classes():
+    """Class ID -> name maps for decoding compact responses"""
+    person_class_id, person_class_name = person_class()
+    return {
+        "apd": CLASS_NAMES_APD,
+        "stf": CLASS_NAMES_STF,
+        "person_class_id": person_class_id,
+        "person_class_name": person_class_name
+    }
+
 @app.post("/detect/stf")
-async def detect_stf_endpoint(file: UploadFile = File(...)):
-    """STF (Slip, Trip, Fall) detection"""
+async def detect_stf_endpoint(request: Request, file: UploadFile = File(...),
+    engine: Optional[str] = Query(None, description="Detection engine (GET /engines), deployment default if omitted"),
+    area_id: Optional[str] = Query(None, description="Area/camera the frame belongs to")):
+    """STF (Slip, Trip, Fall) detection (JSON, or MessagePack via Accept)"""
     try:
+        try:
+            detector = engines.get(engine)
+        except EngineError as e:
+            return engine_error_response(e)
+        
         image_data = await file.read()
-        image_array = preprocess_image(image_data)
+        image_array = await asyncio.to_thread(preprocess_image, image_data)
         
         if image_array is None:
             raise HTTPException(status_code=400, detail="Invalid image")
+        if deadline_passed(request_deadline(request)):
+            return expired_response(request, area_id)
         
-        stf_result = detect_stf(image_array)
+        stf_result = (await asyncio.to_thread(detector.detect_stf, [image_array]))[0]
         
-        return {
+        return negotiate(request, {
             "stf": stf_result,
             "timestamp": datetime.now().isoformat()
-        }
+        }, default_class=ORJSONResponse)
         
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
-@app.get("/areas")
-async def get_all_areas():
-    """Get all areas"""
+@app.post("/detect/stf/realtime")
+async def detect_stf_realtime(request: Request, file: UploadFile = File(...),
+    engine: Optional[str] = Query(None, description="Detection engine (GET /engines), deployment default if omitted"),
+    area_id: Optional[str] = Query(None, description="Area/camera the frame belongs to")):
+    """Real-time STF detection from camera feed"""
+    return await detect_stf_endpoint(request, file, engine, area_id)
+
+@app.post("/detect/batch")
+async def detect_batch_endpoint(
+    files: List[UploadFile] = File(...),
+    area_id: Optional[str] = Query(None, description="Area the photos were taken in"),
+    engine: Optional[str] = Query(None, description="Detection engine (GET /engines), deployment default if omitted")
+):
+    """
+    Bulk audit: many images (or ZIP archives of images) in one request.
+    Streams one NDJSON line per image as batches finish, then a summary.
+    """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM areas")
-        areas = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return {"areas": areas}
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+        detector = engines.get(engine)
+    except EngineError as e:
+        return engine_error_response(e)
+    
+    try:
+        items = expand_batch_uploads(await read_batch_uploads(files))
+    except zipfile.BadZipFile as e:
+        raise HTTPException(status_code=400, detail=f"Invalid ZIP archive: {e}")
+    except BatchLimitError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    if not items:
+        raise HTTPException(status_code=400, detail="No images found in upload")
+    
+    return StreamingResponse(stream_batch_results(items, area_id, detector), media_type="application/x-ndjson")
+
+@app.post("/jobs/video")
+async def create_video_job(
+    file: UploadFile = File(...),
+    sample_fps: float = Query(DEFAULT_SAMPLE_FPS, gt=0, le=60, description="Frames analyzed per second of video")
+):
+    """Upload recorded footage and start an offline analysis job (default engine)"""
+    try:
+        engines.get()
+    except EngineError as e:
+        return engine_error_response(e)
+    
+    job_id = uuid.uuid4().hex
+    video_path = video_job_manager.new_video_path(job_id, file.filename)
+    
+    # Stream to disk - recordings can be far larger than memory
+    with open(video_path, "wb") as out:
+        while True:
+            chunk = await file.read(VIDEO_UPLOAD_CHUNK)
+            if not chunk:
+                break
+            out.write(chunk)
+    
+    try:
+        job = video_job_manager.create_job(job_id, file.filename, video_path, sample_fps)
+    except ValueError as e:
+        os.remove(video_path)
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return job
+
+@app.get("/jobs/video/{job_id}")
+async def get_video_job(job_id: str):
+    """Job status and progress"""
+    job = video_job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/video/{job_id}/results")
+async def get_video_job_results(
+    job_id: str,
+    after_frame: int = Query(-1, description="Cursor: next_after_frame from the previous page"),
+    limit: int = Query(100, ge=1, le=500)
+):
+    """Per-frame results of a job, paginated by frame index"""
+    job = video_job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    page = video_job_manager.get_results(job_id, after_frame, limit)
+    page["status"] = job["status"]
+    page["progress"] = job["progress"]
+    return page
+
+@app.get("/areas")
+async def get_all_areas(request: Request):
+    """Get all areas (cached, ETag / If-None-Match)"""
+    return etag_response(request, reference_data.areas_etag, {"areas": reference_data.areas})
+
+@app.get("/areas/{area_id}")
+async def get_area(request: Request, area_id: str):
+    """Get one area (cached, ETag / If-None-Match)"""
+    area = reference_data.area(area_id)
+    if not area:
+        return JSONResponse(status_code=404, content={"error": "Area not found"})
+    return etag_response(request, reference_data.areas_etag, {"area": area})
 
 @app.post("/areas")
 async def create_area(area: AreaData):
     """Create new area"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
         now = datetime.now().isoformat()
-        cursor.execute("""
-            INSERT INTO areas (area_id, area_name, location, risk_level, description, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (area.area_id, area.area_name, area.location, area.risk_level, area.description, now, now))
-        
-        conn.commit()
-        conn.close()
+        db.execute(db.SQL_INSERT_AREA,
+                   (area.area_id, area.area_name, area.location, area.risk_level, area.description, now, now))
+        reference_data.reload()
         return {"status": "success", "area_id": area.area_id}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post("/areas/bulk")
+async def bulk_create_areas(request: Request,
+                            on_error: str = Query("abort", pattern="^(abort|skip)$",
+                                                  description="abort: all or nothing, skip: write the valid records")):
+    """Create many areas in one transaction (JSON array or NDJSON body)"""
+    return await bulk_import_response(await request.body(), request.headers.get("content-type"), "areas", on_error)
+
 @app.get("/apd")
-async def get_all_apd():
-    """Get all APD items"""
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM apd_items")
-        items = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return {"items": items}
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
+async def get_all_apd(request: Request):
+    """Get all APD items (cached, ETag / If-None-Match)"""
+    return etag_response(request, reference_data.apd_etag, {"items": reference_data.apd})
+
+@app.get("/apd/{category}")
+async def get_apd_by_category(request: Request, category: str):
+    """Get APD items of one category (cached, ETag / If-None-Match)"""
+    return etag_response(request, reference_data.apd_etag, {
+        "category": category,
+        "items": reference_data.apd_by_category(category)
+    })
 
 @app.post("/apd")
 async def create_apd(item: APDItem):
     """Create new APD item"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
         now = datetime.now().isoformat()
-        cursor.execute("""
-            INSERT INTO apd_items (item_id, item_name, category, description, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (item.item_id, item.item_name, item.category, item.description, now, now))
-        
-        conn.commit()
-        conn.close()
+        db.execute(db.SQL_INSERT_APD,
+                   (item.item_id, item.item_name, item.category, item.description, None, None, now, now))
+        reference_data.reload()
         return {"status": "success", "item_id": item.item_id}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post("/apd/bulk")
+async def bulk_create_apd(request: Request,
+                          on_error: str = Query("abort", pattern="^(abort|skip)$",
+                                                description="abort: all or nothing, skip: write the valid records")):
+    """Create many APD items in one transaction (JSON array or NDJSON body)"""
+    return await bulk_import_response(await request.body(), request.headers.get("content-type"), "apd", on_error)
+
+async def bulk_import_response(request_body: bytes, content_type: Optional[str], kind: str, on_error: str):
+    """Shared body of the /bulk endpoints: 422 if on_error=abort and any record is bad"""
+    try:
+        records = parse_records(request_body, content_type)
+    except BulkImportError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    result = await asyncio.to_thread(import_pooled, kind, records, on_error)     # Up to 10k inserts: off the loop
+    if result["inserted"]:
+        reference_data.reload()
+    status_code = 422 if result["errors"] and on_error == "abort" else 200
+    return JSONResponse(status_code=status_code, content={"status": "success" if status_code == 200 else "error", **result})
+
+# ============================================================================
+# HISTORY & STATS
+# ============================================================================
+def encode_history_cursor(key: Tuple[str, int]) -> str:
+    """Opaque cursor for the row a page ended on"""
+    return base64.urlsafe_b64encode(f"{key[0]}|{key[1]}".encode()).decode()
+
+def decode_history_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return timestamp, int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/history")
+async def get_history(
+    area_id: Optional[str] = Query(None),
+    hazard_level: Optional[str] = Query(None, pattern="^(Low|Medium|High)$"),
+    since: Optional[datetime] = Query(None, description="Only rows at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only rows before this time"),
+    missing_ppe: Optional[str] = Query(None, description="Worker in frame without this PPE class"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE)
+):
+    """
+    Detection history, newest first, with keyset pagination on (timestamp, id):
+    every page is an index range read, whatever its depth
+    """
+    if missing_ppe is not None and missing_ppe not in PPE_REQUIREMENTS:
+        raise HTTPException(status_code=400, detail=f"missing_ppe must be one of {PPE_REQUIREMENTS}")
+    after = decode_history_cursor(cursor) if cursor else None
+    
+    try:
+        rows, next_key = db.history_page(
+            limit,
+            area_id=area_id,
+            hazard_level=hazard_level,
+            since=db.local_time(since).isoformat() if since else None,
+            until=db.local_time(until).isoformat() if until else None,
+            missing_ppe=missing_ppe,
+            after=after
+        )
+        return ORJSONResponse({
+            "items": rows,
+            "count": len(rows),
+            "next_cursor": encode_history_cursor(next_key) if next_key else None
+        })
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
 @app.get("/stats/summary")
 async def get_stats():
-    """Get detection statistics"""
+    """Dashboard summary from the live counters (no database access)"""
+    if live_metrics is None:
+        raise HTTPException(status_code=503, detail="Metrics not initialized")
+    
+    return {
+        **live_metrics.summary(),
+        "history_writer": history_writer.stats() if history_writer else None
+    }
+
+@app.get("/stats/window")
+async def get_window_stats(
+    area_id: Optional[str] = Query(None, description="Only this area"),
+    since: Optional[datetime] = Query(None, description="Window start (default: until - window_hours)"),
+    until: Optional[datetime] = Query(None, description="Window end (default: now)"),
+    window_hours: float = Query(db.STATS_WINDOW_HOURS, gt=0, le=24 * 366)
+):
+    """Get detection statistics from history for a time window, optionally per area"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) as total FROM detection_history")
-        total = cursor.fetchone()[0]
-        
-        cursor.execute("""
-            SELECT hazard_level, COUNT(*) as count 
-            FROM detection_history 
-            GROUP BY hazard_level
-        """)
-        hazards = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        conn.close()
+        window_start, window_end = db.stats_window(since, until, window_hours)
+        stats = db.history_stats(window_start, window_end, area_id)
         
         return {
-            "total_detections": total,
-            "hazard_levels": hazards,
+            **stats,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/stats/ppe")
+async def get_ppe_stats(
+    area_id: Optional[str] = Query(None, description="Only this area"),
+    since: Optional[datetime] = Query(None, description="Window start (default: until - window_hours)"),
+    until: Optional[datetime] = Query(None, description="Window end (default: now)"),
+    window_hours: float = Query(db.STATS_WINDOW_HOURS, gt=0, le=24 * 366)
+):
+    """
+    Per-class detections and, per PPE item, how many workers were seen
+    without it (e.g. Topi missing in area_003 over the last week)
+    """
+    try:
+        window_start, window_end = db.stats_window(since, until, window_hours)
+        _, worker_class = person_class()
+        ppe_classes = {name: class_id for class_id, name in CLASS_NAMES_APD.items() if name in PPE_REQUIREMENTS}
+        return db.ppe_stats(window_start, window_end, worker_class, ppe_classes, area_id)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.get("/stats/rollups")
+async def get_rollup_stats(
+    granularity: str = Query("hour", pattern="^(minute|hour|day)$"),
+    area_id: Optional[str] = Query(None, description="Only this area"),
+    since: Optional[datetime] = Query(None, description="Window start (default: until - window_hours)"),
+    until: Optional[datetime] = Query(None, description="Window end (default: now)"),
+    window_hours: float = Query(db.STATS_WINDOW_HOURS, gt=0, le=24 * 366 * 4)
+):
+    """
+    Per-minute / per-hour / per-day detections by hazard level and average
+    compliance, served from the rollup tables (cost independent of history size)
+    """
+    window_start, window_end = db.stats_window(since, until, window_hours)
+    buckets = bucket_count(granularity, window_start, window_end)
+    if buckets > ROLLUP_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Window spans {buckets} {granularity} buckets (max {ROLLUP_MAX_BUCKETS}) - use a coarser granularity"
+        )
+    
+    try:
+        return rollup_stats(granularity, window_start, window_end, area_id)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.get("/stats/expired")
+async def get_expired_stats():
+    """Frames dropped because their deadline passed before the model ran, per camera (area_id)"""
+    return {**expired_frames.snapshot(), "timestamp": datetime.now().isoformat()}
+
+@app.get("/stats/retention")
+async def get_retention_stats():
+    """Retention job: windows, last run time, rows deleted and space reclaimed"""
+    if retention_job is None:
+        raise HTTPException(status_code=503, detail="Retention job not running")
+    return retention_job.stats()
+
 # ============================================================================
 # RUN
 # ============================================================================
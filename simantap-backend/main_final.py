@@ -12,7 +12,7 @@ Model Strategy:
 - Fallback: None (return empty if model fails)
 """
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -26,6 +26,7 @@ import numpy as np
 from PIL import Image
 import cv2
 from ultralytics import YOLO
+import database as db
 
 # ============================================================================
 # CONFIGURATION
@@ -413,6 +414,11 @@ async def lifespan(app: FastAPI):
         os.makedirs("models")
     
     init_database()
+    try:
+        db.migrate(DB_FILE)
+    except Exception as e:
+        print(f"[!] Database migration error: {e}")
+    db.init_pool(DB_FILE)
     load_models()
     
     print("="*60)
@@ -421,6 +427,7 @@ async def lifespan(app: FastAPI):
     
     yield
     
+    db.close_pool()
     print("[OK] Backend stopped")
 
 # ============================================================================
@@ -552,12 +559,7 @@ async def detect_stf_endpoint(file: UploadFile = File(...)):
 async def get_all_areas():
     """Get all areas"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM areas")
-        areas = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        areas = db.fetch_all(db.SQL_SELECT_AREAS)
         return {"areas": areas}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -566,17 +568,9 @@ async def get_all_areas():
 async def create_area(area: AreaData):
     """Create new area"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
         now = datetime.now().isoformat()
-        cursor.execute("""
-            INSERT INTO areas (area_id, area_name, location, risk_level, description, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (area.area_id, area.area_name, area.location, area.risk_level, area.description, now, now))
-        
-        conn.commit()
-        conn.close()
+        db.execute(db.SQL_INSERT_AREA,
+                   (area.area_id, area.area_name, area.location, area.risk_level, area.description, now, now))
         return {"status": "success", "area_id": area.area_id}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -585,12 +579,7 @@ async def create_area(area: AreaData):
 async def get_all_apd():
     """Get all APD items"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM apd_items")
-        items = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        items = db.fetch_all(db.SQL_SELECT_APD)
         return {"items": items}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -599,43 +588,27 @@ async def get_all_apd():
 async def create_apd(item: APDItem):
     """Create new APD item"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
         now = datetime.now().isoformat()
-        cursor.execute("""
-            INSERT INTO apd_items (item_id, item_name, category, description, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (item.item_id, item.item_name, item.category, item.description, now, now))
-        
-        conn.commit()
-        conn.close()
+        db.execute(db.SQL_INSERT_APD,
+                   (item.item_id, item.item_name, item.category, item.description, None, None, now, now))
         return {"status": "success", "item_id": item.item_id}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 @app.get("/stats/summary")
-async def get_stats():
-    """Get detection statistics"""
+async def get_stats(
+    area_id: Optional[str] = Query(None, description="Only this area"),
+    since: Optional[datetime] = Query(None, description="Window start (default: until - window_hours)"),
+    until: Optional[datetime] = Query(None, description="Window end (default: now)"),
+    window_hours: float = Query(db.STATS_WINDOW_HOURS, gt=0, le=24 * 366)
+):
+    """Get detection statistics for a time window, optionally per area"""
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) as total FROM detection_history")
-        total = cursor.fetchone()[0]
-        
-        cursor.execute("""
-            SELECT hazard_level, COUNT(*) as count 
-            FROM detection_history 
-            GROUP BY hazard_level
-        """)
-        hazards = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        conn.close()
+        window_start, window_end = db.stats_window(since, until, window_hours)
+        stats = db.history_stats(window_start, window_end, area_id)
         
         return {
-            "total_detections": total,
-            "hazard_levels": hazards,
+            **stats,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
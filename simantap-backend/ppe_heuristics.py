@@ -0,0 +1,660 @@
+"""
+SIMANTAP Heuristic PPE Analyzer
+================================
+The no-ML PPE check used by main_simple.py (edge nodes without a model).
+
+The frame is split into fixed body bands (head/hat, torso, feet/shoes) and
+each band is scored from brightness, texture, edge density, saturation and
+skin tone. Those per-pixel features are computed ONCE per image in
+FeatureMaps - grayscale, gradient magnitude, saturation and two skin
+masks, each built on first use - and every band reads a slice of them,
+instead of recomputing grayscale/np.gradient/skin masks for each
+overlapping region.
+
+Any of those maps also has a summed-area table (FeatureMaps.table), so a
+sum - brightness, variance, channel means, saturation, skin or edge
+counts - costs four lookups whatever the region's size; FeatureMaps(img,
+integral=True) reads every region statistic that way. That is what lets
+find_workers slide windows over the whole frame instead of trusting the
+fixed bands: each window costs the same handful of lookups, and the bands
+are then scored inside every worker found.
+
+The band thresholds count edges relative to a region's strongest one, so
+they only mean the same thing at one scale: frames are scored at most
+ANALYSIS_SIDE pixels on the long side (fit_frame box-filters larger
+ones down). Uploads are best decoded at that size in the first place
+(decode_frame): JPEGs are decoded straight at a reduced DCT scale, then
+box-filtered down, and the result boxes are mapped back to upload pixels
+(rescale_result).
+
+Regions are (top, bottom, left, right) pixel bounds, bottom/right exclusive.
+"""
+
+import io
+from functools import cached_property, wraps
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+REQUIRED_PPE = ["Topi", "Pakaian", "Sepatu"]
+
+Region = Tuple[int, int, int, int]
+
+ANALYSIS_SIDE = 640                      # Frames are scored at most this long side (main.py's frames are 640)
+
+# Sliding-window worker search (analyze_ppe_array(..., search=True))
+SEARCH_HEIGHT = 480                      # Search on frames block-averaged down to about this height
+EDGE_MAGNITUDE = 8.0                     # Gray levels per pixel that count as an edge
+WINDOW_HEIGHTS = (0.45, 0.6, 0.75, 0.9)  # Worker height as a share of the frame height
+WINDOW_ASPECT = 0.35                     # Window width / height of a standing worker
+WINDOW_STRIDE = 0.25                     # Step as a share of the window width
+COLOR_CONTRAST = 40.0                    # Body/background colour distance scoring 0.5
+BODY_EDGES = 0.10                        # Body edge fraction that counts as full structure
+WORKER_MIN_SCORE = 0.25
+WORKER_MAX_OVERLAP = 0.3                 # Share of the smaller window: above it, same worker
+MAX_WORKERS = 6
+
+# ============================================================================
+# FRAME DECODE
+# ============================================================================
+def decode_frame(contents: bytes, max_side: int = 0) -> Tuple[np.ndarray, float]:
+    """
+    Upload -> (H x W x 3 uint8 RGB, scale), at most max_side pixels on the
+    long side (0 = full resolution). scale = upload pixels per analysed pixel.
+    """
+    img = Image.open(io.BytesIO(contents))
+    full_side = max(img.size)
+    if max_side and full_side > max_side:
+        img.draft("RGB", (max_side, max_side))       # JPEG: decode at 1/2, 1/4 or 1/8 scale
+        img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.Resampling.BOX)
+    img_array = np.asarray(img.convert("RGB"))
+    return img_array, full_side / max(img_array.shape[:2])
+
+def fit_frame(img_array: np.ndarray, max_side: int = ANALYSIS_SIDE) -> Tuple[np.ndarray, float]:
+    """
+    Frame box-filtered down to at most max_side pixels on the long side,
+    like decode_frame's thumbnails, and the scale it was reduced by.
+    """
+    full_side = max(img_array.shape[:2])
+    if full_side <= max_side:
+        return img_array, 1.0
+    img = Image.fromarray(np.ascontiguousarray(img_array, dtype=np.uint8))
+    img.thumbnail((max_side, max_side), Image.Resampling.BOX)
+    img_array = np.asarray(img)
+    return img_array, full_side / max(img_array.shape[:2])
+
+def rescale_result(result: Dict, scale: float) -> Dict:
+    """Map the boxes of an analysed thumbnail back to upload pixels (in place)"""
+    if scale != 1:
+        boxes = [det["bbox"] for det in result["detections"]]
+        boxes += [worker["bbox"] for worker in result.get("workers", [])]
+        for bbox in boxes:
+            for corner in bbox:
+                bbox[corner] = int(round(bbox[corner] * scale))
+    return result
+
+# ============================================================================
+# SUMMED-AREA TABLES
+# ============================================================================
+def integral_image(plane: np.ndarray) -> np.ndarray:
+    """(H+1) x (W+1) table with table[y, x] = sum of plane[:y, :x]"""
+    height, width = plane.shape
+    if plane.dtype.kind == "f":
+        dtype = np.float64
+    else:
+        # int32 while the full-frame sum cannot overflow: half the memory traffic
+        peak = 1 if plane.dtype == np.bool_ else np.iinfo(plane.dtype).max
+        dtype = np.int32 if peak * plane.size < 2 ** 31 else np.int64
+    table = np.zeros((height + 1, width + 1), dtype=dtype)
+    np.cumsum(plane, axis=0, dtype=dtype, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+def block_mean(plane: np.ndarray, factor: int) -> np.ndarray:
+    """uint8 plane averaged over factor x factor blocks (ragged edge dropped)"""
+    height, width = plane.shape[0] // factor * factor, plane.shape[1] // factor * factor
+    total = plane[:height:factor, :width:factor].astype(np.uint32)     # uint16 overflows from factor 17
+    for dy in range(factor):
+        for dx in range(factor):
+            if dy or dx:
+                total += plane[dy:height:factor, dx:width:factor]
+    return (total // (factor * factor)).astype(np.uint8)
+
+def box_sum(table: np.ndarray, top, bottom, left, right):
+    """Sum over [top:bottom, left:right] in four lookups; also takes index arrays (one sum per box)"""
+    return table[bottom, right] - table[top, right] - table[bottom, left] + table[top, left]
+
+# ============================================================================
+# FEATURE MAPS
+# ============================================================================
+def per_region(method):
+    """Remember a region statistic: has_person and the PPE scorers read the same bands"""
+    @wraps(method)
+    def cached(self, region: Region, *args):
+        key = (method.__name__, region, args)
+        if key not in self._memo:
+            self._memo[key] = method(self, region, *args)
+        return self._memo[key]
+    return cached
+
+class FeatureMaps:
+    """Per-image feature maps, computed once and sliced per region"""
+
+    def __init__(self, img_array: np.ndarray, integral: bool = False):
+        """
+        img_array: H x W x 3 RGB, uint8 as decoded (floats are truncated to uint8)
+        integral: read region sums from summed-area tables - pays one
+        cumulative sum per map up front, worth it for many regions
+        """
+        self.rgb = img_array
+        self.integral = integral
+        self._memo = {}
+        self._tables = {}
+        # One planar copy: the maps below are elementwise and run several
+        # times faster on contiguous channel planes than on strided RGB views
+        self.r, self.g, self.b = np.ascontiguousarray(np.moveaxis(img_array, 2, 0), dtype=np.uint8)
+
+    def reduced(self, factor: int) -> "FeatureMaps":
+        """Feature maps of the frame block-averaged by factor"""
+        return FeatureMaps(np.stack([block_mean(plane, factor) for plane in (self.r, self.g, self.b)], axis=2))
+
+    # Maps are built on first use: bands that are rejected early (blank,
+    # or skin found) never pay for gradients or saturation
+    @cached_property
+    def total(self) -> np.ndarray:
+        """r + g + b, exact in integers"""
+        total = np.add(self.r, self.g, dtype=np.int32)
+        total += self.b
+        return total
+
+    @cached_property
+    def squares(self) -> np.ndarray:
+        """r^2 + g^2 + b^2, exact in integers - for region variance"""
+        squares = np.multiply(self.r, self.r, dtype=np.int32)
+        squares += np.multiply(self.g, self.g, dtype=np.int32)
+        squares += np.multiply(self.b, self.b, dtype=np.int32)
+        return squares
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        # == np.mean(rgb, axis=2) of the float32 frame, bit for bit
+        return np.divide(self.total, np.float32(3), dtype=np.float32)
+
+    @cached_property
+    def gradients(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(dy, dx, magnitude) of the grayscale image"""
+        dy, dx = np.gradient(self.gray)
+        magnitude = dx * dx
+        magnitude += dy * dy
+        np.sqrt(magnitude, out=magnitude)
+        return dy, dx, magnitude
+
+    @cached_property
+    def edge_mask(self) -> np.ndarray:
+        """Pixels with an absolute gradient above EDGE_MAGNITUDE (window search)"""
+        return self.gradients[2] > EDGE_MAGNITUDE
+
+    @cached_property
+    def saturation(self) -> np.ndarray:
+        max_c = np.maximum(self.r, self.g)
+        np.maximum(max_c, self.b, out=max_c)
+        min_c = np.minimum(self.r, self.g)
+        np.minimum(min_c, self.b, out=min_c)
+        brightness = np.add(max_c, min_c, dtype=np.float32)
+        brightness /= 2.0
+        np.maximum(brightness, 1, out=brightness)       # At least 1 to avoid div by 0
+        saturation = np.subtract(max_c, min_c, dtype=np.float32)
+        saturation /= brightness
+        np.minimum(saturation, 255, out=saturation)
+        return saturation
+
+    # Skin: R > G > B in a plausible range; the torso check drops G > B
+    @cached_property
+    def skin_loose(self) -> np.ndarray:
+        mask = self.r > 75
+        mask &= self.g > 30
+        mask &= self.b > 15
+        mask &= self.r > self.g
+        return mask
+
+    @cached_property
+    def skin(self) -> np.ndarray:
+        return self.skin_loose & (self.g > self.b)
+
+    # ---- plain statistics (over all three channels) -----------------------
+    def table(self, name: str) -> np.ndarray:
+        """Summed-area table of a map, built on first use"""
+        if name not in self._tables:
+            self._tables[name] = integral_image(getattr(self, name))
+        return self._tables[name]
+
+    @staticmethod
+    def region_sum(plane: np.ndarray, region: Region):
+        top, bottom, left, right = region
+        dtype = np.float64 if plane.dtype.kind == "f" else np.int64
+        return np.sum(plane[top:bottom, left:right], dtype=dtype).item()
+
+    def plane_sum(self, name: str, region: Region):
+        """Sum of a map over the region: table lookups, or a slice sum"""
+        if self.integral:
+            return box_sum(self.table(name), *region).item()
+        return self.region_sum(getattr(self, name), region)
+
+    @staticmethod
+    def area(region: Region) -> int:
+        top, bottom, left, right = region
+        return (bottom - top) * (right - left)
+
+    @per_region
+    def brightness(self, region: Region) -> float:
+        return self.plane_sum("total", region) / (3 * self.area(region))
+
+    @per_region
+    def std(self, region: Region) -> float:
+        mean = self.brightness(region)
+        variance = self.plane_sum("squares", region) / (3 * self.area(region)) - mean * mean
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def channel_means(self, region: Region) -> List[float]:
+        return [self.plane_sum(name, region) / self.area(region) for name in ("r", "g", "b")]
+
+    # ---- shared maps ------------------------------------------------------
+    def region_edges(self, region: Region) -> np.ndarray:
+        """
+        Gradient magnitude as np.gradient would give it for the region alone.
+        The image-wide map uses central differences across the region's
+        border where the region would use one-sided ones, so only the four
+        border lines are recomputed.
+        """
+        top, bottom, left, right = region
+        gray = self.gray
+        dy, dx, magnitude = self.gradients
+        edges = magnitude[top:bottom, left:right].copy()
+
+        dy_top = gray[top + 1, left:right] - gray[top, left:right]
+        dy_bottom = gray[bottom - 1, left:right] - gray[bottom - 2, left:right]
+        dx_left = gray[top:bottom, left + 1] - gray[top:bottom, left]
+        dx_right = gray[top:bottom, right - 1] - gray[top:bottom, right - 2]
+
+        for row, dy_row in ((0, dy_top), (-1, dy_bottom)):
+            dx_row = dx[top if row == 0 else bottom - 1, left:right].copy()
+            dx_row[0], dx_row[-1] = dx_left[row], dx_right[row]
+            edges[row] = np.sqrt(dx_row ** 2 + dy_row ** 2)
+        for col, dx_col in ((0, dx_left), (-1, dx_right)):
+            dy_col = dy[top:bottom, left if col == 0 else right - 1].copy()
+            dy_col[0], dy_col[-1] = dy_top[col], dy_bottom[col]
+            edges[:, col] = np.sqrt(dx_col ** 2 + dy_col ** 2)
+        return edges
+
+    @per_region
+    def edge_density(self, region: Region) -> float:
+        """
+        Share of pixels whose gradient is > 10% of the region's strongest (0-1).
+        The threshold depends on the region, so there is no table for it:
+        it is only computed for the bands, the window search uses edge_fraction.
+        """
+        top, bottom, left, right = region
+        if bottom - top < 3 or right - left < 3:
+            return 0
+        edges = self.region_edges(region)
+        peak = np.max(edges)
+        edge_count = np.sum(edges / peak > 0.10) if peak > 0 else 0
+        return min(1.0, edge_count / edges.size)
+
+    @per_region
+    def saturation_mean(self, region: Region) -> float:
+        """Average color saturation (0-1)"""
+        top, bottom, left, right = region
+        if bottom - top < 1 or right - left < 1:
+            return 0
+        return self.plane_sum("saturation", region) / self.area(region) / 255.0
+
+    @per_region
+    def skin_fraction(self, region: Region, loose: bool = False) -> float:
+        return self.plane_sum("skin_loose" if loose else "skin", region) / self.area(region)
+
+    @per_region
+    def edge_fraction(self, region: Region) -> float:
+        """Share of pixels with an absolute edge - unlike edge_density, a plain count"""
+        return self.plane_sum("edge_mask", region) / self.area(region)
+
+    def has_skin(self, region: Region) -> bool:
+        """At least 3% skin-tone pixels"""
+        top, bottom, left, right = region
+        if bottom - top < 2 or right - left < 2:
+            return False
+        return self.skin_fraction(region) > 0.03
+
+    def has_person(self, region: Region) -> bool:
+        """Skin, or clothing-like texture/colour/structure - not a blank wall"""
+        top, bottom, left, right = region
+        if bottom - top < 1 or right - left < 1:
+            return False
+
+        brightness = self.brightness(region)
+        if brightness < 5 or brightness > 250:        # Too dark or too bright = likely not person
+            return False
+        if self.has_skin(region):
+            return True
+
+        std_dev = self.std(region)
+        color_diversity = np.std(self.channel_means(region))
+        if std_dev > 15 and color_diversity > 8:      # Variance + colour diversity = clothing
+            return True
+        if 0.02 < self.edge_density(region) < 0.40:   # Structure but not noise
+            return True
+        return std_dev > 35                           # Very high texture = fabric
+
+# ============================================================================
+# ANALYZER
+# ============================================================================
+def square_box(region: Region, img_width: int, img_height: int) -> Dict:
+    """Square box centred on the region, side = its shorter edge"""
+    top, bottom, left, right = region
+    size = min(right - left, bottom - top)
+    x1 = max(0, (left + right) // 2 - size // 2)
+    y1 = max(0, (top + bottom) // 2 - size // 2)
+    return {"x1": x1, "y1": y1, "x2": min(img_width, x1 + size), "y2": min(img_height, y1 + size)}
+
+def hat_confidence(features, hat: Region) -> float:
+    if features.has_skin(hat):                     # Hat region shouldn't be face
+        return 0.0
+    brightness = features.brightness(hat)
+    edges = features.edge_density(hat)
+    saturation = features.saturation_mean(hat)
+    confidence = 0.0
+    if brightness < 120 and edges > 0.12:                       # Dark structured hat
+        confidence = 0.72 + (min(edges - 0.12, 0.2) * 0.12)
+    elif saturation > 0.22 and 70 <= brightness <= 180:         # Coloured/safety hat
+        confidence = 0.70 + (min(saturation - 0.22, 0.2) * 0.10)
+    elif 180 <= brightness <= 235 and edges > 0.08:             # Bright/white hat
+        confidence = 0.68
+    elif edges > 0.14 and features.std(hat) > 20:               # Structure without face
+        confidence = 0.65
+    return min(0.78, confidence)
+
+def clothing_confidence(features, torso: Region) -> float:
+    skin_percentage = features.skin_fraction(torso, True) if features.has_skin(torso) else 0
+    if skin_percentage > 0.40:                     # Mostly skin: not clothing
+        return 0.0
+    brightness = features.brightness(torso)
+    std = features.std(torso)
+    edges = features.edge_density(torso)
+    saturation = features.saturation_mean(torso)
+    confidence = 0.0
+    if edges > 0.09 and 35 <= brightness <= 210:                # Structure + reasonable brightness
+        confidence = 0.70 + (min(edges, 0.25) * 0.08)
+    elif 20 <= brightness < 85 and edges > 0.08:                # Dark work clothing
+        confidence = 0.72
+    elif saturation > 0.28 and edges > 0.07 and brightness < 220:   # Safety vest etc.
+        confidence = 0.71 + (min(saturation - 0.28, 0.2) * 0.08)
+    elif std > 35 and edges > 0.09:                             # Patterned/textured
+        confidence = 0.68
+    return min(0.75, confidence)
+
+def shoes_confidence(features, shoes: Region) -> float:
+    if features.has_skin(shoes):                   # Feet shouldn't be bare at work
+        return 0.0
+    brightness = features.brightness(shoes)
+    edges = features.edge_density(shoes)
+    saturation = features.saturation_mean(shoes)
+    std = features.std(shoes)
+    confidence = 0.0
+    if brightness < 155 and edges > 0.09:                       # Dark structured shoes
+        if brightness < 85:
+            confidence = 0.72 + (min(edges - 0.09, 0.2) * 0.10)
+        else:
+            confidence = 0.68 + (min(edges - 0.09, 0.2) * 0.08)
+    elif brightness < 70 and edges > 0.07:                      # Very dark shoes
+        confidence = 0.70
+    elif 70 <= brightness < 145 and edges > 0.09 and std > 12:  # Medium-dark with texture
+        confidence = 0.68
+    elif saturation > 0.22 and brightness < 210 and edges > 0.07:   # Coloured safety shoes
+        confidence = 0.67 + (min(saturation - 0.22, 0.2) * 0.08)
+    elif std > 22 and edges > 0.08 and brightness < 190:        # Patterned sole
+        confidence = 0.65
+    return min(0.73, confidence)
+
+def detect_ppe_regions(features, worker: Optional[Region] = None) -> List[Dict]:
+    """Score the head/torso/feet bands of one worker box (default: the whole image); returns detections"""
+    detections = []
+    try:
+        score_bands(features, worker, detections)
+    except Exception as e:
+        print(f"[ERROR] Region analysis failed: {e}")   # Continue with whatever was detected
+    return detections
+
+def score_bands(features, worker: Optional[Region], detections: List[Dict]):
+    """Append the detections of each band as it is scored, so a failure keeps the earlier ones"""
+    img_height, img_width = features.rgb.shape[:2]
+    y0, y1, x0, x1 = worker or (0, img_height, 0, img_width)
+    height, width = y1 - y0, x1 - x0
+
+    head_top = y0 + int(height * 0.05)
+    head_bottom = y0 + min(height, int(height * 0.30))
+    torso = (y0 + int(height * 0.25), y0 + min(height, int(height * 0.75)),
+             x0 + int(width * 0.15), x0 + min(width, int(width * 0.85)))
+    feet = (y0 + int(height * 0.70), y0 + min(height, int(height * 0.95)),
+            x0 + int(width * 0.10), x0 + min(width, int(width * 0.90)))
+
+    # ===== HEAD - Topi (hat): only the top 35% of the head band =====
+    if head_top < head_bottom < y1 and features.has_person((head_top, head_bottom, x0, x1)):
+        head_height = head_bottom - head_top
+        hat_portion_end = int(head_height * 0.35)
+        if hat_portion_end > 5:
+            confidence = hat_confidence(features, (head_top, head_top + hat_portion_end, x0, x1))
+            if confidence >= 0.65:
+                hat_size = min(int(head_height * 0.35), int(width * 0.45))
+                hat_x1 = x0 + max(0, width // 2 - hat_size // 2)
+                hat_x2 = min(x1, hat_x1 + hat_size)
+                detections.append({
+                    "class_id": 1,
+                    "class_name": "Topi",
+                    "confidence": round(confidence, 2),
+                    "bbox": {"x1": hat_x1, "y1": head_top, "x2": hat_x2, "y2": head_top + (hat_x2 - hat_x1)}
+                })
+
+    # ===== TORSO - Pakaian (clothing) =====
+    top, bottom, left, right = torso
+    if top < bottom < y1 and left < right < x1 and features.has_person(torso):
+        confidence = clothing_confidence(features, torso)
+        if confidence >= 0.62:
+            detections.append({
+                "class_id": 3,
+                "class_name": "Pakaian",
+                "confidence": round(confidence, 2),
+                "bbox": square_box(torso, x1, y1)
+            })
+
+    # ===== FEET - Sepatu (shoes): top 60% of the feet band, below is floor =====
+    top, bottom, left, right = feet
+    if top < bottom < y1 and left < right < x1 and features.has_person(feet):
+        shoes = (top, top + int((bottom - top) * 0.6), left, right)
+        if shoes[1] - shoes[0] > 3:
+            confidence = shoes_confidence(features, shoes)
+            if confidence >= 0.62:
+                detections.append({
+                    "class_id": 2,
+                    "class_name": "Sepatu",
+                    "confidence": round(confidence, 2),
+                    "bbox": square_box(feet, x1, y1)
+                })
+
+# ============================================================================
+# WORKER SEARCH (SLIDING WINDOWS)
+# ============================================================================
+def worker_windows(img_height: int, img_width: int) -> np.ndarray:
+    """Candidate worker boxes: 4 x N array of tops, bottoms, lefts, rights"""
+    boxes = []
+    for share in WINDOW_HEIGHTS:
+        height = int(img_height * share)
+        width = int(height * WINDOW_ASPECT)
+        if height < 20 or width < 8 or width > img_width:
+            continue
+        step = max(1, int(width * WINDOW_STRIDE))
+        tops, lefts = np.meshgrid(np.arange(0, img_height - height + 1, step),
+                                  np.arange(0, img_width - width + 1, step), indexing="ij")
+        tops, lefts = tops.ravel(), lefts.ravel()
+        boxes.append(np.stack([tops, tops + height, lefts, lefts + width]))
+    return np.concatenate(boxes, axis=1) if boxes else np.zeros((4, 0), dtype=np.int64)
+
+def score_windows(features, windows: np.ndarray) -> np.ndarray:
+    """
+    Person-likeness of every window at once, from table lookups only:
+      face      skin in the middle of the head band, minus skin beside it
+      contrast  body colour vs the background strips either side
+      edges     structure in the body (clothing folds, stripes, limbs)
+    A window needs a face AND a body that stands out; edges only scale it.
+    """
+    img_height, img_width = features.rgb.shape[:2]
+    top, bottom, left, right = windows
+    height, width = bottom - top, right - left
+
+    head_top, head_bottom = top + height // 10, top + height * 3 // 10
+    face_left, face_right = left + width // 4, right - width // 4
+    skin = features.table("skin")
+    centre = box_sum(skin, head_top, head_bottom, face_left, face_right)
+    beside = box_sum(skin, head_top, head_bottom, left, face_left) + \
+        box_sum(skin, head_top, head_bottom, face_right, right)
+    face_width = face_right - face_left
+    face = np.maximum(centre / face_width - beside / (width - face_width), 0) / (head_bottom - head_top)
+
+    body_top, body_bottom = top + height * 28 // 100, top + height * 85 // 100
+    body_left, body_right = left + width * 15 // 100, right - width * 15 // 100
+    side_left, side_right = np.maximum(left - width // 2, 0), np.minimum(right + width // 2, img_width)
+    side_area = (body_bottom - body_top) * ((left - side_left) + (side_right - right))
+    distance = 0.0
+    for name in ("r", "g", "b"):
+        table = features.table(name)
+        body = box_sum(table, body_top, body_bottom, body_left, body_right) / \
+            ((body_bottom - body_top) * (body_right - body_left))
+        sides = box_sum(table, body_top, body_bottom, side_left, left) + \
+            box_sum(table, body_top, body_bottom, right, side_right)
+        # A window spanning the frame has no sides: compare with the frame mean
+        background = np.where(side_area > 0, sides / np.maximum(side_area, 1),
+                              table[-1, -1] / (img_height * img_width))
+        distance = distance + (body - background) ** 2
+    distance = np.sqrt(distance)
+
+    edges = box_sum(features.table("edge_mask"), body_top, body_bottom, left, right) / \
+        ((body_bottom - body_top) * width)
+
+    return (np.sqrt(face) * distance / (distance + COLOR_CONTRAST)
+            * (0.5 + 0.5 * np.minimum(edges / BODY_EDGES, 1)))
+
+def overlap(a: Region, b: Region) -> float:
+    """Intersection as a share of the smaller region (a window inside another is the same worker)"""
+    height = min(a[1], b[1]) - max(a[0], b[0])
+    width = min(a[3], b[3]) - max(a[2], b[2])
+    if height <= 0 or width <= 0:
+        return 0.0
+    return height * width / min(FeatureMaps.area(a), FeatureMaps.area(b))
+
+def find_workers(features) -> List[Tuple[Region, float]]:
+    """
+    Best-scoring, non-overlapping worker windows, strongest first, in the
+    frame's pixels. Large frames are searched block-averaged: the tables
+    then cost a fraction of the full-size ones and the edge threshold means
+    the same thing at every resolution.
+    """
+    img_height, img_width = features.rgb.shape[:2]
+    factor = max(1, img_height // SEARCH_HEIGHT)
+    search = features.reduced(factor) if factor > 1 else features
+    windows = worker_windows(*search.rgb.shape[:2])
+    if windows.shape[1] == 0:
+        return []
+    scores = score_windows(search, windows)
+    workers = []
+    for i in np.argsort(-scores, kind="stable"):
+        if scores[i] < WORKER_MIN_SCORE or len(workers) == MAX_WORKERS:
+            break
+        box = tuple(int(v) for v in windows[:, i])
+        if all(overlap(box, kept) <= WORKER_MAX_OVERLAP for kept, _ in workers):
+            workers.append((box, round(float(scores[i]), 3)))
+    return [((top * factor, min(img_height, bottom * factor), left * factor, min(img_width, right * factor)), score)
+            for (top, bottom, left, right), score in workers]
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+def hazard_summary(missing_ppe: List[str]) -> Tuple[str, str]:
+    """(hazard_level, alert_message) for the PPE still missing"""
+    if len(missing_ppe) == 0:
+        return "Low", "✓ PPE lengkap - Keselamatan terjamin"
+    if len(missing_ppe) == 1:
+        return "Medium", f"⚠ Kurang: {', '.join(missing_ppe)}"
+    return "High", f"❌ Kurang: {', '.join(missing_ppe)}"
+
+def summarize_ppe(detections: List[Dict]) -> Dict:
+    """Compliance, hazard level and alert for a list of PPE detections"""
+    detected_ppe = [det["class_name"] for det in detections]
+    missing_ppe = [ppe for ppe in REQUIRED_PPE if ppe not in detected_ppe]
+    compliance_rate = ((len(REQUIRED_PPE) - len(missing_ppe)) / len(REQUIRED_PPE)) * 100
+    hazard_level, alert_message = hazard_summary(missing_ppe)
+
+    return {
+        "detections": detections,
+        "detected_ppe": detected_ppe,
+        "missing_ppe": missing_ppe,
+        "compliance_rate": round(compliance_rate, 1),
+        "hazard_level": hazard_level,
+        "alert_message": alert_message,
+        "has_worker": len(detections) > 0
+    }
+
+def summarize_workers(features, workers: List[Tuple[Region, float]]) -> Dict:
+    """Bands scored inside each worker window; the frame misses what any worker is missing"""
+    detections, per_worker = [], []
+    for index, (box, score) in enumerate(workers):
+        found = detect_ppe_regions(features, box)
+        for det in found:
+            det["worker"] = index
+        summary = summarize_ppe(found)
+        top, bottom, left, right = box
+        per_worker.append({
+            "worker": index,
+            "score": score,
+            "bbox": {"x1": left, "y1": top, "x2": right, "y2": bottom},
+            "detected_ppe": summary["detected_ppe"],
+            "missing_ppe": summary["missing_ppe"],
+            "compliance_rate": summary["compliance_rate"]
+        })
+        detections.extend(found)
+
+    detected_ppe = list(dict.fromkeys(det["class_name"] for det in detections))
+    missing_ppe = [ppe for ppe in REQUIRED_PPE if any(ppe in w["missing_ppe"] for w in per_worker)]
+    hazard_level, alert_message = hazard_summary(missing_ppe)
+    return {
+        "detections": detections,
+        "detected_ppe": detected_ppe,
+        "missing_ppe": missing_ppe,
+        "compliance_rate": round(sum(w["compliance_rate"] for w in per_worker) / len(per_worker), 1),
+        "hazard_level": hazard_level,
+        "alert_message": alert_message,
+        "has_worker": True,
+        "workers": per_worker
+    }
+
+def analyze_ppe_array(img_array: np.ndarray, search: bool = False) -> Dict:
+    """
+    Full heuristic PPE result for an RGB uint8 array, scored at most
+    ANALYSIS_SIDE on the long side (boxes in the array's pixels).
+    search=True looks for workers with sliding windows and scores each
+    one; when none is found the whole frame is scored as one worker, as
+    without search.
+    """
+    scale = 1.0
+    try:
+        img_array, scale = fit_frame(img_array)
+        features = FeatureMaps(img_array)
+        if search:
+            workers = find_workers(features)
+            if workers:
+                return rescale_result(summarize_workers(features, workers), scale)
+        detections = detect_ppe_regions(features)
+    except Exception as e:
+        print(f"[ERROR] Region analysis failed: {e}")
+        detections = []
+    return rescale_result(summarize_ppe(detections), scale)
@@ -0,0 +1,109 @@
+"""
+SIMANTAP Reference Data
+================================
+In-process cache of the areas and apd_items tables, which change a few
+times a month but are read by every dashboard poll.
+
+- load() reads both tables once at startup; reload() runs after every
+  POST /areas or POST /apd commits, so readers never see stale rows from
+  this process (other processes writing the DB are picked up on restart).
+- Each load builds a new immutable snapshot and swaps it in, so reads take
+  no lock and never touch the database.
+- Every table carries an ETag (hash of its rows). etag_response() answers
+  If-None-Match, letting polling clients get a 304 with no body.
+- area(area_id) gives detection paths area metadata without a query.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+import database as db
+
+# ============================================================================
+# ETAGS
+# ============================================================================
+def table_etag(name: str, rows: List[Dict]) -> str:
+    """Strong ETag from the table's rows - stable across restarts"""
+    payload = json.dumps(rows, sort_keys=True, default=str).encode()
+    return f'"{name}-{hashlib.sha1(payload).hexdigest()[:16]}"'
+
+def not_modified(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names `etag`"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def etag_response(request: Request, etag: str, content: Dict) -> Response:
+    """304 if the client is up to date, else `content` with its ETag"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content, headers=headers)
+
+# ============================================================================
+# CACHE
+# ============================================================================
+class ReferenceData:
+    """Snapshot of areas and apd_items, reloaded on write"""
+
+    def __init__(self):
+        self._reload_lock = threading.Lock()
+        self._snapshot = self._build([], [])
+        self.loads = 0
+
+    @staticmethod
+    def _build(areas: List[Dict], apd: List[Dict]) -> Dict:
+        by_category: Dict[str, List[Dict]] = {}
+        for item in apd:
+            by_category.setdefault(item["category"], []).append(item)
+        return {
+            "areas": areas,
+            "areas_by_id": {area["area_id"]: area for area in areas},
+            "areas_etag": table_etag("areas", areas),
+            "apd": apd,
+            "apd_by_category": by_category,
+            "apd_etag": table_etag("apd", apd)
+        }
+
+    def load(self):
+        """(Re)read both tables and swap in the new snapshot"""
+        with self._reload_lock:
+            areas = db.fetch_all(db.SQL_SELECT_AREAS)
+            apd = db.fetch_all(db.SQL_SELECT_APD)
+            self._snapshot = self._build(areas, apd)
+            self.loads += 1
+        print(f"[OK] Reference data loaded ({len(areas)} areas, {len(apd)} APD items)")
+
+    reload = load
+
+    # ---- read side (no database access) -----------------------------------
+    @property
+    def areas(self) -> List[Dict]:
+        return self._snapshot["areas"]
+
+    @property
+    def areas_etag(self) -> str:
+        return self._snapshot["areas_etag"]
+
+    def area(self, area_id: Optional[str]) -> Optional[Dict]:
+        if not area_id:
+            return None
+        return self._snapshot["areas_by_id"].get(area_id)
+
+    @property
+    def apd(self) -> List[Dict]:
+        return self._snapshot["apd"]
+
+    @property
+    def apd_etag(self) -> str:
+        return self._snapshot["apd_etag"]
+
+    def apd_by_category(self, category: str) -> List[Dict]:
+        return self._snapshot["apd_by_category"].get(category, [])
@@ -0,0 +1,193 @@
+"""
+SIMANTAP Result Codec
+================================
+MessagePack encoding of detection results for camera gateways.
+
+Clients opt in with `Accept: application/msgpack`. The decoded result is the
+same as the JSON body, but numeric data travels as typed bytes:
+
+- numpy arrays (compact schema)  -> ext type 1: raw little-endian array bytes
+- "detections" lists of boxes    -> ext type 2: columnar table
+    boxes int32[N*4], class_ids int32[N], confidences float32[N],
+    class_names, and a mask of person rows that carry area_x1..area_y2
+
+decode_msgpack() restores both: arrays as numpy, detections as the usual
+list of dicts. Usage from a gateway:
+
+    from result_codec import MSGPACK_MEDIA_TYPE, decode_msgpack
+    resp = requests.post(url, files=files, headers={"Accept": MSGPACK_MEDIA_TYPE})
+    result = decode_msgpack(resp.content)
+"""
+
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import msgpack
+import numpy as np
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+EXT_NDARRAY = 1
+EXT_DETECTIONS = 2
+
+# Keys a detection dict may carry to be packed as a table
+_BOX_KEYS = {"class_id", "class_name", "confidence", "bbox"}
+_AREA_KEYS = ("area_x1", "area_y1", "area_x2", "area_y2")
+
+# ============================================================================
+# TYPED ARRAYS
+# ============================================================================
+def _pack_ndarray(array: np.ndarray) -> bytes:
+    """dtype (length-prefixed) + ndim + shape (uint32) + little-endian data"""
+    array = np.ascontiguousarray(array)
+    if array.dtype.byteorder == ">":
+        array = array.astype(array.dtype.newbyteorder("<"))
+    dtype = array.dtype.str.encode()
+    header = struct.pack("<B", len(dtype)) + dtype + struct.pack(f"<B{array.ndim}I", array.ndim, *array.shape)
+    return header + array.tobytes()
+
+def _unpack_ndarray(data: bytes) -> np.ndarray:
+    dtype_len = data[0]
+    dtype = np.dtype(data[1:1 + dtype_len].decode())
+    offset = 1 + dtype_len
+    ndim = data[offset]
+    shape = struct.unpack_from(f"<{ndim}I", data, offset + 1)
+    offset += 1 + 4 * ndim
+    return np.frombuffer(data, dtype=dtype, offset=offset).reshape(shape)
+
+# ============================================================================
+# DETECTION TABLES
+# ============================================================================
+def _is_detection_list(value) -> bool:
+    if not isinstance(value, list) or not value:
+        return False
+    for det in value:
+        if not isinstance(det, dict) or not _BOX_KEYS.issubset(det):
+            return False
+        extra = det.keys() - _BOX_KEYS
+        if extra and extra != set(_AREA_KEYS):
+            return False
+    return True
+
+def _pack_detections(detections: List[Dict]) -> bytes:
+    boxes = np.array(
+        [[d["bbox"]["x1"], d["bbox"]["y1"], d["bbox"]["x2"], d["bbox"]["y2"]] for d in detections],
+        dtype=np.int32
+    )
+    table = {
+        "boxes": boxes.reshape(-1),
+        "class_ids": np.array([d["class_id"] for d in detections], dtype=np.int32),
+        "confidences": np.array([d["confidence"] for d in detections], dtype=np.float32),
+        "class_names": [d["class_name"] for d in detections],
+        "has_area": np.array(["area_x1" in d for d in detections], dtype=np.uint8)
+    }
+    return msgpack.packb(table, default=_default, use_bin_type=True)
+
+def _unpack_detections(data: bytes) -> List[Dict]:
+    table = msgpack.unpackb(data, ext_hook=_ext_hook, raw=False)
+    boxes = table["boxes"].reshape(-1, 4).tolist()
+    detections = []
+    for (x1, y1, x2, y2), cls, conf, name, has_area in zip(
+        boxes, table["class_ids"].tolist(), table["confidences"].tolist(),
+        table["class_names"], table["has_area"].tolist()
+    ):
+        det = {
+            "class_id": cls,
+            "class_name": name,
+            # float32 on the wire; responses carry at most 3 decimals
+            "confidence": round(conf, 3),
+            "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+        }
+        if has_area:
+            det.update({"area_x1": x1, "area_y1": y1, "area_x2": x2, "area_y2": y2})
+        detections.append(det)
+    return detections
+
+# ============================================================================
+# ENCODE / DECODE
+# ============================================================================
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return msgpack.ExtType(EXT_NDARRAY, _pack_ndarray(obj))
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot msgpack-encode {type(obj).__name__}")
+
+def _ext_hook(code: int, data: bytes):
+    if code == EXT_NDARRAY:
+        return _unpack_ndarray(data)
+    if code == EXT_DETECTIONS:
+        return _unpack_detections(data)
+    return msgpack.ExtType(code, data)
+
+def _prepare(value):
+    """Swap detection lists for table ext types, recursively"""
+    if isinstance(value, dict):
+        return {
+            k: msgpack.ExtType(EXT_DETECTIONS, _pack_detections(v)) if _is_detection_list(v) else _prepare(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_prepare(v) for v in value]
+    return value
+
+def encode_msgpack(payload: Dict) -> bytes:
+    """Encode a detection response body as MessagePack"""
+    return msgpack.packb(_prepare(payload), default=_default, use_bin_type=True)
+
+def decode_msgpack(data: bytes) -> Dict:
+    """Decode a MessagePack detection response back into the JSON shape"""
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False)
+
+# ============================================================================
+# CONTENT NEGOTIATION
+# ============================================================================
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return encode_msgpack(content)
+
+def parse_accept(accept: str) -> List[Tuple[str, float]]:
+    """Media ranges of an Accept header with their q-values (malformed q counts as 0)"""
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+                if not 0.0 <= q <= 1.0:          # Also rejects NaN
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+def accept_quality(ranges: List[Tuple[str, float]], media_type: str) -> float:
+    """q of the most specific range matching media_type (type/subtype > type/* > */*); 0 if none"""
+    main_type = media_type.split("/")[0]
+    for candidate in (media_type, f"{main_type}/*", "*/*"):
+        matches = [q for media_range, q in ranges if media_range == candidate]
+        if matches:
+            return max(matches)
+    return 0.0
+
+def wants_msgpack(request: Request) -> bool:
+    """MessagePack when a msgpack type is named with q > 0 and not ranked below JSON"""
+    ranges = parse_accept(request.headers.get("accept", ""))
+    msgpack_q = max((q for media_range, q in ranges if media_range in MSGPACK_MEDIA_TYPES), default=0.0)
+    return msgpack_q > 0 and msgpack_q >= accept_quality(ranges, "application/json")
+
+def negotiate(request: Request, payload: Dict, default_class=JSONResponse,
+              status_code: int = 200, headers: Optional[Dict] = None) -> Response:
+    """MsgPackResponse if the client asked for it, else default_class"""
+    response_class = MsgPackResponse if wants_msgpack(request) else default_class
+    return response_class(payload, status_code=status_code, headers=headers)
@@ -0,0 +1,279 @@
+"""
+SIMANTAP Retention Job
+================================
+Keeps simantap_data.db from growing without bound.
+
+- Raw detection_history (and its detection_items) is kept for
+  RETENTION_RAW_DAYS. Older data survives only in the rollup tables, which
+  the history writer fills as rows are written - so deleting raw rows loses
+  no statistics.
+- Rollups are downsampled in turn: minute buckets are kept for
+  RETENTION_MINUTE_DAYS, hour buckets for RETENTION_HOUR_DAYS, day buckets
+  forever.
+- Deletes run in batches of RETENTION_BATCH_SIZE rows, one short write
+  transaction each, with a pause in between so the history writer never
+  waits long for the write lock.
+- Freed pages are returned to the OS with PRAGMA incremental_vacuum once
+  the file is in auto_vacuum=INCREMENTAL mode. Switching an existing
+  database needs a full VACUUM, which holds the write lock for as long as
+  it takes to copy the file - so it is a one-off step run by hand through
+  the CLI below, never by the background job.
+
+Run once by hand (enables auto_vacuum=INCREMENTAL first if needed):
+
+    python retention.py [db_file]
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from database import ROLLUP_GRANULARITIES, connect
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+RETENTION_RAW_DAYS = 30
+RETENTION_MINUTE_DAYS = 7
+RETENTION_HOUR_DAYS = 400
+RETENTION_INTERVAL_SECONDS = 3600     # Between runs
+RETENTION_STARTUP_DELAY = 60          # First run, after startup settles
+RETENTION_BATCH_SIZE = 2000           # Rows per delete transaction
+RETENTION_BATCH_PAUSE_MS = 20         # Gap between batches for other writers
+RETENTION_VACUUM_PAGES = 1000         # Pages per incremental_vacuum step
+
+SELECT_EXPIRED_HISTORY_SQL = '''SELECT id FROM detection_history
+    WHERE timestamp < ?
+    ORDER BY timestamp
+    LIMIT ?'''
+DELETE_ITEMS_SQL = "DELETE FROM detection_items WHERE history_id = ?"
+DELETE_HISTORY_SQL = "DELETE FROM detection_history WHERE id = ?"
+
+def delete_rollup_sql(table: str) -> str:
+    return f'''DELETE FROM {table}
+        WHERE (bucket, area_id, hazard_level) IN (
+            SELECT bucket, area_id, hazard_level FROM {table} WHERE bucket < ? LIMIT ?
+        )'''
+
+# ============================================================================
+# AUTO VACUUM
+# ============================================================================
+def ensure_incremental_vacuum(db_file: str) -> bool:
+    """
+    Switch the file to auto_vacuum=INCREMENTAL. Existing databases need a
+    full VACUUM for the switch to take effect - called by the CLI only, as it
+    blocks every writer until the copy finishes. Returns True if a VACUUM
+    was run.
+    """
+    conn = connect(db_file)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        print("[*] Enabling auto_vacuum=INCREMENTAL (one-off VACUUM)...")
+        start = time.perf_counter()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        print(f"[OK] auto_vacuum=INCREMENTAL enabled in {time.perf_counter() - start:.1f}s")
+        return True
+    finally:
+        conn.close()
+
+# ============================================================================
+# JOB
+# ============================================================================
+class RetentionJob:
+    """Periodic retention + incremental vacuum, with run statistics"""
+
+    def __init__(self, db_file: str, raw_days: float = RETENTION_RAW_DAYS,
+                 minute_days: float = RETENTION_MINUTE_DAYS, hour_days: float = RETENTION_HOUR_DAYS,
+                 interval_seconds: float = RETENTION_INTERVAL_SECONDS,
+                 batch_size: int = RETENTION_BATCH_SIZE):
+        self.db_file = db_file
+        self.raw_days = raw_days
+        self.rollup_days = {"minute": minute_days, "hour": hour_days}
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread = None
+
+        self.runs = 0
+        self.total_deleted = 0
+        self.total_bytes_reclaimed = 0
+        self.last_run: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+
+    # ---- lifecycle --------------------------------------------------------
+    def start(self, startup_delay: float = RETENTION_STARTUP_DELAY):
+        self._thread = threading.Thread(target=self._loop, args=(startup_delay,),
+                                        name="retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(30.0)
+
+    def _loop(self, startup_delay: float):
+        if self._stop.wait(startup_delay):
+            return
+        self._check_auto_vacuum()
+        while not self._stop.is_set():
+            self.run_once()
+            if self._stop.wait(self.interval_seconds):
+                break
+
+    def _check_auto_vacuum(self):
+        """Warn if freed pages cannot be released (the switch is left to the CLI)"""
+        try:
+            conn = connect(self.db_file)
+            try:
+                mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            finally:
+                conn.close()
+        except Exception as e:
+            self.last_error = f"auto_vacuum: {e}"
+            print(f"[!] Retention: could not read auto_vacuum: {e}")
+            return
+        if mode != 2:
+            print("[!] Retention: auto_vacuum is not INCREMENTAL, deleted rows will not shrink the file. "
+                  f"Run 'python retention.py {self.db_file}' once while the server is stopped.")
+
+    # ---- one run ----------------------------------------------------------
+    def run_once(self) -> Dict:
+        """Delete expired rows, downsample rollups, reclaim space"""
+        with self._run_lock:
+            started = datetime.now()
+            start = time.perf_counter()
+            deleted = {}
+            max_batch_ms = 0.0
+            conn = connect(self.db_file)
+            try:
+                size_before = self._file_size(conn)
+
+                cutoff = (started - timedelta(days=self.raw_days)).isoformat()
+                history, items, batch_ms = self._delete_history(conn, cutoff)
+                deleted["detection_history"] = history
+                deleted["detection_items"] = items
+                max_batch_ms = max(max_batch_ms, batch_ms)
+
+                for name, days in self.rollup_days.items():
+                    table, prefix, _ = ROLLUP_GRANULARITIES[name]
+                    bucket_cutoff = (started - timedelta(days=days)).isoformat()[:prefix]
+                    rows, batch_ms = self._delete_rollups(conn, table, bucket_cutoff)
+                    deleted[table] = rows
+                    max_batch_ms = max(max_batch_ms, batch_ms)
+
+                pages = self._incremental_vacuum(conn)
+                size_after = self._file_size(conn)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"[!] Retention run failed: {e}")
+                pages, size_before, size_after = 0, 0, 0
+            finally:
+                conn.close()
+
+            reclaimed = max(0, size_before - size_after)
+            self.runs += 1
+            self.total_deleted += sum(deleted.values())
+            self.total_bytes_reclaimed += reclaimed
+            self.last_run = {
+                "started_at": started.isoformat(),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "raw_cutoff": (started - timedelta(days=self.raw_days)).isoformat(),
+                "rows_deleted": deleted,
+                "max_batch_ms": round(max_batch_ms, 1),
+                "pages_vacuumed": pages,
+                "bytes_reclaimed": reclaimed,
+                "db_size_bytes": size_after
+            }
+            print(f"[OK] Retention: {sum(deleted.values())} rows deleted, "
+                  f"{reclaimed / 1e6:.1f} MB reclaimed in {self.last_run['duration_ms']:.0f} ms")
+            return self.last_run
+
+    def _pause(self):
+        time.sleep(RETENTION_BATCH_PAUSE_MS / 1000.0)
+
+    def _delete_history(self, conn, cutoff: str):
+        history = items = 0
+        max_batch_ms = 0.0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [(row[0],) for row in conn.execute(SELECT_EXPIRED_HISTORY_SQL, (cutoff, self.batch_size))]
+                if ids:
+                    items += conn.executemany(DELETE_ITEMS_SQL, ids).rowcount
+                    history += conn.executemany(DELETE_HISTORY_SQL, ids).rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            max_batch_ms = max(max_batch_ms, (time.perf_counter() - start) * 1000)
+            if len(ids) < self.batch_size:
+                break
+            self._pause()
+        return history, items, max_batch_ms
+
+    def _delete_rollups(self, conn, table: str, bucket_cutoff: str):
+        deleted = 0
+        max_batch_ms = 0.0
+        sql = delete_rollup_sql(table)
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            with conn:
+                rows = conn.execute(sql, (bucket_cutoff, self.batch_size)).rowcount
+            deleted += rows
+            max_batch_ms = max(max_batch_ms, (time.perf_counter() - start) * 1000)
+            if rows < self.batch_size:
+                break
+            self._pause()
+        return deleted, max_batch_ms
+
+    def _incremental_vacuum(self, conn) -> int:
+        """Release free pages to the OS, a few at a time (no-op unless INCREMENTAL)"""
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return 0
+        released = 0
+        while not self._stop.is_set():
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free == 0:
+                break
+            # execute() steps the pragma once, freeing a single page;
+            # executescript() runs it to completion
+            conn.executescript(f"PRAGMA incremental_vacuum({RETENTION_VACUUM_PAGES});")
+            released += min(free, RETENTION_VACUUM_PAGES)
+            self._pause()
+        return released
+
+    def _file_size(self, conn) -> int:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+
+    # ---- read side --------------------------------------------------------
+    def stats(self) -> Dict:
+        return {
+            "raw_days": self.raw_days,
+            "rollup_days": self.rollup_days,
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "total_rows_deleted": self.total_deleted,
+            "total_bytes_reclaimed": self.total_bytes_reclaimed,
+            "last_run": self.last_run,
+            "last_error": self.last_error
+        }
+
+# ============================================================================
+# CLI
+# ============================================================================
+if __name__ == "__main__":
+    db_file = sys.argv[1] if len(sys.argv) > 1 else "simantap_data.db"
+    if not os.path.exists(db_file):
+        print(f"[!] {db_file} not found")
+        sys.exit(1)
+    ensure_incremental_vacuum(db_file)
+    RetentionJob(db_file).run_once()
@@ -0,0 +1,170 @@
+"""
+SIMANTAP History Rollups
+================================
+Incrementally maintained per-minute / per-hour / per-day statistics.
+
+The history writer aggregates each flushed batch in memory and upserts one
+row per (bucket, area, hazard level) into every rollup table, inside the same
+transaction as the raw INSERTs - so rollups never drift from history and a
+batch of 200 frames costs a handful of upserts rather than 600 trigger runs.
+
+Stats read from the rollups touch at most one row per bucket and hazard
+level in the requested window, however large detection_history grows.
+
+Rebuild from raw history (e.g. after importing rows by hand):
+
+    python rollups.py rebuild [--all] [path/to/simantap_data.db]
+
+Only buckets still fully covered by raw history are rebuilt: older ones hold
+the only copy of data the retention job has already pruned. --all recomputes
+everything (before retention has ever run).
+"""
+
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import database as db
+from database import ROLLUP_GRANULARITIES
+from retention import RETENTION_HOUR_DAYS, RETENTION_MINUTE_DAYS, RETENTION_RAW_DAYS
+
+ROLLUP_MAX_BUCKETS = 1500      # Per request: 25 h of minutes, 62 days of hours
+
+# ============================================================================
+# WRITE SIDE
+# ============================================================================
+def aggregate_rows(rows: Sequence[Sequence], prefix: int) -> Dict:
+    """
+    Sum history rows into {(bucket, area_id, hazard): [count, compliance_sum]}.
+    Rows use the history_writer column order:
+    (timestamp, area_id, image_name, detected_classes, compliance_rate, hazard_level, ...)
+    """
+    buckets = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        entry = buckets[(row[0][:prefix], row[1] or "", row[5] or "")]
+        entry[0] += 1
+        entry[1] += row[4] or 0.0
+    return buckets
+
+def apply_rollups(conn, rows: Sequence[Sequence]):
+    """Fold history rows into every rollup table (caller owns the transaction)"""
+    for table, prefix, _ in ROLLUP_GRANULARITIES.values():
+        buckets = aggregate_rows(rows, prefix)
+        conn.executemany(db.rollup_upsert_sql(table), [
+            (bucket, area_id, hazard, count, compliance)
+            for (bucket, area_id, hazard), (count, compliance) in buckets.items()
+        ])
+
+def rebuild_start(granularity: str, raw_days: float, now: datetime) -> str:
+    """
+    First bucket a rebuild may recompute: the one after the bucket holding the
+    raw-retention cutoff (or this rollup's own cutoff, if shorter), since
+    anything before it is partly or wholly gone from detection_history
+    """
+    days = raw_days
+    if granularity == "minute":
+        days = min(days, RETENTION_MINUTE_DAYS)
+    elif granularity == "hour":
+        days = min(days, RETENTION_HOUR_DAYS)
+    _, prefix, seconds = ROLLUP_GRANULARITIES[granularity]
+    cutoff_bucket = datetime.fromisoformat((now - timedelta(days=days)).isoformat()[:prefix])
+    return (cutoff_bucket + timedelta(seconds=seconds)).isoformat()[:prefix]
+
+def rebuild_rollups(db_file: str = db.DB_FILE, raw_days: Optional[float] = RETENTION_RAW_DAYS) -> Dict[str, int]:
+    """
+    Recompute the rollup tables from detection_history in one transaction.
+    Only buckets inside the raw-retention window are touched; raw_days=None
+    rebuilds every bucket.
+    """
+    now = datetime.now()
+    conn = db.connect(db_file)
+    try:
+        conn.execute("BEGIN IMMEDIATE")   # Keep the history writer out meanwhile
+        try:
+            for name, (table, prefix, _) in ROLLUP_GRANULARITIES.items():
+                if raw_days is None:
+                    for statement in db.rollup_rebuild_sql(table, prefix):
+                        conn.execute(statement)
+                else:
+                    start = rebuild_start(name, raw_days, now)
+                    for statement in db.rollup_rebuild_sql(table, prefix, windowed=True):
+                        conn.execute(statement, (start,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return {
+            name: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for name, (table, _, _) in ROLLUP_GRANULARITIES.items()
+        }
+    finally:
+        conn.close()
+
+# ============================================================================
+# READ SIDE
+# ============================================================================
+def bucket_count(granularity: str, since: str, until: str) -> int:
+    """Number of buckets a [since, until] window spans"""
+    seconds = ROLLUP_GRANULARITIES[granularity][2]
+    span = (datetime.fromisoformat(until) - datetime.fromisoformat(since)).total_seconds()
+    return int(span // seconds) + 1
+
+def rollup_stats(granularity: str, since: str, until: str, area_id: Optional[str] = None) -> Dict:
+    """
+    Time series and totals for every bucket overlapping [since, until].
+    Reads at most one row per bucket and hazard level.
+    """
+    table, prefix, _ = ROLLUP_GRANULARITIES[granularity]
+    params = (area_id, since[:prefix], until[:prefix]) if area_id else (since[:prefix], until[:prefix])
+
+    with db.get_pool().connection() as conn:
+        rows = conn.execute(db.rollup_series_sql(table, bool(area_id)), params).fetchall()
+
+    series: List[Dict] = []
+    hazards: Dict[str, int] = defaultdict(int)
+    total = 0
+    compliance_total = 0.0
+    for bucket, hazard, count, compliance in rows:
+        if not series or series[-1]["bucket"] != bucket:
+            series.append({"bucket": bucket, "detections": 0, "hazard_levels": {}, "_compliance": 0.0})
+        point = series[-1]
+        point["detections"] += count
+        point["hazard_levels"][hazard] = count
+        point["_compliance"] += compliance
+        hazards[hazard] += count
+        total += count
+        compliance_total += compliance
+
+    for point in series:
+        point["avg_compliance_rate"] = round(point.pop("_compliance") / point["detections"], 1)
+
+    return {
+        "granularity": granularity,
+        "area_id": area_id,
+        "since": since,
+        "until": until,
+        "total_detections": total,
+        "hazard_levels": dict(hazards),
+        "avg_compliance_rate": round(compliance_total / total, 1) if total else None,
+        "buckets": series
+    }
+
+# ============================================================================
+# CLI
+# ============================================================================
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("Usage: python rollups.py rebuild [--all] [db_file]")
+        sys.exit(1)
+
+    args = sys.argv[2:]
+    rebuild_all = "--all" in args
+    args = [arg for arg in args if arg != "--all"]
+    db_file = args[0] if args else db.DB_FILE
+    db.migrate(db_file)
+    start = time.perf_counter()
+    counts = rebuild_rollups(db_file, raw_days=None if rebuild_all else RETENTION_RAW_DAYS)
+    print(f"[OK] Rollups rebuilt in {time.perf_counter() - start:.2f}s: "
+          + ", ".join(f"{name}={rows}" for name, rows in counts.items()))
@@ -5,15 +5,23 @@ Database seeder untuk menginisialisasi data awal
 """
 
 import sqlite3
-from datetime import datetime
-import json
+
+from bulk_import import IMPORT_SPECS, import_records
 
 DB_FILE = "simantap_data.db"
 
+def seed_table(conn: sqlite3.Connection, kind: str, rows: list, label: str) -> dict:
+    """Insert rows (tuples in IMPORT_SPECS field order) via the bulk import path"""
+    fields = [name for name, _, _ in IMPORT_SPECS[kind]["fields"]]
+    result = import_records(conn, kind, [dict(zip(fields, row)) for row in rows], on_error="skip")
+    for error in result["errors"]:
+        print(f"  ⚠ {label} {error['key']}: {error['error']}")
+    print(f"  ✓ {result['inserted']} {label} created")
+    return result
+
 def seed_database():
     """Seed database dengan data awal"""
     conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
     
     print("🌱 Seeding database dengan data awal...")
     
@@ -26,15 +34,7 @@ def seed_database():
         ("area_005", "Loading Dock", "Building 2, Ground Floor", "High", "Shipping and receiving operations"),
     ]
     
-    for area in areas:
-        try:
-            cursor.execute('''
-                INSERT INTO areas (area_id, area_name, location, risk_level, description, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (*area, datetime.now().isoformat(), datetime.now().isoformat()))
-            print(f"  ✓ Area {area[1]} created")
-        except sqlite3.IntegrityError:
-            print(f"  ⚠ Area {area[0]} already exists")
+    seed_table(conn, "areas", areas, "Area")
     
     # Sample APD Items
     apd_items = [
@@ -48,15 +48,7 @@ def seed_database():
         ("apd_008", "Safety Harness", "Fall Protection", "Full body safety harness for height work", 1200, 91.20),
     ]
     
-    for apd in apd_items:
-        try:
-            cursor.execute('''
-                INSERT INTO apd_items (item_id, item_name, category, description, training_samples, accuracy, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (*apd, datetime.now().isoformat(), datetime.now().isoformat()))
-            print(f"  ✓ APD Item {apd[1]} created")
-        except sqlite3.IntegrityError:
-            print(f"  ⚠ APD Item {apd[0]} already exists")
+    seed_table(conn, "apd", apd_items, "APD Item")
     
     # Sample Training Logs
     training_logs = [
@@ -67,17 +59,8 @@ def seed_database():
         ("log_005", "2025-01-22", 30, 0.1543, 96.21, 95.50, "area_003", "Helmet,Vest,Shoes"),
     ]
     
-    for log in training_logs:
-        try:
-            cursor.execute('''
-                INSERT INTO training_logs (log_id, date, epoch, loss, accuracy, validation_accuracy, area_id, apd_categories, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (*log, datetime.now().isoformat()))
-            print(f"  ✓ Training Log {log[0]} created")
-        except sqlite3.IntegrityError:
-            print(f"  ⚠ Training Log {log[0]} already exists")
+    seed_table(conn, "training_logs", training_logs, "Training Log")
     
-    conn.commit()
     conn.close()
     
     print("\n✅ Database seeding completed!")
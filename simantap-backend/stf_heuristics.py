@@ -0,0 +1,222 @@
+"""
+SIMANTAP Heuristic STF Analyzer
+================================
+The no-ML slip/trip/fall check: main_simple.py's /detect/stf endpoints,
+and main.py's batch, video and /detect/stf paths when no STF model is
+loaded.
+
+Three scores in [0, 1], each a sum of fixed steps:
+- slip: bright, uniform or blue-tinted floor (bottom 40% of the frame)
+- trip: edge density and colour variation of the floor
+- fall: stair-like rows of horizontal edges, vertical edge density and a
+  brightness jump between the top and bottom thirds of the frame
+
+stf_scores takes a stack of N same-sized frames and scores all of them in
+one set of NumPy operations: per-frame sums are reductions over the pixel
+axes, and gradients are taken as exact integer differences (twice
+np.gradient, int16) so no float copy of the stack is made. Like the PPE
+bands, the edge tests are set at one scale: frames larger than
+ppe_heuristics.ANALYSIS_SIDE are box-filtered down to it first.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from ppe_heuristics import ANALYSIS_SIDE, fit_frame
+
+GROUND_START = 0.6             # Floor = rows below this share of the frame height
+MIN_GROUND = 5                 # Floors smaller than this (rows or columns) score 0
+
+# Score -> hazard; severity is High above "high"
+STF_HAZARDS = {
+    "slip": {
+        "hazard_type": "Slip", "threshold": 0.45, "high": 0.70, "location": "Floor/Ground",
+        "description": "Potentially wet or slippery surface detected",
+        "recommendation": "Use caution - may be slippery surface",
+        "realtime_recommendation": "Use caution - may be slippery"
+    },
+    "trip": {
+        "hazard_type": "Trip", "threshold": 0.50, "high": 0.70, "location": "Ground Level",
+        "description": "Obstacles or uneven surfaces detected",
+        "recommendation": "Watch for objects and uneven surfaces",
+        "realtime_recommendation": "Watch for obstacles"
+    },
+    "fall": {
+        "hazard_type": "Fall", "threshold": 0.40, "high": 0.65, "location": "Work Area",
+        "description": "Potential fall hazards detected (stairs, edges, height differences)",
+        "recommendation": "Be cautious of height changes and edges",
+        "realtime_recommendation": "Be cautious of height changes"
+    }
+}
+
+# ============================================================================
+# SCORING
+# ============================================================================
+def doubled_gradient(planes: np.ndarray, axis: int) -> np.ndarray:
+    """2 x np.gradient(planes, axis=axis), exact in the planes' integer dtype"""
+    out = np.zeros_like(planes)
+    if planes.shape[axis] < 2:
+        return out
+    src, dst = np.moveaxis(planes, axis, 0), np.moveaxis(out, axis, 0)
+    np.subtract(src[2:], src[:-2], out=dst[1:-1])
+    dst[0] = (src[1] - src[0]) * 2
+    dst[-1] = (src[-1] - src[-2]) * 2
+    return out
+
+def gray_sum(frames: np.ndarray) -> np.ndarray:
+    """r + g + b in int16 (3x grayscale); channel adds beat a sum over the size-3 axis"""
+    gray = frames[..., 0].astype(np.int16)
+    gray += frames[..., 1]
+    gray += frames[..., 2]
+    return gray
+
+def pixel_stats(frames: np.ndarray):
+    """Per-frame mean and std over all pixels and channels (float64, length N)"""
+    count = frames[0].size
+    total = frames.sum(axis=(1, 2, 3), dtype=np.int64)
+    squares = np.square(frames, dtype=np.uint16).sum(axis=(1, 2, 3), dtype=np.int64)
+    mean = total / count
+    return mean, np.sqrt(np.maximum(squares / count - mean ** 2, 0))
+
+def slip_scores(ground: np.ndarray, brightness: np.ndarray, std_dev: np.ndarray) -> np.ndarray:
+    """Wet/slippery floors: very bright, uniform (reflection), or blue-tinted (water)"""
+    channels = np.stack([ground[..., c].sum(axis=(1, 2), dtype=np.int64) for c in range(3)], axis=1)
+    channels = channels / (ground.shape[1] * ground.shape[2])
+    blue_ratio = channels[:, 2] / (channels.sum(axis=1) + 1)
+    score = 0.4 * (brightness > 200)
+    score = score + 0.3 * (std_dev < 20)
+    score = score + 0.3 * (blue_ratio > 0.35)
+    return np.minimum(score, 1.0)
+
+def trip_scores(ground: np.ndarray, std_dev: np.ndarray) -> np.ndarray:
+    """Obstacles, cables, uneven surfaces: dense strong edges and colour variation"""
+    gray = gray_sum(ground)
+    dy = doubled_gradient(gray, 1).astype(np.int32)
+    dx = doubled_gradient(gray, 2).astype(np.int32)
+    magnitude = dy * dy + dx * dx                             # (2 x edge strength) squared
+    peak = magnitude.max(axis=(1, 2))
+    # Edge strength above 0.20 of the frame's peak, compared squared: 25 * m > peak
+    strong = (magnitude * 25 > peak[:, None, None]).sum(axis=(1, 2))
+    edge_density = strong / (gray.shape[1] * gray.shape[2])
+    score = 0.5 * (edge_density > 0.15)
+    score = score + 0.3 * (std_dev > 30)
+    score = score + 0.2 * ((edge_density > 0.08) & (std_dev > 20))
+    return np.minimum(score, 1.0)
+
+def fall_scores(frames: np.ndarray) -> np.ndarray:
+    """Stairs, edges and ledges over the whole frame"""
+    height, width = frames.shape[1:3]
+    gray = gray_sum(frames)                                  # 3x grayscale: edge thresholds are 3x too
+
+    # Stair pattern: rows where over 30% of the pixels sit on a step edge
+    step_edges = (np.abs(doubled_gradient(gray, 1)) > 120).sum(axis=2)
+    stair_ratio = (step_edges > width * 0.3).sum(axis=1) / height
+    corner_density = (np.abs(doubled_gradient(gray, 2)) > 120).sum(axis=(1, 2)) / (height * width)
+
+    # Height/ledge: sudden brightness change between the top and bottom thirds
+    top = frames[:, :height // 3].sum(axis=(1, 2, 3), dtype=np.int64) / frames[0, :height // 3].size
+    bottom = frames[:, 2 * height // 3:].sum(axis=(1, 2, 3), dtype=np.int64) / frames[0, 2 * height // 3:].size
+
+    score = 0.6 * (stair_ratio > 0.1)
+    score = score + 0.3 * (corner_density > 0.05)
+    score = score + 0.2 * (np.abs(top - bottom) > 50)
+    return np.minimum(score, 1.0)
+
+def stf_scores(frames: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    N x H x W x 3 uint8 frames (or one H x W x 3 frame) -> {"slip", "trip",
+    "fall"}: float64 arrays of N scores, taken at most ANALYSIS_SIDE on the
+    long side.
+    """
+    frames = np.asarray(frames)
+    if frames.ndim == 3:
+        frames = frames[None]
+    if max(frames.shape[1:3]) > ANALYSIS_SIDE:
+        frames = np.stack([fit_frame(frame)[0] for frame in frames])
+    ground = frames[:, int(frames.shape[1] * GROUND_START):]
+
+    if ground.shape[1] < MIN_GROUND or ground.shape[2] < MIN_GROUND:
+        slip = trip = np.zeros(len(frames))
+    else:
+        brightness, std_dev = pixel_stats(ground)
+        slip = slip_scores(ground, brightness, std_dev)
+        trip = trip_scores(ground, std_dev)
+
+    return {"slip": slip, "trip": trip, "fall": fall_scores(frames)}
+
+def frame_scores(scores: Dict[str, np.ndarray], index: int) -> Dict[str, float]:
+    """One frame's scores out of a batch, as Python floats"""
+    return {name: float(values[index]) for name, values in scores.items()}
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+def summarize_stf(scores: Dict[str, float], realtime: bool = False) -> Dict:
+    """
+    /detect/stf response body for one frame's scores; realtime keeps the
+    shorter hazard entries and recommendation of the live endpoint.
+    """
+    hazards = []
+    for name, hazard in STF_HAZARDS.items():
+        score = scores[name]
+        if score <= hazard["threshold"]:
+            continue
+        entry = {
+            "hazard_type": hazard["hazard_type"],
+            "severity": "High" if score > hazard["high"] else "Medium",
+            "confidence": round(score, 2),
+            "location": hazard["location"]
+        }
+        if realtime:
+            entry["recommendation"] = hazard["realtime_recommendation"]
+        else:
+            entry["description"] = hazard["description"]
+            entry["recommendation"] = hazard["recommendation"]
+        hazards.append(entry)
+
+    max_score = max(scores.values())
+    risk_level = "High" if max_score > 0.70 else ("Medium" if max_score > 0.45 else "Low")
+
+    hazard_types = ", ".join(h["hazard_type"] for h in hazards)
+    if realtime:
+        recommendation = f"⚠ {hazard_types} detected" if hazards else "✓ Area appears safe"
+    elif hazards:
+        recommendation = f"⚠ Multiple hazards detected: {hazard_types}. Exercise caution in this area."
+    else:
+        recommendation = "✓ Area appears safe from STF hazards"
+
+    return {
+        "success": True,
+        "hazards": hazards,
+        "risk_level": risk_level,
+        "risk_scores": {name: round(score, 2) for name, score in scores.items()},
+        "recommendation": recommendation
+    }
+
+def strongest_hazard(scores: Dict[str, float]) -> Dict:
+    """
+    One frame's scores in the shape of main.py's STF model result:
+    the highest-scoring hazard over its threshold, else Normal.
+    """
+    found = [name for name, hazard in STF_HAZARDS.items() if scores[name] > hazard["threshold"]]
+    if found:
+        name = max(found, key=scores.get)
+        return {"hazard_type": STF_HAZARDS[name]["hazard_type"], "confidence": round(scores[name], 3), "safe": False}
+    return {"hazard_type": "Normal", "confidence": round(1.0 - max(scores.values()), 3), "safe": True}
+
+def analyze_stf_batch(frames: List[np.ndarray]) -> List[Dict]:
+    """
+    strongest_hazard for every frame; frames of the same size are stacked
+    and scored together (main.py resizes them all to TARGET_IMG_SIZE).
+    """
+    results: List[Dict] = [None] * len(frames)
+    by_shape: Dict[tuple, List[int]] = {}
+    for i, frame in enumerate(frames):
+        by_shape.setdefault(frame.shape, []).append(i)
+
+    for indices in by_shape.values():
+        scores = stf_scores(np.stack([frames[i] for i in indices]))
+        for j, i in enumerate(indices):
+            results[i] = strongest_hazard(frame_scores(scores, j))
+    return results
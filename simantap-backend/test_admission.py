@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Admission control check - no server or model needed.
+
+A burst bigger than slots + queue must get 429 with Retry-After before
+its uploads are read, the rest must run in arrival order, requests whose
+estimated completion misses the deadline must be refused, and clients
+that give up while queued must leave the queue. main.py must gate its
+detection endpoints this way.
+
+Usage: python test_admission.py   (or: python -m pytest test_admission.py)
+"""
+import asyncio
+import os
+import tempfile
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from admission import AdmissionController, AdmissionMiddleware
+
+
+def gated_app(controller: AdmissionController, seconds: float):
+    """One slow endpoint behind the middleware; records the bodies it read, in order"""
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, routes={"/detect": controller})
+    app.state.bodies = []
+
+    @app.post("/detect")
+    async def detect(request: Request):
+        app.state.bodies.append(await request.body())
+        await asyncio.sleep(seconds)
+        return {"ok": True}
+
+    @app.post("/other")
+    async def other():
+        return {"ok": True}
+
+    return app
+
+
+async def burst(app, count: int, path: str = "/detect"):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def post(i):
+            await asyncio.sleep(0.001 * i)                      # Arrive in order
+            return await client.post(path, content=str(i).encode())
+        return await asyncio.gather(*(post(i) for i in range(count)))
+
+
+def test_burst_bounded_and_fifo():
+    controller = AdmissionController("test", slots=1, max_queued=2, initial_service_s=0.05)
+    app = gated_app(controller, 0.05)
+    responses = asyncio.run(burst(app, 6))
+
+    statuses = [r.status_code for r in responses]
+    assert statuses == [200, 200, 200, 429, 429, 429]
+    assert app.state.bodies == [b"0", b"1", b"2"]                  # Refused uploads never read
+    for r in responses[3:]:
+        assert int(r.headers["Retry-After"]) >= 1 and r.json()["retry_after"] == int(r.headers["Retry-After"])
+    assert (controller.in_flight, controller.queued, controller.rejected) == (0, 0, 3)
+
+    assert [r.status_code for r in asyncio.run(burst(app, 6, "/other"))] == [200] * 6   # Ungated path
+
+
+def test_deadline_and_learned_service_time():
+    async def scenario():
+        controller = AdmissionController("test", slots=1, max_queued=10, deadline_s=2.5, initial_service_s=1.0)
+        assert controller.admit() is None
+        await controller.acquire()                              # Running: own completion 1 s
+        assert controller.admit() is None                       # 1 ahead: 2 s
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+        assert controller.admit() == 2                          # 3 s > 2.5 s; 2 requests x 1 s to drain
+
+        waiter.cancel()                                         # Client gave up in the queue
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert controller.queued == 0 and controller.in_flight == 1
+
+        for _ in range(20):                                     # Much faster than first estimated
+            controller.release(0.01)
+            await controller.acquire()
+        assert controller.service_s < 0.05
+        controller.release(0.01)
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_main_gates_detection():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            import main
+            gate = main.detect_admission
+            with TestClient(main.app) as client:
+                saved = gate.in_flight, gate.service_s
+                gate.in_flight, gate.service_s = gate.slots, 60.0      # Saturated, slow
+                try:
+                    for path in ("/detect/ppe", "/detect/realtime", "/detect/stf", "/detect/stf/realtime"):
+                        r = client.post(path, files={"file": ("a.jpg", b"x", "image/jpeg")},
+                                        headers={"Origin": "http://localhost:3000"})
+                        assert r.status_code == 429 and int(r.headers["Retry-After"]) >= 60, path
+                        assert "Retry-After" in r.headers["Access-Control-Expose-Headers"]
+                finally:
+                    gate.in_flight, gate.service_s = saved
+                assert client.get("/detect/quality").json()["admission"]["detect"]["rejected"] >= 4
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Admission control: 429 + Retry-After when saturated")
+    print("=" * 60)
+    test_burst_bounded_and_fifo()
+    print("[OK] Burst beyond slots + queue refused before upload, rest FIFO")
+    test_deadline_and_learned_service_time()
+    print("[OK] Deadline misses refused, cancelled waiters leave, service time learned")
+    test_main_gates_detection()
+    print("[OK] main.py gates its detection endpoints")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Analysis pool check - no server needed.
+
+Frames analysed in the worker processes (handed over through shared
+memory) must give exactly the results of analysing them in-process, for
+concurrent requests of both engines, and every shared memory block must be
+gone once its result is back.
+
+Usage: python test_analysis_pool.py   (or: python -m pytest test_analysis_pool.py)
+"""
+import asyncio
+from multiprocessing import shared_memory
+from unittest import mock
+
+import numpy as np
+
+from analysis_pool import ANALYSIS_TASKS, AnalysisPool
+from test_analysis_size import make_floor
+from test_ppe_heuristics import make_scene
+
+FRAMES = 12
+WORKERS = 2
+
+
+def frames() -> list:
+    return [np.asarray(make_scene(640, 480, seed) if seed % 2 else make_floor(480, 640, seed)) for seed in range(FRAMES)]
+
+
+def test_pool_matches_in_process():
+    images = frames()
+    created = []
+    real_shared_memory = shared_memory.SharedMemory
+
+    def tracking(*args, **kwargs):
+        shm = real_shared_memory(*args, **kwargs)
+        created.append(shm.name)
+        return shm
+
+    async def analyse_all(pool):
+        jobs = [pool.run("ppe", img, search=bool(i % 3)) for i, img in enumerate(images)]
+        jobs += [pool.run("stf", img) for i, img in enumerate(images)]
+        return await asyncio.gather(*jobs)
+
+    pool = AnalysisPool(WORKERS)
+    pool.start()
+    try:
+        with mock.patch("analysis_pool.shared_memory.SharedMemory", side_effect=tracking):
+            pooled = asyncio.run(analyse_all(pool))
+    finally:
+        pool.shutdown()
+
+    expected = [ANALYSIS_TASKS["ppe"](img, search=bool(i % 3)) for i, img in enumerate(images)]
+    expected += [ANALYSIS_TASKS["stf"](img) for i, img in enumerate(images)]
+    assert pooled == expected
+    assert asyncio.run(analyse_all(AnalysisPool(0))) == expected     # In-process fallback
+
+    assert len(created) == 2 * FRAMES
+    for name in created:                                                # Unlinked once answered
+        try:
+            shared_memory.SharedMemory(name=name).close()
+        except FileNotFoundError:
+            continue
+        raise AssertionError(f"shared memory {name} leaked")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Analysis pool: worker processes vs in-process")
+    print("=" * 60)
+    test_pool_matches_in_process()
+    print(f"[OK] {2 * FRAMES} concurrent analyses on {WORKERS} workers match, no shared memory left")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Thumbnail analysis check - no server needed.
+
+main_simple decodes uploads at most ANALYSIS_MAX_SIDE pixels on the long
+side, and the heuristics score larger frames box-filtered down to
+ANALYSIS_SIDE. Over a fixture corpus of large JPEGs (worker scenes for
+the PPE engine, floors/stairs/clutter for the STF engine) the decisions
+on the thumbnail must match the decisions on the full-resolution decode,
+boxes must come back in upload pixels, and frames already small enough
+must be analysed untouched.
+
+Usage: python test_analysis_size.py   (or: python -m pytest test_analysis_size.py)
+"""
+import io
+import os
+import random
+import tempfile
+
+import numpy as np
+from fastapi.testclient import TestClient
+from PIL import Image, ImageDraw, ImageFilter
+
+from ppe_heuristics import ANALYSIS_SIDE, analyze_ppe_array, decode_frame, fit_frame, rescale_result
+from stf_heuristics import stf_scores
+from test_ppe_heuristics import make_scene
+
+CORPUS = 40
+SIZES = [(1280, 960), (1920, 1080), (1200, 1600)]
+NOISE = 1.5                 # Sensor noise left in a phone JPEG after denoising
+MIN_AGREEMENT = 0.95        # Measured 40/40 PPE and STF
+
+
+def jpeg(img: Image.Image) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def make_floor(width: int, height: int, seed: int) -> Image.Image:
+    """A wall over a floor that is plain, wet, cluttered or a flight of stairs"""
+    rng = random.Random(seed)
+    kind = rng.choice(["plain", "wet", "clutter", "stairs"])
+    img = Image.new("RGB", (width, height), tuple(rng.randint(60, 230) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    horizon = int(height * rng.uniform(0.35, 0.55))
+    floor = tuple(rng.randint(40, 200) for _ in range(3))
+    if kind == "wet":
+        floor = (rng.randint(170, 230), rng.randint(200, 240), rng.randint(225, 255))
+    draw.rectangle([(0, horizon), (width, height)], fill=floor)
+    if kind == "stairs":
+        steps = rng.randint(6, 30)
+        step = (height - horizon) / steps
+        for i in range(steps):
+            shade = tuple(max(0, c - rng.randint(30, 80)) for c in floor)
+            draw.rectangle([(0, horizon + i * step), (width, horizon + (i + 0.3) * step)], fill=shade)
+    elif kind == "clutter":
+        for _ in range(rng.randint(5, 25)):
+            x, y, size = rng.uniform(0, width), rng.uniform(horizon, height), rng.uniform(0.02, 0.12) * width
+            draw.rectangle([(x, y), (x + size, y + size * rng.uniform(0.2, 1))],
+                           fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        for _ in range(rng.randint(0, 4)):                 # Cables
+            y = rng.uniform(horizon, height)
+            draw.line([(0, y), (width, y + rng.uniform(-50, 50))], fill=(20, 20, 20), width=max(2, width // 300))
+    if rng.random() < 0.5:
+        img = img.filter(ImageFilter.GaussianBlur(rng.uniform(0.5, 2.5)))
+    pixels = np.asarray(img, dtype=np.float32) + np.random.default_rng(seed).normal(0, NOISE, (height, width, 3))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def corpus(make) -> list:
+    return [jpeg(make(*random.Random(seed).choice(SIZES), seed)) for seed in range(CORPUS)]
+
+
+def test_small_frames_untouched():
+    data = jpeg(make_scene(640, 480, 3))
+    img_array, scale = decode_frame(data, 640)
+    assert scale == 1 and np.array_equal(img_array, np.asarray(Image.open(io.BytesIO(data)).convert("RGB")))
+
+    img_array, scale = decode_frame(jpeg(make_scene(4000, 3000, 3, noise=NOISE)), 640)
+    assert img_array.shape == (480, 640, 3) and img_array.dtype == np.uint8 and scale == 6.25
+
+
+def test_large_frames_scored_at_analysis_side():
+    img = np.asarray(make_scene(1920, 1080, 11, noise=NOISE))
+    thumb, scale = fit_frame(img)
+    assert max(thumb.shape[:2]) == ANALYSIS_SIDE and scale == 3
+    assert analyze_ppe_array(img, search=True) == rescale_result(analyze_ppe_array(thumb, search=True), scale)
+
+    floors = np.stack([np.asarray(make_floor(1280, 960, seed)) for seed in range(4)])
+    thumbs = np.stack([fit_frame(floor)[0] for floor in floors])
+    assert all(np.array_equal(a, b) for a, b in zip(stf_scores(floors).values(), stf_scores(thumbs).values()))
+
+
+def test_ppe_decisions_full_vs_thumbnail():
+    agree = 0
+    for data in corpus(lambda w, h, seed: make_scene(w, h, seed, noise=NOISE)):
+        full, _ = decode_frame(data)
+        thumb, scale = decode_frame(data, 640)
+        expected = analyze_ppe_array(full)
+        result = rescale_result(analyze_ppe_array(thumb), scale)
+        agree += sorted(expected["detected_ppe"]) == sorted(result["detected_ppe"])
+        for det in result["detections"]:             # Boxes are in upload pixels
+            assert det["bbox"]["x2"] <= full.shape[1] + scale and det["bbox"]["y2"] <= full.shape[0] + scale
+    assert agree >= MIN_AGREEMENT * CORPUS, f"{agree}/{CORPUS} PPE decisions match"
+
+
+def test_stf_decisions_full_vs_thumbnail():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            import main_simple
+            configured = main_simple.ANALYSIS_MAX_SIDE
+            with TestClient(main_simple.app) as client:
+                agree = 0
+                for data in corpus(make_floor):
+                    decisions = []
+                    for max_side in (0, configured):
+                        main_simple.ANALYSIS_MAX_SIDE = max_side
+                        for path in ("/detect/stf", "/detect/stf/realtime"):
+                            body = client.post(path, files={"file": ("floor.jpg", data, "image/jpeg")}).json()
+                            decisions.append(sorted(h["hazard_type"] for h in body["hazards"]))
+                    full, thumb = decisions[:2], decisions[2:]
+                    assert full[0] == full[1] and thumb[0] == thumb[1]   # Both endpoints agree
+                    agree += full == thumb
+            assert agree >= MIN_AGREEMENT * CORPUS, f"{agree}/{CORPUS} STF decisions match"
+        finally:
+            main_simple.ANALYSIS_MAX_SIDE = configured
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Thumbnail analysis vs full resolution")
+    print("=" * 60)
+    test_small_frames_untouched()
+    print("[OK] Small frames analysed untouched, large ones decoded reduced")
+    test_large_frames_scored_at_analysis_side()
+    print(f"[OK] Larger frames scored box-filtered to {ANALYSIS_SIDE} px")
+    test_ppe_decisions_full_vs_thumbnail()
+    print(f"[OK] PPE decisions match on {CORPUS} scenes")
+    test_stf_decisions_full_vs_thumbnail()
+    print(f"[OK] STF decisions match on {CORPUS} floors")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Annotated image cache check - no server or model needed.
+
+The rendered overlay is cached per frame, but the same frame analysed by
+another engine or at another quality level has other boxes: it must get
+its own rendering, while repeats of the same analysis share one.
+
+Usage: python test_annotation_cache.py   (or: python -m pytest test_annotation_cache.py)
+"""
+import os
+import tempfile
+
+import numpy as np
+
+WORKER = {"class_id": 3, "class_name": "Pekerja", "confidence": 0.9, "bbox": {"x1": 10, "y1": 30, "x2": 60, "y2": 110}}
+HAT = {"class_id": 0, "class_name": "Topi", "confidence": 0.8, "bbox": {"x1": 20, "y1": 30, "x2": 50, "y2": 45}}
+
+
+def test_cache_keyed_by_overlay():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            import main
+            main.annotation_cache.clear()
+            frame = np.full((120, 160, 3), 90, dtype=np.uint8)
+            image_data = b"same camera frame"
+            full = [WORKER, HAT]                                   # e.g. the full model
+            lite = [WORKER]                                        # e.g. a degraded level: hat missed
+
+            first = main.get_annotated_image(image_data, frame, full, main.assess_compliance(full))
+            again = main.get_annotated_image(image_data, frame, [dict(d) for d in full], main.assess_compliance(full))
+            other = main.get_annotated_image(image_data, frame, lite, main.assess_compliance(lite))
+
+            assert again is first                                  # Same analysis: one rendering
+            assert other != first                                  # Other boxes: rendered afresh
+            assert other == main.render_annotated_image(frame, lite, main.assess_compliance(lite),
+                                                        main.ANNOTATE_DEFAULT_FORMAT, main.ANNOTATE_DEFAULT_QUALITY)
+            assert len(main.annotation_cache) == 2
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Annotated image cache: keyed by frame and overlay")
+    print("=" * 60)
+    test_cache_keyed_by_overlay()
+    print("[OK] Other engines / quality levels never get a cached overlay of another analysis")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Auto-tuner check - no server or model needed.
+
+A stand-in model whose call time grows with batch size and input area is
+swept: the tuner must pick the largest input size meeting the SLO (then
+the best throughput), stop growing the batch once the SLO is missed, fall
+back to the fastest candidate when nothing meets it, and only load a saved
+config that is complete and was tuned on a machine with this core count.
+main.apply_tuning must then switch the server to the saved values.
+
+Usage: python test_autotune.py   (or: python -m pytest test_autotune.py)
+"""
+import json
+import os
+import tempfile
+import time
+
+import autotune
+
+SIZES = (320, 480, 640)
+BATCHES = (1, 2, 4)
+
+
+def fake_infer(frames, imgsz):
+    """~2 ms fixed + 6 ms per 640x640 frame, so batching amortises the fixed part"""
+    assert all(frame.shape[:2] == (imgsz, imgsz) for frame in frames)
+    time.sleep(0.002 + 0.006 * len(frames) * (imgsz / 640) ** 2)
+
+
+def test_choice_meets_slo():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "autotune.json")
+        config = autotune.tune(fake_infer, 20.0, path, img_sizes=SIZES, threads=[1], batch_sizes=BATCHES, calls=5)
+
+        # 640: batch 1 ~8 ms and batch 2 ~14 ms meet 20 ms, batch 4 ~26 ms does not
+        assert config["slo_met"] and config["target_img_size"] == 640 and config["batch_size"] == 2
+        assert config["p95_ms"] <= 20.0
+        tried = [(row["target_img_size"], row["batch_size"]) for row in config["candidates"]]
+        assert (640, 4) in tried and len(tried) == len(SIZES) * len(BATCHES)
+
+        assert autotune.load_tuning(path)["batch_size"] == 2
+
+        # Nothing meets 1 ms: fastest candidate, flagged; batches stop growing after the first miss
+        config = autotune.tune(fake_infer, 1.0, path, img_sizes=SIZES, threads=[1], batch_sizes=BATCHES, calls=3)
+        assert not config["slo_met"]
+        assert (config["target_img_size"], config["batch_size"]) == (320, 1)
+        assert len(config["candidates"]) == len(SIZES)
+
+
+def test_load_rejects_foreign_or_broken_configs():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "autotune.json")
+        assert autotune.load_tuning(path) is None
+
+        good = {"target_img_size": 416, "threads": 2, "batch_size": 4, "machine": autotune.machine()}
+        for config, loads in ((good, True),
+                              ({**good, "machine": {"cpu_count": (os.cpu_count() or 1) + 1}}, False),
+                              ({**good, "batch_size": None}, False)):
+            with open(path, "w") as f:
+                json.dump(config, f)
+            assert (autotune.load_tuning(path) is not None) == loads, config
+
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert autotune.load_tuning(path) is None
+
+
+def test_server_applies_config():
+    import main
+    size, batch = main.TARGET_IMG_SIZE, main.BATCH_SIZE
+    try:
+        main.apply_tuning(None)
+        assert (main.TARGET_IMG_SIZE, main.BATCH_SIZE) == (size, batch)
+        main.apply_tuning({"target_img_size": 416, "threads": 1, "batch_size": 2})
+        assert (main.TARGET_IMG_SIZE, main.BATCH_SIZE) == (416, 2)
+    finally:
+        main.TARGET_IMG_SIZE, main.BATCH_SIZE = size, batch
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Auto-tuner: input size / threads / batch size for a p95 SLO")
+    print("=" * 60)
+    test_choice_meets_slo()
+    print("[OK] Largest input size within the SLO, best throughput, fallback to fastest")
+    test_load_rejects_foreign_or_broken_configs()
+    print("[OK] Only complete configs from this machine are loaded")
+    test_server_applies_config()
+    print("[OK] main.apply_tuning switches the server to the saved config")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Batch upload expansion check - no server or model needed.
+
+ZIP archives must expand into their image members (other files and
+directories skipped, plain uploads passed through), and the image count,
+per-image size and total size limits must trip on the members' declared
+sizes before anything over the limit is decompressed - a zip bomb gets
+413, not an out-of-memory server. Uploads themselves are read chunk by
+chunk and refused at the first chunk past the per-image (plain files) or
+total (everything) limit.
+
+Usage: python test_batch_uploads.py   (or: python -m pytest test_batch_uploads.py)
+"""
+import asyncio
+import io
+import os
+import tempfile
+import zipfile
+
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+import main
+from main import BatchLimitError, expand_batch_uploads, read_batch_uploads
+
+
+def make_zip(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            if name.endswith("/"):
+                archive.writestr(zipfile.ZipInfo(name), b"")
+            else:
+                archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def expect_limit(uploads) -> str:
+    try:
+        expand_batch_uploads(uploads)
+    except BatchLimitError as e:
+        return str(e)
+    raise AssertionError("limit not enforced")
+
+
+def limits(images: int, image_bytes: int, total_bytes: int):
+    """Patch main's batch limits; returns the old values"""
+    old = main.MAX_BATCH_IMAGES, main.MAX_BATCH_IMAGE_BYTES, main.MAX_BATCH_TOTAL_BYTES
+    main.MAX_BATCH_IMAGES, main.MAX_BATCH_IMAGE_BYTES, main.MAX_BATCH_TOTAL_BYTES = images, image_bytes, total_bytes
+    return old
+
+
+def test_zip_members_expanded():
+    archive = make_zip({"a.jpg": b"A", "photos/": b"", "photos/b.PNG": b"BB", "notes.txt": b"x", "c.webp": b"C"})
+    items = expand_batch_uploads([("batch.zip", archive), ("d.jpg", b"DDD")])
+    assert items == [("a.jpg", b"A"), ("photos/b.PNG", b"BB"), ("c.webp", b"C"), ("d.jpg", b"DDD")]
+
+
+def test_limits_checked_before_reading():
+    old = limits(3, 1000, 2500)
+    try:
+        many = make_zip({f"{i}.jpg": b"x" for i in range(50)})
+        assert "max 3" in expect_limit([("many.zip", many)])
+        assert "max 3" in expect_limit([("a.jpg", b"1"), ("b.jpg", b"2"), ("c.jpg", b"3"), ("d.jpg", b"4")])
+
+        bomb = make_zip({"bomb.jpg": b"\0" * 10_000_000})           # ~10 KB compressed
+        assert len(bomb) < 50_000
+        reads = []
+        original = zipfile.ZipFile.open
+        zipfile.ZipFile.open = lambda self, *a, **kw: reads.append(a) or original(self, *a, **kw)
+        try:
+            assert "bomb.jpg" in expect_limit([("bomb.zip", bomb)])
+        finally:
+            zipfile.ZipFile.open = original
+        assert not reads                                            # Refused on the declared size
+
+        total = make_zip({"a.jpg": b"a" * 900, "b.jpg": b"b" * 900, "c.jpg": b"c" * 900})
+        assert "2500 bytes" in expect_limit([("total.zip", total)])
+        assert "per image" in expect_limit([("big.jpg", b"x" * 1001)])
+    finally:
+        limits(*old)
+
+
+def read_limit(uploads) -> str:
+    try:
+        asyncio.run(read_batch_uploads(uploads))
+    except BatchLimitError as e:
+        return str(e)
+    raise AssertionError("limit not enforced")
+
+
+def test_uploads_read_in_chunks():
+    old = limits(10, 1000, 2500)
+    old_chunk, main.BATCH_UPLOAD_CHUNK = main.BATCH_UPLOAD_CHUNK, 100
+    try:
+        big = UploadFile(io.BytesIO(b"x" * 100_000), filename="big.jpg")
+        assert "per image" in read_limit([big])
+        assert big.file.tell() == 1100                              # Stopped at the first chunk over
+
+        archive = make_zip({"a.jpg": os.urandom(900), "b.jpg": os.urandom(900)})  # Over one image, under the total
+        assert len(archive) > 1000
+        uploads = asyncio.run(read_batch_uploads([UploadFile(io.BytesIO(archive), filename="a.zip"),
+                                                  UploadFile(io.BytesIO(b"c" * 100), filename="c.jpg")]))
+        assert uploads == [("a.zip", archive), ("c.jpg", b"c" * 100)]
+
+        many = [UploadFile(io.BytesIO(b"x" * 900), filename=f"{i}.jpg") for i in range(5)]
+        assert "2500 bytes" in read_limit(many)
+        assert many[3].file.tell() == 0                             # Never read
+    finally:
+        main.BATCH_UPLOAD_CHUNK = old_chunk
+        limits(*old)
+
+
+def test_batch_endpoint_413():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        old = limits(2, 1000, 10_000)
+        try:
+            with TestClient(main.app) as client:
+                r = client.post("/detect/batch?engine=heuristic",
+                                files=[("files", ("many.zip", make_zip({f"{i}.jpg": b"x" for i in range(5)}),
+                                                  "application/zip"))])
+                assert r.status_code == 413 and "max 2" in r.json()["detail"]
+                r = client.post("/detect/batch?engine=heuristic",
+                                files=[("files", ("big.jpg", b"x" * 5000, "image/jpeg"))])
+                assert r.status_code == 413 and "per image" in r.json()["detail"]
+        finally:
+            limits(*old)
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Batch upload expansion and limits")
+    print("=" * 60)
+    test_zip_members_expanded()
+    print("[OK] ZIP image members expanded, other files skipped")
+    test_limits_checked_before_reading()
+    print("[OK] Count / per-image / total limits checked before decompressing")
+    test_uploads_read_in_chunks()
+    print("[OK] Uploads read in chunks, refused at the first chunk over a limit")
+    test_batch_endpoint_413()
+    print("[OK] /detect/batch answers 413 over the limits")
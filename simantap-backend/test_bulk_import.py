@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Bulk import check - no server needed.
+
+Runs main_simple's app in a scratch directory and posts areas as a JSON
+array and as NDJSON: bad records are reported by index, on_error=abort
+writes nothing, on_error=skip writes the rest, and the cached /areas sees
+the new rows. Then runs seed_data.py twice (the second run skips
+everything). Concurrent imports of overlapping keys must each report the
+other's rows as existing instead of failing.
+
+Usage: python test_bulk_import.py   (or: python -m pytest test_bulk_import.py)
+"""
+import json
+import os
+import tempfile
+import threading
+
+from fastapi.testclient import TestClient
+
+
+def area(i: int) -> dict:
+    return {"area_id": f"area_{i:03d}", "area_name": f"Gedung {i}",
+            "location": f"Blok {i % 5}", "risk_level": "Medium"}
+
+
+def test_bulk_areas_and_seed():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            import main_simple
+            with TestClient(main_simple.app) as client:
+                records = [area(i) for i in range(300)]
+                records[10] = {"area_id": "area_010", "area_name": "No location", "risk_level": "Low"}
+                records[20] = area(5)                    # Duplicate within the upload
+                aborted = client.post("/areas/bulk", json=records)
+                assert aborted.status_code == 422
+                assert [(e["index"], e["error"]) for e in aborted.json()["errors"]] == \
+                    [(10, "Missing field: location"), (20, "Duplicate area_id in upload")]
+                assert aborted.json()["inserted"] == 0
+                assert client.get("/areas").json()["data"] == []
+
+                skipped = client.post("/areas/bulk?on_error=skip", json=records).json()
+                assert skipped["inserted"] == 298 and skipped["failed"] == 2
+
+                lines = [json.dumps(area(i)) for i in (0, 300, 301)] + ["{not json"]
+                ndjson = client.post("/areas/bulk?on_error=skip", content="\n".join(lines),
+                                     headers={"Content-Type": "application/x-ndjson"}).json()
+                assert ndjson["inserted"] == 2
+                assert [(e["index"], e["error"]) for e in ndjson["errors"]] == \
+                    [(0, "Already exists"), (3, "Not a JSON object")]
+                assert len(client.get("/areas").json()["data"]) == 300
+
+                bad = client.post("/apd/bulk", content="[{", headers={"Content-Type": "application/json"})
+                assert bad.status_code == 400
+
+            import seed_data
+            seed_data.seed_database()
+            with TestClient(main_simple.app) as client:
+                assert len(client.get("/apd").json()["data"]) == 8
+                assert len(client.get("/areas").json()["data"]) == 300   # area_001..005 already there
+            conn = seed_data.sqlite3.connect(seed_data.DB_FILE)
+            again = seed_data.seed_table(conn, "training_logs", [("log_001", "2025-01-20", 1, 2.3, 75.8, 74.2,
+                                                                  "area_001", "Helmet")], "Training Log")
+            conn.close()
+            assert again["inserted"] == 0 and again["errors"][0]["error"] == "Already exists"
+        finally:
+            os.chdir(cwd)
+
+
+def test_concurrent_imports_overlap():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            import main_simple
+            import database as db
+            from bulk_import import import_records
+            with TestClient(main_simple.app):                  # Creates the tables
+                pass
+
+            uploads = [[area(i) for i in range(0, 600)], [area(i) for i in range(400, 1000)]]
+            barrier = threading.Barrier(len(uploads))
+            results, failures = [None] * len(uploads), []
+
+            def run(slot: int):
+                conn = db.connect(main_simple.DB_FILE)
+                try:
+                    barrier.wait()
+                    results[slot] = import_records(conn, "areas", uploads[slot], on_error="skip")
+                except Exception as e:
+                    failures.append(e)
+                finally:
+                    conn.close()
+
+            threads = [threading.Thread(target=run, args=(slot,)) for slot in range(len(uploads))]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert not failures, failures
+            assert sum(r["inserted"] for r in results) == 1000
+            overlap = sorted(e["key"] for r in results for e in r["errors"])
+            assert overlap == [f"area_{i:03d}" for i in range(400, 600)]
+            assert all(e["error"] == "Already exists" for r in results for e in r["errors"])
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Bulk import")
+    print("=" * 60)
+    test_bulk_areas_and_seed()
+    print("[OK] Bulk endpoints and seed_data share the one-transaction path")
+    test_concurrent_imports_overlap()
+    print("[OK] Concurrent overlapping imports report existing keys, no IntegrityError")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Frame deadline check - no server or model needed.
+
+The deadline must come from X-Deadline-Ms (clamped, ignored when not a
+finite number) or the endpoint default, frames past it must get the cheap
+"expired" answer without the model running, and the dropped frames must
+be counted per camera in /stats/expired.
+
+Usage: python test_deadlines.py   (or: python -m pytest test_deadlines.py)
+"""
+import io
+import os
+import tempfile
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from deadlines import (MAX_DEADLINE_MS, REALTIME_DEADLINE_MS, UNASSIGNED_AREA, ExpiredFrames,
+                       deadline_budget_ms, deadline_passed, remaining_ms)
+
+
+def test_budget_and_clock():
+    assert deadline_budget_ms(b"250", REALTIME_DEADLINE_MS) == 250.0
+    assert deadline_budget_ms(b"soon", REALTIME_DEADLINE_MS) == REALTIME_DEADLINE_MS
+    assert deadline_budget_ms(None, REALTIME_DEADLINE_MS) == REALTIME_DEADLINE_MS
+    assert deadline_budget_ms(b"-5", None) == 0.0
+    assert deadline_budget_ms(b"1e9", None) == MAX_DEADLINE_MS
+    for header in (b"nan", b"inf", b"-inf"):                           # Would never (or always) expire
+        assert deadline_budget_ms(header, REALTIME_DEADLINE_MS) == REALTIME_DEADLINE_MS, header
+
+    assert not deadline_passed(None) and remaining_ms(None) is None
+    deadline = time.monotonic() + 0.02
+    assert not deadline_passed(deadline) and 0 < remaining_ms(deadline) <= 20
+    time.sleep(0.03)
+    assert deadline_passed(deadline) and remaining_ms(deadline) < 0
+
+
+def test_expired_counts_per_camera():
+    counts = ExpiredFrames()
+    for area in ("cam-2", "cam-1", "cam-2", None):
+        counts.record(area)
+    snapshot = counts.snapshot()
+    assert snapshot["total"] == 4
+    assert snapshot["by_area"] == {"cam-1": 1, "cam-2": 2, UNASSIGNED_AREA: 1}
+
+
+def test_main_drops_expired_frames():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import main
+        try:
+            calls = []
+            detector = main.engines.lookup("heuristic")
+            frame = np.zeros((64, 64, 3), dtype=np.uint8)
+            main.engines.register(main.Engine(
+                "counting", "Heuristic, counting frames",
+                detect_ppe=lambda frames: calls.extend(frames) or detector.detect_ppe(frames),
+                detect_stf=lambda frames: calls.extend(frames) or detector.detect_stf(frames)
+            ))
+            level = main.degradation.describe(0)
+            assert main.analyze_realtime_frame(frame, detector, level, False, time.monotonic() - 1) is None
+
+            buffer = io.BytesIO()
+            Image.new("RGB", (320, 240), (120, 120, 120)).save(buffer, format="JPEG")
+            upload = {"file": ("frame.jpg", buffer.getvalue(), "image/jpeg")}
+            with TestClient(main.app) as client:
+                before = main.expired_frames.snapshot()["by_area"].get("cam-1", 0)
+                for path in ("/detect/realtime", "/detect/ppe", "/detect/stf", "/detect/stf/realtime"):
+                    r = client.post(path, params={"engine": "counting", "area_id": "cam-1"}, files=upload,
+                                    headers={"X-Deadline-Ms": "0"})
+                    body = r.json()
+                    assert r.status_code == 200 and body["expired"] and body["deadline_ms"] == 0, path
+                    assert body["late_ms"] >= 0 and body["area_id"] == "cam-1"
+                assert not calls                                      # The model never ran
+
+                body = client.post("/detect/realtime", params={"engine": "counting", "area_id": "cam-1"},
+                                   files=upload, headers={"X-Deadline-Ms": "10000"}).json()
+                assert "expired" not in body and "detections" in body and calls
+
+                expired = client.get("/stats/expired").json()
+                assert expired["by_area"]["cam-1"] == before + 4
+        finally:
+            main.engines._engines.pop("counting", None)
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Frame deadlines: expired frames dropped before the model")
+    print("=" * 60)
+    test_budget_and_clock()
+    print("[OK] Deadline from X-Deadline-Ms or the endpoint default")
+    test_expired_counts_per_camera()
+    print("[OK] Expired frames counted per camera")
+    test_main_drops_expired_frames()
+    print("[OK] main.py answers expired frames without running the model")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Load-adaptive degradation check - no server or model needed.
+
+Slow requests must walk the controller down the quality levels one at a
+time and fast ones back up; too many requests in flight must step down
+without waiting for latencies, but never faster than the dwell time.
+/detect/realtime must run yolo-torch at the level's input size (capped at
+the tuned TARGET_IMG_SIZE) and model, skip STF when the level says so,
+and report the level in every response. Frames analysed concurrently off
+the event loop must never call one model from two threads at once.
+
+Usage: python test_degradation.py   (or: python -m pytest test_degradation.py)
+"""
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import degradation
+from degradation import QUALITY_LEVELS, DegradationController
+
+FAST_CONFIG = {"LATENCY_BUDGET_MS": 20.0, "RECOVER_BELOW_MS": 10.0, "STEP_DOWN_AFTER_S": 0.0,
+               "STEP_UP_AFTER_S": 0.0, "MIN_SAMPLES": 4}
+
+
+def configure(**values):
+    """Patch degradation's thresholds; returns the old values"""
+    old = {name: getattr(degradation, name) for name in values}
+    for name, value in values.items():
+        setattr(degradation, name, value)
+    return old
+
+
+def run_requests(controller: DegradationController, count: int, seconds: float) -> list:
+    levels = []
+    for _ in range(count):
+        with controller.request() as level:
+            levels.append(level["level"])
+            time.sleep(seconds)
+    return levels
+
+
+def test_steps_down_under_latency_and_recovers():
+    old = configure(**FAST_CONFIG)
+    try:
+        controller = DegradationController()
+        assert run_requests(controller, 3, 0.03) == [0, 0, 0]                 # Too few samples to judge
+        levels = run_requests(controller, 40, 0.03)
+        bottom = len(QUALITY_LEVELS) - 1
+        assert levels[-1] == bottom
+        assert sorted(set(levels)) == list(range(bottom + 1)) and levels == sorted(levels)   # One step at a time
+
+        levels = run_requests(controller, 40, 0.0)
+        assert levels[-1] == 0 and levels == sorted(levels, reverse=True)
+        assert controller.stats()["level_changes"] == 2 * bottom
+    finally:
+        configure(**old)
+
+
+def test_queue_depth_and_dwell():
+    old = configure(**{**FAST_CONFIG, "STEP_DOWN_AFTER_S": 60.0})
+    try:
+        controller = DegradationController()
+        controller._changed_at -= 61                                          # Level 0 held long enough
+        with ExitStack() as stack:
+            levels = [stack.enter_context(controller.request())["level"] for _ in range(degradation.QUEUE_HIGH + 3)]
+            assert controller.stats()["in_flight"] == degradation.QUEUE_HIGH + 3
+        assert levels[:degradation.QUEUE_HIGH + 1] == [0] * (degradation.QUEUE_HIGH + 1)
+        assert set(levels[degradation.QUEUE_HIGH + 1:]) == {1}                # One step, then the dwell holds
+        assert controller.level == 1 and controller.stats()["in_flight"] == 0
+    finally:
+        configure(**old)
+
+
+class FakeModel:
+    """Records the input size it is called at; no boxes"""
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, frames, imgsz=None, **kwargs):
+        self.calls.append(imgsz)
+        return []
+
+
+def test_yolo_runs_at_level_model_and_size():
+    import main
+    saved = main.model_apd, main.model_apd_lite, main.model_stf
+    full, lite, stf = FakeModel(), FakeModel(), FakeModel()
+    try:
+        main.model_apd, main.model_apd_lite, main.model_stf = full, lite, stf
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+        yolo = main.engines.lookup("yolo-torch")
+        controller = DegradationController()
+        for i, level in enumerate(QUALITY_LEVELS):
+            main.at_quality(yolo, controller.describe(i)).detect_ppe([frame])
+            main.at_quality(yolo, controller.describe(i)).detect_stf([frame])
+        sizes = [level["imgsz"] or main.TARGET_IMG_SIZE for level in QUALITY_LEVELS]
+        assert full.calls + lite.calls == sizes and stf.calls == sizes
+        assert len(lite.calls) == sum(level["model"] == "lite" for level in QUALITY_LEVELS)
+
+        main.model_apd_lite = None                                           # No nano model: full model
+        main.at_quality(yolo, controller.describe(len(QUALITY_LEVELS) - 1)).detect_ppe([frame])
+        assert full.calls[-1] == QUALITY_LEVELS[-1]["imgsz"]
+    finally:
+        main.model_apd, main.model_apd_lite, main.model_stf = saved
+
+
+class OneResultModel(FakeModel):
+    """One (unreadable) result per frame, so whole realtime analyses go through"""
+    def __call__(self, frames, imgsz=None, **kwargs):
+        super().__call__(frames, imgsz)
+        return [None] * (len(frames) if isinstance(frames, list) else 1)
+
+
+def test_levels_capped_at_tuned_size():
+    import main
+    saved = main.model_apd, main.model_apd_lite, main.model_stf, main.models_available, main.TARGET_IMG_SIZE
+    full, lite, stf = OneResultModel(), OneResultModel(), OneResultModel()
+    try:
+        main.model_apd, main.model_apd_lite, main.model_stf, main.models_available = full, lite, stf, True
+        main.TARGET_IMG_SIZE = 384                                           # Auto-tuned below "reduced"/"fast"
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+        yolo = main.engines.lookup("yolo-torch")
+        controller = DegradationController()
+        for i in range(len(QUALITY_LEVELS)):
+            level = controller.describe(i)
+            main.analyze_realtime_frame(frame, yolo, level, compact=False)
+            main.analyze_realtime_frame(frame, yolo, level, compact=True)
+            assert main.quality_report(level)["imgsz"] == min(level["imgsz"] or 384, 384)
+        assert full.calls + lite.calls and max(full.calls + lite.calls + stf.calls) == 384
+        assert full.calls[:4] == [384] * 4 and lite.calls[-2:] == [320] * 2  # Never larger than full
+    finally:
+        main.model_apd, main.model_apd_lite, main.model_stf, main.models_available, main.TARGET_IMG_SIZE = saved
+
+
+class ExclusiveModel(OneResultModel):
+    """Records the most threads ever inside it at once"""
+    def __init__(self):
+        super().__init__()
+        self.inside = self.most_inside = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, frames, imgsz=None, **kwargs):
+        with self.lock:
+            self.inside += 1
+            self.most_inside = max(self.most_inside, self.inside)
+        time.sleep(0.005)
+        with self.lock:
+            self.inside -= 1
+        return super().__call__(frames, imgsz)
+
+
+def test_model_calls_serialized():
+    import main
+    saved = main.model_apd, main.model_stf, main.models_available
+    apd, stf = ExclusiveModel(), ExclusiveModel()
+    try:
+        main.model_apd, main.model_stf, main.models_available = apd, stf, True
+        frame = np.zeros((64, 64, 3), dtype=np.uint8)
+        yolo = main.engines.lookup("yolo-torch")
+        level = DegradationController().describe(0)
+        with ThreadPoolExecutor(max_workers=8) as pool:                      # Realtime frames off the loop
+            list(pool.map(lambda i: main.analyze_realtime_frame(frame, yolo, level, compact=i % 2 == 0),
+                          range(32)))
+        assert len(apd.calls) == len(stf.calls) == 32
+        assert apd.most_inside == stf.most_inside == 1
+    finally:
+        main.model_apd, main.model_stf, main.models_available = saved
+
+
+def test_realtime_reports_quality():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            import main
+            buffer = io.BytesIO()
+            Image.new("RGB", (320, 240), (120, 120, 120)).save(buffer, format="JPEG")
+            upload = {"file": ("frame.jpg", buffer.getvalue(), "image/jpeg")}
+            with TestClient(main.app) as client:
+                for compact in ("false", "true"):
+                    body = client.post(f"/detect/realtime?engine=heuristic&compact={compact}", files=upload).json()
+                    assert body["quality"]["name"] == QUALITY_LEVELS[main.degradation.level]["name"]
+                    assert body["quality"]["imgsz"] in (main.TARGET_IMG_SIZE, QUALITY_LEVELS[main.degradation.level]["imgsz"])
+
+                bottom = len(QUALITY_LEVELS) - 1
+                main.degradation.level = bottom
+                try:
+                    body = client.post("/detect/realtime?engine=heuristic&compact=true", files=upload).json()
+                    assert body["quality"]["level"] == bottom and body["stf"]["hazard_type"] == "Skipped"
+                    assert client.get("/detect/quality").json()["quality"]["level"] == bottom
+                finally:
+                    main.degradation.level = 0
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Load-adaptive degradation of /detect/realtime")
+    print("=" * 60)
+    test_steps_down_under_latency_and_recovers()
+    print("[OK] Slow requests step down one level at a time, fast ones recover")
+    test_queue_depth_and_dwell()
+    print("[OK] Queue depth steps down, the dwell time limits it to one step")
+    test_yolo_runs_at_level_model_and_size()
+    print("[OK] yolo-torch runs at the level's input size and model")
+    test_levels_capped_at_tuned_size()
+    print("[OK] No level runs above an auto-tuned TARGET_IMG_SIZE")
+    test_model_calls_serialized()
+    print("[OK] Concurrent realtime frames never run one model twice at once")
+    test_realtime_reports_quality()
+    print("[OK] Every realtime response reports its quality level")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Detection engine registry check - no server or model needed.
+
+The heuristic engine must answer in the YOLO engines' schema (main.py's
+class IDs, persons first with their area), the cascade must send only the
+frames the heuristic flags to the model engine, unknown/unavailable
+engines must be refused with 400/503, and rank_engines must order the
+engines by measured latency.
+
+Usage: python test_engines.py   (or: python -m pytest test_engines.py)
+"""
+import time
+
+import numpy as np
+
+from engines import (Engine, EngineError, EngineRegistry, cascade_engine, heuristic_engine,
+                     rank_engines)
+from test_analysis_size import make_floor
+from test_ppe_heuristics import make_crowd, make_scene
+
+CLASS_NAMES_APD = {0: "Topi", 1: "Sepatu", 2: "Pakaian", 3: "Pekerja"}   # As in main.py
+DETECTION_KEYS = {"class_id", "class_name", "confidence", "bbox"}
+PERSON_KEYS = DETECTION_KEYS | {"area_x1", "area_y1", "area_x2", "area_y2"}
+
+
+def fake_model(name: str, calls: list, delay: float = 0.0, available: bool = True) -> Engine:
+    """Stands in for a YOLO engine: one person with a hat per frame, Fall hazard"""
+    def detect_ppe(frames):
+        calls.extend(frames)
+        time.sleep(delay * len(frames))
+        box = {"x1": 0, "y1": 0, "x2": 10, "y2": 10}
+        return [[{"class_id": 3, "class_name": "Pekerja", "confidence": 0.9, "bbox": dict(box),
+                  "area_x1": 0, "area_y1": 0, "area_x2": 10, "area_y2": 10},
+                 {"class_id": 0, "class_name": "Topi", "confidence": 0.8, "bbox": dict(box)}] for _ in frames]
+
+    def detect_stf(frames):
+        calls.extend(frames)
+        time.sleep(delay * len(frames))
+        return [{"hazard_type": "Fall", "confidence": 0.9, "safe": False} for _ in frames]
+
+    return Engine(name, name, detect_ppe, detect_stf, available=lambda: available)
+
+
+def registry(calls: list, model_available: bool = True) -> EngineRegistry:
+    engines = EngineRegistry("yolo-torch")
+    engines.register(heuristic_engine(CLASS_NAMES_APD, "Pekerja"))
+    engines.register(fake_model("yolo-torch", calls, delay=0.05, available=model_available))
+    engines.register(cascade_engine(engines.lookup("heuristic"), engines, ["yolo-torch"]))
+    return engines
+
+
+def test_lookup_errors():
+    engines = registry([], model_available=False)
+    for name, status in (("bogus", 400), (None, 503), ("yolo-torch", 503)):
+        try:
+            engines.get(name)
+        except EngineError as e:
+            assert e.status_code == status, name
+        else:
+            raise AssertionError(f"{name} accepted")
+    assert engines.get("heuristic").name == "heuristic"
+
+
+def test_heuristic_schema():
+    img, boxes = make_crowd(640, 480, 1, workers=2)
+    detections = heuristic_engine(CLASS_NAMES_APD, "Pekerja").detect_ppe([np.asarray(img)])[0]
+    persons = [det for det in detections if det["class_name"] == "Pekerja"]
+    assert persons and detections[:len(persons)] == persons                 # Persons first
+    for det in detections:
+        assert set(det) == (PERSON_KEYS if det in persons else DETECTION_KEYS), det
+        assert CLASS_NAMES_APD[det["class_id"]] == det["class_name"]
+        assert 0 <= det["confidence"] <= 1
+
+
+def test_cascade_escalates_flagged_frames_only():
+    calls = []
+    engines = registry(calls)
+    frames = [np.asarray(make_scene(640, 480, seed)) for seed in range(3)]
+    frames += [np.full((480, 640, 3), 128, dtype=np.uint8)]                # Blank wall: no worker
+    screened = engines.lookup("heuristic").detect_ppe(frames)
+    flagged = [i for i, detections in enumerate(screened) if detections]
+    assert flagged and len(flagged) < len(frames)
+
+    result = engines.lookup("cascade").detect_ppe(frames)
+    assert len(calls) == len(flagged)                                       # Model saw flagged frames only
+    for i, detections in enumerate(result):
+        assert (detections[1]["class_name"] == "Topi") if i in flagged else detections == screened[i]
+
+    calls.clear()
+    floors = [np.asarray(make_floor(640, 480, seed)) for seed in range(12)]
+    hazards = [not stf["safe"] for stf in engines.lookup("heuristic").detect_stf(floors)]
+    assert any(hazards) and not all(hazards)
+    engines.lookup("cascade").detect_stf(floors)
+    assert len(calls) == sum(hazards)
+
+    # Without a model engine the heuristic answer stands
+    engines = registry(calls, model_available=False)
+    assert engines.lookup("cascade").detect_ppe(frames) == screened
+
+
+def test_rank_engines():
+    engines = registry([])
+    engines.register(fake_model("yolo-onnx", [], available=False))
+    ranking = rank_engines(engines, 320, count=2, repeat=1)
+    timings = [row["ms_per_frame"] for row in ranking[:-1]]
+    assert timings == sorted(timings) and [row["rank"] for row in ranking[:-1]] == [1, 2, 3]
+    assert ranking[2]["engine"] == "yolo-torch"                         # 100 ms of sleep per frame
+    assert ranking[-1] == {"engine": "yolo-onnx", "available": False, "ms_per_frame": None}
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Detection engines: schema, cascade, ranking")
+    print("=" * 60)
+    test_lookup_errors()
+    print("[OK] Unknown engines 400, unavailable 503")
+    test_heuristic_schema()
+    print("[OK] Heuristic engine answers in the model schema")
+    test_cascade_escalates_flagged_frames_only()
+    print("[OK] Cascade sends only flagged frames to the model")
+    test_rank_engines()
+    print("[OK] Engines ranked by latency")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+History writer check - no server needed.
+
+Records submitted to HistoryWriter must land in detection_history in
+batches (a full batch flushes at once, a partial one after the flush
+interval, stop() flushes the rest), each box must become a
+detection_items row with its worker and the person's worn_mask, the
+rollups must count the rows, and a full queue must drop (and count)
+instead of blocking.
+
+Usage: python test_history_writer.py   (or: python -m pytest test_history_writer.py)
+"""
+import os
+import sqlite3
+import tempfile
+import time
+
+import database as db
+from history_writer import HistoryWriter
+from test_query_plan import HISTORY_SQL
+
+PERSON = {"class_id": 3, "class_name": "Pekerja", "confidence": 0.9,
+          "bbox": {"x1": 100, "y1": 50, "x2": 200, "y2": 350},
+          "area_x1": 100, "area_y1": 50, "area_x2": 200, "area_y2": 350}
+HAT = {"class_id": 0, "class_name": "Topi", "confidence": 0.8, "bbox": {"x1": 130, "y1": 50, "x2": 170, "y2": 80}}
+STRAY = {"class_id": 1, "class_name": "Sepatu", "confidence": 0.7, "bbox": {"x1": 400, "y1": 400, "x2": 440, "y2": 430}}
+
+
+def make_db(workdir: str) -> str:
+    path = os.path.join(workdir, "history.db")
+    conn = sqlite3.connect(path)
+    conn.execute(HISTORY_SQL)
+    conn.close()
+    db.migrate(path)
+    return path
+
+
+def record(i: int, detections=(), area_id="area_001", hazard="Medium") -> dict:
+    timestamp = f"2025-01-01T08:{i // 60:02d}:{i % 60:02d}"
+    return {
+        "timestamp": timestamp, "area_id": area_id, "image_name": f"frame_{i}.jpg",
+        "detected_classes": ",".join(det["class_name"] for det in detections),
+        "compliance_rate": 33.3, "hazard_level": hazard, "alert_message": "",
+        "detections": list(detections), "created_at": timestamp
+    }
+
+
+def count(path: str, sql: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_batches_and_flushes():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = make_db(workdir)
+        writer = HistoryWriter(path, batch_size=10, flush_interval_ms=1000)
+        writer.start()
+        try:
+            for i in range(10):                                         # A full batch: flushed at once
+                writer.submit(record(i))
+            assert wait_for(lambda: writer.stats()["written"] == 10, timeout=0.6)
+            assert writer.stats()["batches"] == 1
+
+            for i in range(10, 13):                                     # Partial: waits for the interval
+                writer.submit(record(i))
+            time.sleep(0.3)
+            assert count(path, "SELECT COUNT(*) FROM detection_history") == 10
+            assert wait_for(lambda: writer.stats()["written"] == 13)
+            assert writer.stats()["batches"] == 2
+
+            for i in range(13, 17):
+                writer.submit(record(i))
+        finally:
+            writer.stop()                                               # Flushes the rest
+        stats = writer.stats()
+        assert (stats["enqueued"], stats["written"], stats["pending"], stats["failed"]) == (17, 17, 0, 0)
+        assert count(path, "SELECT COUNT(*) FROM detection_history") == 17
+
+
+def test_items_and_rollups():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = make_db(workdir)
+        writer = HistoryWriter(path, batch_size=50, flush_interval_ms=20)
+        writer.start()
+        writer.submit(record(0, [PERSON, HAT, STRAY], hazard="Medium"))
+        writer.submit(record(1, [], area_id=None, hazard="High"))
+        writer.submit(record(65, [PERSON], hazard="High"))
+        writer.stop()
+
+        conn = sqlite3.connect(path)
+        try:
+            items = conn.execute('''SELECT h.image_name, i.item_index, i.class_name, i.worker_id, i.worn_mask, i.area_id
+                FROM detection_items i JOIN detection_history h ON h.id = i.history_id
+                ORDER BY h.id, i.item_index''').fetchall()
+            assert items == [
+                ("frame_0.jpg", 0, "Pekerja", 0, 1 << HAT["class_id"], "area_001"),
+                ("frame_0.jpg", 1, "Topi", 0, None, "area_001"),
+                ("frame_0.jpg", 2, "Sepatu", None, None, "area_001"),     # Outside every person
+                ("frame_65.jpg", 0, "Pekerja", 0, 0, "area_001"),
+            ]
+            minutes = conn.execute('''SELECT bucket, area_id, hazard_level, detections, ROUND(compliance_sum, 1)
+                FROM history_rollup_minute ORDER BY bucket, area_id, hazard_level''').fetchall()
+            assert minutes == [
+                ("2025-01-01T08:00", "", "High", 1, 33.3),
+                ("2025-01-01T08:00", "area_001", "Medium", 1, 33.3),
+                ("2025-01-01T08:01", "area_001", "High", 1, 33.3),
+            ]
+            hours = conn.execute("SELECT SUM(detections) FROM history_rollup_hour WHERE bucket = '2025-01-01T08'")
+            assert hours.fetchone()[0] == 3
+        finally:
+            conn.close()
+
+
+def test_full_queue_drops():
+    with tempfile.TemporaryDirectory() as workdir:
+        writer = HistoryWriter(make_db(workdir), max_queue=5)          # Not started: nothing drains
+        accepted = [writer.submit(record(i)) for i in range(8)]
+        assert accepted == [True] * 5 + [False] * 3
+        stats = writer.stats()
+        assert (stats["enqueued"], stats["dropped"], stats["pending"]) == (5, 3, 5)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("History writer: batching, detection_items, rollups")
+    print("=" * 60)
+    test_batches_and_flushes()
+    print("[OK] Full batches flush at once, partial ones after the interval, stop() flushes the rest")
+    test_items_and_rollups()
+    print("[OK] Boxes become detection_items rows with workers; rollups count the rows")
+    test_full_queue_drops()
+    print("[OK] A full queue drops and counts instead of blocking")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Live metrics check - no server needed.
+
+Compares the ring-buffer windows against a brute-force recount over a
+simulated clock, and checks that a checkpoint restores the same summary.
+
+Usage: python test_live_metrics.py   (or: python -m pytest test_live_metrics.py)
+"""
+import os
+import random
+import tempfile
+
+from live_metrics import METRICS_WINDOWS, LiveMetrics, RollingWindows
+
+
+def test_windows_match_brute_force():
+    windows = RollingWindows(METRICS_WINDOWS)
+    start = windows.head
+    events = []
+    now = start
+    for _ in range(20000):
+        now += random.choice([0, 0, 1, 1, 2, 7, 120])
+        rate = random.choice([0.0, 33.3, 66.7, 100.0])
+        violation = rate < 100.0
+        windows.add(now, rate, violation)
+        events.append((now, rate, violation))
+
+        if random.random() < 0.05:
+            snapshot = windows.snapshot(now)
+            for name, length in METRICS_WINDOWS.items():
+                recent = [e for e in events if e[0] > now - length]
+                assert snapshot[name]["inspections"] == len(recent)
+                assert snapshot[name]["violations"] == sum(e[2] for e in recent)
+                if recent:
+                    expected = round(sum(e[1] for e in recent) / len(recent), 1)
+                    assert abs(snapshot[name]["compliance_rate"] - expected) < 0.15
+            events = [e for e in events if e[0] > now - windows.size]
+
+
+def test_checkpoint_restore():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "metrics.db")
+        metrics = LiveMetrics(path)
+        for i in range(50):
+            metrics.record({
+                "compliance_rate": 66.7 if i % 3 else 100.0,
+                "detected_ppe": ["Topi", "Pakaian"] if i % 3 else ["Topi", "Pakaian", "Sepatu"],
+                "missing_ppe": ["Sepatu"] if i % 3 else [],
+                "hazard_level": "Medium" if i % 3 else "Low",
+                "has_worker": i % 5 != 0
+            }, area_id="area_001")
+        metrics.checkpoint()
+
+        restored = LiveMetrics(path)
+        assert restored.restore()
+        before, after = metrics.summary(), restored.summary()
+        before.pop("timestamp"), after.pop("timestamp")
+        assert before == after
+        assert after["total_inspections"] == 50
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Live metrics")
+    print("=" * 60)
+    test_windows_match_brute_force()
+    test_checkpoint_restore()
+    print("[OK] Rolling windows and checkpoints are consistent")
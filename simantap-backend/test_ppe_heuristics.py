@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Heuristic PPE analyzer check - no server needed.
+
+RegionFeatures below is the per-region implementation the analyzer used
+before FeatureMaps (grayscale, np.gradient and skin masks recomputed for
+every region, mean/std over strided RGB slices). Both run the same
+decision code over a corpus of synthetic worker scenes and must make the
+same detections (confidences within float rounding), and give the exact
+same edge density for random regions. Region sums read from summed-area
+tables must equal the slice sums, and the sliding-window search must find
+the workers in multi-worker scenes.
+
+Usage: python test_ppe_heuristics.py   (or: python -m pytest test_ppe_heuristics.py)
+"""
+import random
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from ppe_heuristics import (FeatureMaps, analyze_ppe_array, block_mean, detect_ppe_regions, find_workers,
+                            summarize_workers)
+
+SCENES = 40
+CROWDS = 20
+VEST_COLORS = [(250, 220, 20), (255, 120, 0), (40, 200, 60), (30, 40, 120), (200, 200, 200)]
+SKIN = (205, 150, 110)
+
+
+def draw_worker(draw: ImageDraw.ImageDraw, rng: random.Random, cx: float, y0: float, unit: float) -> tuple:
+    """A worker 100 units tall from y0, random PPE; returns its (top, bottom, left, right)"""
+    def at(x, y):
+        return (cx + x * unit, y0 + y * unit)
+
+    draw.ellipse([at(-6, 13), at(6, 25)], fill=SKIN)                                       # Head
+    if rng.random() < 0.6:                                                                 # Helmet
+        draw.pieslice([at(-9, 3), at(9, 27)], 180, 360,
+                      fill=rng.choice([(250, 220, 20), (255, 255, 255), (230, 80, 20), (30, 30, 30)]))
+    if rng.random() < 0.7:                                                                 # Vest / shirt
+        draw.rectangle([at(-14, 24), at(14, 55)], fill=rng.choice(VEST_COLORS))
+        for stripe in range(rng.randint(0, 3)):
+            draw.rectangle([at(-14, 30 + 8 * stripe), at(14, 32 + 8 * stripe)], fill=(220, 220, 220))
+    else:
+        draw.rectangle([at(-14, 24), at(14, 55)], fill=SKIN)
+    draw.rectangle([at(-10, 55), at(10, 80)], fill=(40, 50, 90))                          # Legs
+    shoes = (20, 20, 20) if rng.random() < 0.6 else SKIN
+    draw.rectangle([at(-12, 78), at(-1, 86)], fill=shoes)
+    draw.rectangle([at(1, 78), at(12, 86)], fill=shoes)
+    return (int(y0 + 3 * unit), int(y0 + 86 * unit), int(cx - 14 * unit), int(cx + 14 * unit))
+
+
+def make_crowd(width: int, height: int, seed: int, workers: int = 1, noise: float = None) -> tuple:
+    """
+    Workers in front of a wall with clutter, colours, blur and noise (sigma,
+    random 0-12 by default); returns (image, worker boxes)
+    """
+    rng = random.Random(seed)
+    wall = tuple(rng.randint(60, 230) for _ in range(3))
+    img = Image.new("RGB", (width, height), wall)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([(0, int(height * 0.8)), (width, height)], fill=tuple(rng.randint(30, 140) for _ in range(3)))
+    for _ in range(rng.randint(0, 6)):                    # Background clutter
+        x, y = rng.randint(0, width), rng.randint(0, height)
+        draw.rectangle([(x, y), (x + rng.randint(20, width // 4), y + rng.randint(20, height // 4))],
+                       fill=tuple(rng.randint(0, 255) for _ in range(3)))
+
+    if workers == 1:                                      # Near the centre, filling the frame
+        boxes = [draw_worker(draw, rng, width // 2 + rng.randint(-width // 10, width // 10), 0, height / 100)]
+    else:                                                 # Side by side, further away
+        unit = height / 100 * rng.uniform(0.55, 0.7)
+        slot = width / workers
+        boxes = [draw_worker(draw, rng, slot * (i + 0.5) + rng.uniform(-0.1, 0.1) * slot,
+                             rng.uniform(0, height - 90 * unit), unit) for i in range(workers)]
+
+    if rng.random() < 0.5:
+        img = img.filter(ImageFilter.GaussianBlur(rng.uniform(0.5, 2.5)))
+    sigma = rng.uniform(0, 12) if noise is None else noise
+    pixels = np.asarray(img, dtype=np.float32) + np.random.default_rng(seed).normal(0, sigma, (height, width, 3))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)), boxes
+
+
+def make_scene(width: int, height: int, seed: int, noise: float = None) -> Image.Image:
+    """A worker standing in front of a wall, with random PPE, colours and noise"""
+    return make_crowd(width, height, seed, noise=noise)[0]
+
+
+def scene_array(width: int, height: int, seed: int) -> np.ndarray:
+    """uint8, as main_simple decodes uploads"""
+    return np.asarray(make_scene(width, height, seed))
+
+# ============================================================================
+# REFERENCE: PER-REGION FEATURES
+# ============================================================================
+class RegionFeatures:
+    """Every feature recomputed from the region's own pixels (pre-FeatureMaps behaviour)"""
+
+    def __init__(self, img_array: np.ndarray):
+        self.rgb = img_array.astype(np.float32)
+
+    def pixels(self, region):
+        top, bottom, left, right = region
+        return self.rgb[top:bottom, left:right, :]
+
+    def brightness(self, region):
+        return np.mean(self.pixels(region))
+
+    def std(self, region):
+        return np.std(self.pixels(region))
+
+    def channel_means(self, region):
+        pixels = self.pixels(region)
+        return [np.mean(pixels[:, :, c]) for c in range(3)]
+
+    def edge_density(self, region):
+        pixels = self.pixels(region)
+        if pixels.shape[0] < 3 or pixels.shape[1] < 3:
+            return 0
+        gray = np.mean(pixels, axis=2)
+        dy = np.abs(np.gradient(gray, axis=0))
+        dx = np.abs(np.gradient(gray, axis=1))
+        edges = np.sqrt(dx ** 2 + dy ** 2)
+        if np.max(edges) > 0:
+            edge_count = np.sum(edges / np.max(edges) > 0.10)
+        else:
+            edge_count = 0
+        return min(1.0, edge_count / (edges.shape[0] * edges.shape[1]))
+
+    def saturation_mean(self, region):
+        pixels = self.pixels(region)
+        if pixels.shape[0] < 1 or pixels.shape[1] < 1:
+            return 0
+        r, g, b = pixels[:, :, 0], pixels[:, :, 1], pixels[:, :, 2]
+        max_c = np.maximum(np.maximum(r, g), b)
+        min_c = np.minimum(np.minimum(r, g), b)
+        brightness = np.maximum((max_c + min_c) / 2.0, 1)
+        return np.mean(np.minimum((max_c - min_c) / brightness, 255)) / 255.0
+
+    def skin_fraction(self, region, loose=False):
+        pixels = self.pixels(region)
+        r, g, b = pixels[:, :, 0], pixels[:, :, 1], pixels[:, :, 2]
+        mask = (r > 75) & (g > 30) & (b > 15) & (r > g)
+        if not loose:
+            mask &= g > b
+        return np.sum(mask) / (pixels.shape[0] * pixels.shape[1])
+
+    def has_skin(self, region):
+        pixels = self.pixels(region)
+        if pixels.shape[0] < 2 or pixels.shape[1] < 2:
+            return False
+        return self.skin_fraction(region) > 0.03
+
+    has_person = FeatureMaps.has_person
+
+# ============================================================================
+# TESTS
+# ============================================================================
+def same_decisions(detections, reference, tolerance: float = 0.01) -> bool:
+    """Same classes and boxes; confidences equal up to float rounding"""
+    return len(detections) == len(reference) and all(
+        det["class_name"] == ref["class_name"] and det["bbox"] == ref["bbox"]
+        and abs(det["confidence"] - ref["confidence"]) <= tolerance
+        for det, ref in zip(detections, reference))
+
+
+def test_edge_density_matches_per_region():
+    img = scene_array(320, 240, 1)
+    maps, reference = FeatureMaps(img), RegionFeatures(img)
+    rng = random.Random(3)
+    for _ in range(200):
+        top, left = rng.randint(0, 236), rng.randint(0, 316)
+        region = (top, rng.randint(top + 3, 240), left, rng.randint(left + 3, 320))
+        assert maps.edge_density(region) == reference.edge_density(region), region
+
+
+def test_decisions_match_per_region():
+    for seed in range(SCENES):
+        width, height = random.Random(seed).choice([(320, 240), (480, 640), (640, 480)])
+        img = scene_array(width, height, seed)
+        shared = detect_ppe_regions(FeatureMaps(img))
+        reference = detect_ppe_regions(RegionFeatures(img))
+        assert same_decisions(shared, reference), f"scene {seed}: {shared} != {reference}"
+
+
+def test_integral_tables_match_slices():
+    img = scene_array(320, 240, 2)
+    slices, tables = FeatureMaps(img), FeatureMaps(img, integral=True)
+    rng = random.Random(5)
+    for _ in range(200):
+        top, left = rng.randint(0, 238), rng.randint(0, 318)
+        region = (top, rng.randint(top + 1, 240), left, rng.randint(left + 1, 320))
+        assert tables.brightness(region) == slices.brightness(region), region
+        assert tables.std(region) == slices.std(region), region
+        assert tables.channel_means(region) == slices.channel_means(region), region
+        assert tables.skin_fraction(region, True) == slices.skin_fraction(region, True), region
+        assert tables.edge_fraction(region) == slices.edge_fraction(region), region
+        assert np.isclose(tables.saturation_mean(region), slices.saturation_mean(region)), region
+
+
+def iou(a, b) -> float:
+    height = min(a[1], b[1]) - max(a[0], b[0])
+    width = min(a[3], b[3]) - max(a[2], b[2])
+    if height <= 0 or width <= 0:
+        return 0.0
+    inter = height * width
+    return inter / (FeatureMaps.area(a) + FeatureMaps.area(b) - inter)
+
+
+def test_window_search_finds_workers():
+    found_workers = expected = extra = 0
+    for seed in range(CROWDS):
+        img, boxes = make_crowd(640, 480, seed, workers=2 + seed % 2)
+        workers = [box for box, _ in find_workers(FeatureMaps(np.asarray(img)))]
+        matched = [w for w in workers if any(iou(w, box) >= 0.5 for box in boxes)]
+        found_workers += len(matched)
+        expected += len(boxes)
+        extra += len(workers) - len(matched)
+    assert found_workers >= 0.8 * expected, f"{found_workers}/{expected} workers found"
+    assert extra <= 0.5 * CROWDS, f"{extra} windows without a worker"
+
+    img, boxes = make_crowd(1280, 720, 1, workers=3)
+    result = analyze_ppe_array(np.asarray(img), search=True)
+    assert len(result["workers"]) >= 2
+    assert {det["worker"] for det in result["detections"]} <= {w["worker"] for w in result["workers"]}
+    worn = {ppe for w in result["workers"] for ppe in w["detected_ppe"]}
+    assert result["detected_ppe"] == sorted(set(result["detected_ppe"]), key=result["detected_ppe"].index)
+    assert set(result["detected_ppe"]) == worn
+    assert set(result["missing_ppe"]) == {ppe for w in result["workers"] for ppe in w["missing_ppe"]}
+
+
+def test_block_mean_large_factors():
+    plane = np.full((80, 80), 255, dtype=np.uint8)
+    for factor in (2, 16, 17, 20):                                  # 17 * 17 * 255 > uint16
+        assert (block_mean(plane, factor) == 255).all(), factor
+    plane = np.random.default_rng(0).integers(0, 256, (100, 90), dtype=np.uint8)
+    means = plane[:96, :72].reshape(4, 24, 3, 24).mean(axis=(1, 3))
+    assert (block_mean(plane, 24) == np.floor(means).astype(np.uint8)).all()
+
+
+def test_failure_keeps_earlier_detections():
+    import ppe_heuristics
+    img = make_scene(640, 480, 1)                                   # Hat, clothing and shoes
+    features = FeatureMaps(np.asarray(img))
+    full = detect_ppe_regions(features)
+    assert any(det["class_name"] == "Sepatu" for det in full) and len(full) > 1
+
+    def broken(*args):
+        raise RuntimeError("feet band")
+    original = ppe_heuristics.shoes_confidence
+    ppe_heuristics.shoes_confidence = broken
+    try:
+        partial = detect_ppe_regions(FeatureMaps(np.asarray(img)))
+    finally:
+        ppe_heuristics.shoes_confidence = original
+    assert partial == [det for det in full if det["class_name"] != "Sepatu"]
+
+
+def test_one_unprotected_worker_raises_the_alert():
+    protected = np.asarray(make_scene(640, 480, 1))                  # Hat, clothing and shoes
+    img = np.concatenate([protected, np.full_like(protected, 128)], axis=1)
+    features = FeatureMaps(img)
+    assert len(detect_ppe_regions(features, (0, 480, 0, 640))) == 3
+    result = summarize_workers(features, [((0, 480, 0, 640), 0.9), ((0, 480, 640, 1280), 0.8)])
+    assert [w["compliance_rate"] for w in result["workers"]] == [100.0, 0.0]
+    assert result["detected_ppe"] == ["Topi", "Pakaian", "Sepatu"]
+    assert result["missing_ppe"] == ["Topi", "Pakaian", "Sepatu"]    # Worker 1 wears none of it
+    assert result["hazard_level"] == "High" and result["compliance_rate"] == 50.0
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Heuristic PPE analyzer: shared feature maps vs per-region")
+    print("=" * 60)
+    test_edge_density_matches_per_region()
+    test_decisions_match_per_region()
+    print(f"[OK] Identical decisions on {SCENES} scenes")
+    test_integral_tables_match_slices()
+    print("[OK] Summed-area tables match slice sums")
+    test_window_search_finds_workers()
+    print(f"[OK] Sliding windows find the workers in {CROWDS} crowd scenes")
+    test_block_mean_large_factors()
+    print("[OK] Block means exact for large reduction factors")
+    test_failure_keeps_earlier_detections()
+    print("[OK] A failing band keeps the detections made before it")
+    test_one_unprotected_worker_raises_the_alert()
+    print("[OK] Any worker without PPE raises the frame's alert")
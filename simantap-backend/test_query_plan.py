@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Query plan check for detection_history - no server needed.
+
+Builds a scratch DB, applies database.MIGRATIONS and asserts with
+EXPLAIN QUERY PLAN that every stats query (detection_history and
+detection_items) is answered from an index
+(SEARCH ... USING [COVERING] INDEX), never by scanning the table, and that
+/history pages come out of an index in order (no sort step).
+
+Usage: python test_query_plan.py   (or: python -m pytest test_query_plan.py)
+"""
+import os
+import random
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+import database as db
+
+HISTORY_SQL = '''CREATE TABLE detection_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    area_id TEXT,
+    image_name TEXT,
+    detected_classes TEXT,
+    compliance_rate REAL,
+    hazard_level TEXT,
+    alert_message TEXT,
+    created_at TEXT NOT NULL
+)'''
+
+SINCE = "2025-01-01T00:00:00"
+UNTIL = "2025-01-02T00:00:00"
+
+# (name, sql, params) - every query the stats endpoints run
+HOT_QUERIES = [
+    ("totals", db.SQL_HISTORY_TOTALS, (SINCE, UNTIL)),
+    ("totals per area", db.SQL_HISTORY_TOTALS_AREA, ("area_001", SINCE, UNTIL)),
+    ("by hazard", db.SQL_HISTORY_BY_HAZARD, (SINCE, UNTIL)),
+    ("by hazard per area", db.SQL_HISTORY_BY_HAZARD_AREA, ("area_001", SINCE, UNTIL)),
+    ("class totals", db.SQL_CLASS_TOTALS, ("Topi", SINCE, UNTIL)),
+    ("class totals per area", db.SQL_CLASS_TOTALS_AREA, ("area_001", "Topi", SINCE, UNTIL)),
+    ("workers missing", db.workers_missing_sql(3, False), (1, 2, 4, "Pekerja", SINCE, UNTIL)),
+    ("workers missing per area", db.workers_missing_sql(3, True), (1, 2, 4, "area_001", "Pekerja", SINCE, UNTIL)),
+]
+
+
+def make_db(path: str, rows: int = 5000):
+    conn = sqlite3.connect(path)
+    conn.execute(HISTORY_SQL)
+    start = datetime(2024, 12, 1)
+    now = datetime.now().isoformat()
+    conn.executemany('''INSERT INTO detection_history
+        (timestamp, area_id, image_name, detected_classes, compliance_rate, hazard_level, alert_message, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', [(
+            (start + timedelta(seconds=30 * i)).isoformat(),
+            f"area_{random.randint(1, 20):03d}", f"frame_{i}.jpg", "Pekerja,Topi",
+            random.choice([0.0, 33.3, 66.7, 100.0]), random.choice(["Low", "Medium", "High"]),
+            "", now
+        ) for i in range(rows)])
+    conn.commit()
+    conn.close()
+    assert db.migrate(path) == db.MIGRATIONS[-1][0]
+
+
+def query_plan(conn: sqlite3.Connection, sql: str, params) -> list:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def check_plans(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        for name, sql, params in HOT_QUERIES:
+            plan = query_plan(conn, sql, params)
+            print(f"  {name:<26} {' | '.join(plan)}")
+            table_steps = [step for step in plan if step.startswith(("SCAN", "SEARCH"))]
+            assert table_steps, f"{name}: no table access in plan: {plan}"
+            for step in table_steps:
+                assert step.startswith("SEARCH") and ("INDEX" in step or "PRIMARY KEY" in step), \
+                    f"{name}: full scan: {step}"
+    finally:
+        conn.close()
+
+
+def test_stats_queries_use_indexes():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "plan.db")
+        make_db(path)
+        check_plans(path)
+
+
+def test_history_pages_need_no_sort():
+    """Every /history filter combination is read in index order - no sort, LIMIT stops early"""
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "plan.db")
+        make_db(path)
+        conn = sqlite3.connect(path)
+        try:
+            for mask in range(64):
+                flags = [bool(mask & (1 << bit)) for bit in range(6)]
+                params = ["x"] * (sum(flags) + flags[5] + 1)
+                plan = query_plan(conn, db.history_page_sql(*flags), params)
+                assert len(plan) == 1 and "USING INDEX" in plan[0], f"{flags}: {plan}"
+        finally:
+            conn.close()
+
+
+def test_migrate_is_idempotent():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "plan.db")
+        make_db(path, rows=10)
+        assert db.migrate(path) == db.MIGRATIONS[-1][0]
+        conn = sqlite3.connect(path)
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(detection_history)")}
+        conn.close()
+        assert {"idx_history_time", "idx_history_area_time"} <= indexes
+        assert "idx_history_hazard_time" not in indexes
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("detection_history query plans")
+    print("=" * 60)
+    test_stats_queries_use_indexes()
+    test_history_pages_need_no_sort()
+    test_migrate_is_idempotent()
+    print("[OK] All stats and history queries use an index")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Reference data cache check - no server needed.
+
+Runs main_simple's app in a scratch directory and checks that /areas and
+/apd answer from the cache (no query per request), return 304 for a
+matching If-None-Match, and pick up POSTed rows with a new ETag.
+
+Usage: python test_reference_data.py   (or: python -m pytest test_reference_data.py)
+"""
+import os
+import tempfile
+
+from fastapi.testclient import TestClient
+
+import database as db
+
+
+def test_cached_reference_endpoints():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            import main_simple
+            with TestClient(main_simple.app) as client:
+                client.post("/areas", json={"area_id": "area_001", "area_name": "Gudang",
+                                            "location": "Blok A", "risk_level": "High"})
+                first = client.get("/areas")
+                etag = first.headers["etag"]
+                assert first.json()["data"][0]["area_id"] == "area_001"
+
+                queries = []
+                original = db.fetch_all
+                db.fetch_all = lambda *args, **kwargs: queries.append(args) or original(*args, **kwargs)
+                try:
+                    cached = client.get("/areas", headers={"If-None-Match": etag})
+                    assert cached.status_code == 304 and cached.content == b""
+                    assert client.get("/areas/area_001").json()["data"]["area_name"] == "Gudang"
+                    assert client.get("/areas/area_404").status_code == 404
+                    assert client.get("/apd/Helmet").json()["total"] == 0
+                    assert queries == []
+                finally:
+                    db.fetch_all = original
+
+                client.post("/areas", json={"area_id": "area_002", "area_name": "Dermaga",
+                                            "location": "Blok B", "risk_level": "Low"})
+                fresh = client.get("/areas", headers={"If-None-Match": etag})
+                assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+                assert len(fresh.json()["data"]) == 2
+
+                apd_etag = client.get("/apd").headers["etag"]
+                client.post("/apd", json={"item_id": "apd_001", "item_name": "Helm", "category": "Helmet"})
+                assert client.get("/apd", headers={"If-None-Match": apd_etag}).status_code == 200
+                assert client.get("/apd/Helmet").json()["data"][0]["item_id"] == "apd_001"
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Reference data cache")
+    print("=" * 60)
+    test_cached_reference_endpoints()
+    print("[OK] Areas and APD served from cache with ETags")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Result codec check - no server or model needed.
+
+MessagePack must round-trip numpy arrays (ext type 1) and detection lists
+(ext type 2) to what the JSON body carries, and content negotiation must
+honour the Accept header's q-values, not just the media type's presence.
+
+Usage: python test_result_codec.py   (or: python -m pytest test_result_codec.py)
+"""
+import json
+
+import msgpack
+import numpy as np
+from starlette.requests import Request
+
+from result_codec import (EXT_DETECTIONS, EXT_NDARRAY, decode_msgpack, encode_msgpack, parse_accept,
+                          wants_msgpack)
+
+DETECTIONS = [
+    {"class_id": 3, "class_name": "Pekerja", "confidence": 0.912, "bbox": {"x1": 10, "y1": 20, "x2": 110, "y2": 220},
+     "area_x1": 10, "area_y1": 20, "area_x2": 110, "area_y2": 220},
+    {"class_id": 0, "class_name": "Topi", "confidence": 0.75, "bbox": {"x1": 40, "y1": 20, "x2": 80, "y2": 50}},
+]
+
+
+def request_accepting(accept: str) -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [(b"accept", accept.encode())]})
+
+
+def test_ndarray_round_trip():
+    arrays = {
+        "boxes": np.arange(12, dtype=np.int32),
+        "confidences": np.array([0.5, 0.25, 0.125], dtype=np.float32),
+        "grid": np.arange(6, dtype=">i4").reshape(2, 3),           # Big-endian goes out little-endian
+        "empty": np.empty((0, 4), dtype=np.int32),
+    }
+    packed = encode_msgpack(arrays)
+    raw = msgpack.unpackb(packed, raw=False)
+    assert all(raw[key].code == EXT_NDARRAY for key in arrays)
+    decoded = decode_msgpack(packed)
+    for key, array in arrays.items():
+        assert decoded[key].shape == array.shape and np.array_equal(decoded[key], array), key
+    assert decoded["grid"].dtype == np.dtype("<i4")
+
+
+def test_detection_table_round_trip():
+    body = {"detections": DETECTIONS, "compliance": {"has_worker": True}, "timestamp": "2025-01-01T00:00:00"}
+    packed = encode_msgpack(body)
+    assert msgpack.unpackb(packed, raw=False)["detections"].code == EXT_DETECTIONS
+    assert decode_msgpack(packed) == json.loads(json.dumps(body))
+
+    odd = {"detections": [{**DETECTIONS[1], "note": "x"}], "empty": []}    # Not a plain detection list
+    assert decode_msgpack(encode_msgpack(odd)) == odd
+
+
+def test_accept_q_values():
+    assert parse_accept("application/msgpack;q=0.5, */*") == [("application/msgpack", 0.5), ("*/*", 1.0)]
+    for accept, expected in (
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/msgpack, application/json;q=0.9", True),
+        ("application/msgpack;q=0", False),
+        ("application/msgpack; q=0.0, */*;q=0.1", False),
+        ("application/msgpack;q=0.5, application/json", False),
+        ("application/json, application/msgpack;q=0.8", False),
+        ("application/msgpack;q=0.8, */*;q=0.5", True),
+        ("application/msgpack;q=nan", False),
+        ("application/msgpackish", False),
+        ("*/*", False),
+        ("", False),
+    ):
+        assert wants_msgpack(request_accepting(accept)) == expected, accept
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Result codec: MessagePack ext types and Accept negotiation")
+    print("=" * 60)
+    test_ndarray_round_trip()
+    print("[OK] ndarrays round-trip (ext type 1)")
+    test_detection_table_round_trip()
+    print("[OK] Detection lists round-trip as tables (ext type 2)")
+    test_accept_q_values()
+    print("[OK] Accept q-values honoured")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Retention job check - no server needed.
+
+Writes 60 days of history through HistoryWriter, runs one retention pass
+and asserts that raw rows and items older than the window are gone, that
+the hour/day rollups still hold every detection, that minute rollups were
+downsampled, and that freed pages went back to the OS. A rollup rebuild
+afterwards must leave the buckets raw history no longer covers alone.
+
+Usage: python test_retention.py   (or: python -m pytest test_retention.py)
+"""
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+import database as db
+from history_writer import HistoryWriter
+from retention import RetentionJob, ensure_incremental_vacuum
+from rollups import rebuild_rollups
+from test_query_plan import HISTORY_SQL
+
+DAYS = 60
+FRAMES = 12000
+
+
+def detections():
+    return [
+        {"class_id": 3, "class_name": "Pekerja", "confidence": 0.9,
+         "bbox": {"x1": 10, "y1": 10, "x2": 200, "y2": 400},
+         "area_x1": 10, "area_y1": 10, "area_x2": 200, "area_y2": 400},
+        {"class_id": 0, "class_name": "Topi", "confidence": 0.8,
+         "bbox": {"x1": 20, "y1": 10, "x2": 80, "y2": 60}},
+    ]
+
+
+def assert_rollups(conn, now: datetime):
+    """Hour/day rollups hold every detection; minutes only for the last 7 days"""
+    for table in ("history_rollup_hour", "history_rollup_day"):
+        assert conn.execute(f"SELECT SUM(detections) FROM {table}").fetchone()[0] == FRAMES
+    minute_cutoff = (now - timedelta(days=7)).isoformat()[:16]
+    assert conn.execute("SELECT COUNT(*) FROM history_rollup_minute WHERE bucket < ?",
+                        (minute_cutoff,)).fetchone()[0] == 0
+
+
+def rollup_rows(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*), SUM(detections) FROM {table}").fetchone()
+                for table, _, _ in db.ROLLUP_GRANULARITIES.values()}
+    finally:
+        conn.close()
+
+
+def test_retention_pass():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "retention.db")
+        conn = sqlite3.connect(path)
+        conn.execute(HISTORY_SQL)
+        conn.close()
+        db.migrate(path)
+        assert ensure_incremental_vacuum(path)
+
+        writer = HistoryWriter(path, batch_size=500, flush_interval_ms=50, max_queue=FRAMES)
+        writer.start()
+        now = datetime.now()
+        for i in range(FRAMES):
+            timestamp = (now - timedelta(days=DAYS) + timedelta(seconds=DAYS * 86400 * i / FRAMES)).isoformat()
+            writer.submit({
+                "timestamp": timestamp, "area_id": "area_001", "image_name": f"frame_{i}.jpg",
+                "detected_classes": "Pekerja,Topi", "compliance_rate": 33.3, "hazard_level": "High",
+                "alert_message": "x" * 200, "detections": detections(), "created_at": timestamp
+            })
+        writer.stop()
+
+        job = RetentionJob(path, raw_days=30, minute_days=7, batch_size=500)
+        run = job.run_once()
+        assert job.last_error is None, job.last_error
+
+        conn = sqlite3.connect(path)
+        try:
+            cutoff = (now - timedelta(days=30)).isoformat()
+            assert conn.execute("SELECT COUNT(*) FROM detection_history WHERE timestamp < ?", (cutoff,)).fetchone()[0] == 0
+            remaining = conn.execute("SELECT COUNT(*) FROM detection_history").fetchone()[0]
+            assert 0 < remaining < FRAMES
+            assert conn.execute("SELECT COUNT(*) FROM detection_items").fetchone()[0] == 2 * remaining
+            assert run["rows_deleted"]["detection_history"] == FRAMES - remaining
+
+            assert_rollups(conn, now)
+            assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        finally:
+            conn.close()
+        assert run["bytes_reclaimed"] > 0 and run["pages_vacuumed"] > 0
+        assert job.stats()["runs"] == 1
+
+        before = rollup_rows(path)
+        rebuild_rollups(path)
+        assert rollup_rows(path) == before
+        conn = sqlite3.connect(path)
+        try:
+            assert_rollups(conn, now)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Retention job")
+    print("=" * 60)
+    test_retention_pass()
+    print("[OK] Expired rows deleted, rollups kept, space reclaimed")
+    print("[OK] Rollup rebuild after retention keeps pruned history")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Heuristic STF analyzer check - no server needed.
+
+reference_scores below is the per-image scoring the /detect/stf endpoints
+ran as closures (np.gradient and np.mean/np.std over one frame). Over a
+corpus of floors, stairs and clutter, stf_scores must give the same
+slip/trip/fall scores, and scoring a stack of frames must give the same
+scores as scoring each frame on its own.
+
+Usage: python test_stf_heuristics.py   (or: python -m pytest test_stf_heuristics.py)
+"""
+import random
+
+import numpy as np
+
+from stf_heuristics import analyze_stf_batch, frame_scores, stf_scores, strongest_hazard, summarize_stf
+from test_analysis_size import make_floor
+
+FLOORS = 40
+SIZES = [(320, 240), (640, 480), (480, 640), (640, 640)]
+
+# ============================================================================
+# REFERENCE: PER-IMAGE CLOSURES
+# ============================================================================
+def reference_scores(img_array: np.ndarray) -> dict:
+    """The endpoints' scoring before stf_heuristics, one frame at a time"""
+    region = img_array[int(img_array.shape[0] * 0.6):, :, :]
+
+    def slip(region):
+        if region.shape[0] < 5 or region.shape[1] < 5: return 0
+        score = 0
+        if np.mean(region) > 200: score += 0.4
+        if np.std(region) < 20: score += 0.3
+        r, g, b = region[:,:,0], region[:,:,1], region[:,:,2]
+        if np.mean(b) / (np.mean(r) + np.mean(g) + np.mean(b) + 1) > 0.35: score += 0.3
+        return min(1.0, score)
+
+    def trip(region):
+        if region.shape[0] < 5 or region.shape[1] < 5: return 0
+        gray = region.sum(axis=2, dtype=np.int16)
+        dy, dx = np.abs(np.gradient(gray, axis=0)), np.abs(np.gradient(gray, axis=1))
+        edges = np.sqrt(dx**2 + dy**2)
+        edges_norm = edges / np.max(edges) if np.max(edges) > 0 else edges
+        edge_density = np.sum(edges_norm > 0.20) / (edges.shape[0] * edges.shape[1])
+        std_dev = np.std(region)
+        score = 0
+        if edge_density > 0.15: score += 0.5
+        if std_dev > 30: score += 0.3
+        if edge_density > 0.08 and std_dev > 20: score += 0.2
+        return min(1.0, score)
+
+    def fall(img_full):
+        height, width = img_full.shape[0], img_full.shape[1]
+        gray = img_full.sum(axis=2, dtype=np.int16)
+        sig_h = np.sum(np.abs(np.gradient(gray, axis=0)) > 60, axis=1)
+        score = 0.6 if np.sum(sig_h > width * 0.3) / height > 0.1 else 0
+        corners = np.sum(np.abs(np.gradient(gray, axis=1)) > 60) / (height * width)
+        if corners > 0.05: score += 0.3
+        if abs(np.mean(img_full[:height//3]) - np.mean(img_full[2*height//3:])) > 50: score += 0.2
+        return min(1.0, score)
+
+    return {"slip": slip(region), "trip": trip(region), "fall": fall(img_array)}
+
+# ============================================================================
+# TESTS
+# ============================================================================
+def floors(size=None) -> list:
+    return [np.asarray(make_floor(*(size or random.Random(seed).choice(SIZES)), seed)) for seed in range(FLOORS)]
+
+
+def test_scores_match_reference():
+    hazards = set()
+    for seed, img in enumerate(floors()):
+        expected = reference_scores(img)
+        scores = frame_scores(stf_scores(img), 0)
+        assert scores == expected, f"floor {seed}: {scores} != {expected}"
+        hazards.update(h["hazard_type"] for h in summarize_stf(scores)["hazards"])
+    assert hazards == {"Slip", "Trip", "Fall"}           # The corpus exercises every hazard
+
+
+def test_batch_matches_single_frames():
+    frames = floors((640, 640))
+    batch = stf_scores(np.stack(frames))
+    for i, img in enumerate(frames):
+        assert frame_scores(batch, i) == frame_scores(stf_scores(img), 0), f"frame {i}"
+
+    # Mixed sizes are grouped, results stay in input order
+    mixed = floors()
+    assert analyze_stf_batch(mixed) == [strongest_hazard(frame_scores(stf_scores(img), 0)) for img in mixed]
+
+
+def test_summaries():
+    scores = {"slip": 0.7, "trip": 0.3, "fall": 0.9}
+    body = summarize_stf(scores)
+    assert [h["hazard_type"] for h in body["hazards"]] == ["Slip", "Fall"]
+    assert [h["severity"] for h in body["hazards"]] == ["Medium", "High"]
+    assert body["risk_level"] == "High" and "description" in body["hazards"][0]
+    assert summarize_stf(scores, realtime=True)["recommendation"] == "⚠ Slip, Fall detected"
+    assert strongest_hazard(scores) == {"hazard_type": "Fall", "confidence": 0.9, "safe": False}
+    assert strongest_hazard({"slip": 0.3, "trip": 0.0, "fall": 0.2})["safe"]
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Heuristic STF analyzer: stacked frames vs per-image closures")
+    print("=" * 60)
+    test_scores_match_reference()
+    print(f"[OK] Identical scores on {FLOORS} floors")
+    test_batch_matches_single_frames()
+    print(f"[OK] A stack of {FLOORS} frames scores like each frame alone")
+    test_summaries()
+    print("[OK] Hazard summaries")
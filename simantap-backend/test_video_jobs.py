@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Video job check - no server or model needed.
+
+A job must analyse its sampled frames one batched call per chunk, commit
+progress chunk by chunk, and after a shutdown mid-job resume from the last
+committed frame (no gaps, no duplicates), with jobs still queued at
+shutdown left queued for the next start.
+
+Usage: python test_video_jobs.py   (or: python -m pytest test_video_jobs.py)
+"""
+import os
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import database as db
+import video_jobs
+from video_jobs import VideoJobManager
+
+VIDEO_FRAMES = 50
+VIDEO_FPS = 10.0
+SAMPLE_FPS = 5.0                      # Every 2nd frame: 0, 2, ..., 48
+CHUNK_FRAMES = 4
+SAMPLED = list(range(0, VIDEO_FRAMES, 2))
+
+
+def make_video(path: str):
+    """Frame i is a flat grey of value 5 * i, so the analyser can tell frames apart"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), VIDEO_FPS, (64, 48))
+    for i in range(VIDEO_FRAMES):
+        writer.write(np.full((48, 64, 3), 5 * i, dtype=np.uint8))
+    writer.release()
+
+
+def frame_number(frame: np.ndarray) -> int:
+    return int(round(frame.mean() / 5))
+
+
+class RecordingAnalyzer:
+    """analyze_frames stand-in: records each batch (as frame numbers) and the job's progress when called"""
+    def __init__(self, gate: threading.Event = None):
+        self.batches = []
+        self.progress = []
+        self.manager = None
+        self.job_id = None
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def __call__(self, frames):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append([frame_number(frame) for frame in frames])
+        if self.job_id is not None:
+            job = self.manager.get_job(self.job_id)
+            self.progress.append((job["processed_frames"], job["progress"]))
+        return [{"detections": [], "stf": {"hazard_type": "Normal", "confidence": 1.0},
+                 "compliance": {"compliance_rate": 100.0, "hazard_level": "Low"}} for _ in frames]
+
+
+def wait_for(condition, timeout: float = 10.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def make_manager(workdir: str, analyzer: RecordingAnalyzer) -> VideoJobManager:
+    manager = VideoJobManager(os.path.join(workdir, "videos"), analyzer, lambda frame: frame)
+    analyzer.manager = manager
+    manager.start()
+    return manager
+
+
+def add_job(manager: VideoJobManager, job_id: str) -> dict:
+    path = manager.new_video_path(job_id, "clip.avi")
+    make_video(path)
+    return manager.create_job(job_id, "clip.avi", path, SAMPLE_FPS)
+
+
+def all_frames(manager: VideoJobManager, job_id: str) -> list:
+    return [frame["frame_index"] for frame in manager.get_results(job_id, limit=500)["frames"]]
+
+
+def test_chunks_and_progress():
+    saved = video_jobs.VIDEO_CHUNK_FRAMES
+    video_jobs.VIDEO_CHUNK_FRAMES = CHUNK_FRAMES
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db.init_pool(os.path.join(workdir, "jobs.db"))
+            analyzer = RecordingAnalyzer()
+            analyzer.job_id = "job-a"
+            manager = make_manager(workdir, analyzer)
+            try:
+                add_job(manager, "job-a")
+                assert wait_for(lambda: manager.get_job("job-a")["status"] == "completed")
+                job = manager.get_job("job-a")
+            finally:
+                manager.shutdown()
+
+            assert analyzer.batches == [SAMPLED[i:i + CHUNK_FRAMES] for i in range(0, len(SAMPLED), CHUNK_FRAMES)]
+            processed = [done for done, _ in analyzer.progress]
+            assert processed == list(range(0, len(SAMPLED), CHUNK_FRAMES))     # Committed chunk by chunk
+            percents = [percent for _, percent in analyzer.progress]
+            assert percents == sorted(percents) and 0 < percents[1] < 100
+            assert (job["processed_frames"], job["progress"], job["total_frames"]) == (len(SAMPLED), 100.0, VIDEO_FRAMES)
+            assert all_frames(manager, "job-a") == SAMPLED
+    finally:
+        db.close_pool()
+        video_jobs.VIDEO_CHUNK_FRAMES = saved
+
+
+def test_resume_after_restart():
+    saved = video_jobs.VIDEO_CHUNK_FRAMES
+    video_jobs.VIDEO_CHUNK_FRAMES = CHUNK_FRAMES
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            db.init_pool(os.path.join(workdir, "jobs.db"))
+            gate = threading.Event()
+            first = RecordingAnalyzer(gate)
+            manager = make_manager(workdir, first)
+            add_job(manager, "job-a")
+            add_job(manager, "job-b")                                   # Waits behind job-a
+            assert first.entered.wait(5)
+            stopping = threading.Thread(target=manager.shutdown)
+            stopping.start()
+            assert wait_for(manager._stop.is_set)
+            gate.set()                                                  # Let the chunk in flight commit
+            stopping.join(10)
+
+            job_a, job_b = manager.get_job("job-a"), manager.get_job("job-b")
+            assert first.batches == [SAMPLED[:CHUNK_FRAMES]]
+            assert (job_a["status"], job_a["processed_frames"]) == ("running", CHUNK_FRAMES)
+            assert (job_b["status"], job_b["processed_frames"]) == ("queued", 0)    # Never started
+
+            second = RecordingAnalyzer()
+            manager = make_manager(workdir, second)                     # "Restart"
+            try:
+                assert wait_for(lambda: all(manager.get_job(job)["status"] == "completed"
+                                            for job in ("job-a", "job-b")))
+            finally:
+                manager.shutdown()
+
+            assert second.batches[0][0] == SAMPLED[CHUNK_FRAMES]        # Picks up after the committed chunk
+            for job in ("job-a", "job-b"):
+                assert all_frames(manager, job) == SAMPLED              # No gaps, no duplicates
+                assert manager.get_job(job)["processed_frames"] == len(SAMPLED)
+    finally:
+        db.close_pool()
+        video_jobs.VIDEO_CHUNK_FRAMES = saved
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Video jobs: batched chunks, progress, resume")
+    print("=" * 60)
+    test_chunks_and_progress()
+    print("[OK] One batched analysis per chunk, progress committed per chunk")
+    test_resume_after_restart()
+    print("[OK] Restart resumes after the last committed chunk; queued jobs stay queued")
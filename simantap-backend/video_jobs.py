@@ -0,0 +1,262 @@
+"""
+SIMANTAP Video Jobs
+================================
+Offline analysis of recorded CCTV footage for incident reviews.
+
+- Upload creates a job; the video is decoded sequentially in chunks
+- Frames are sampled at a configurable rate (sample_fps)
+- Each chunk of sampled frames is analyzed in ONE batched model call
+  (the models are shared with the API and not safe to call concurrently)
+- Per-frame results + job progress are committed in ONE transaction per chunk,
+  so a restart resumes from the last committed frame without gaps or duplicates
+- Reads and writes go through the shared connection pool (database.init_pool)
+"""
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+import database as db
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+VIDEO_CHUNK_FRAMES = 32        # Sampled frames analyzed (one batch) + committed together
+MAX_CONCURRENT_JOBS = 1        # Jobs share the models, run them one at a time
+DEFAULT_SAMPLE_FPS = 1.0
+MAX_RESULTS_PAGE = 500
+
+# Job states: queued -> running -> completed | failed
+# A job left "running" by a shutdown/crash is resumed on next start.
+RESUMABLE_STATES = ("queued", "running")
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+def init_video_tables():
+    """Create video job tables (safe to call on every start)"""
+    with db.get_pool().connection() as conn:
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS video_jobs (
+                job_id TEXT PRIMARY KEY,
+                filename TEXT,
+                video_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                sample_fps REAL NOT NULL,
+                video_fps REAL,
+                total_frames INTEGER,
+                last_frame INTEGER NOT NULL DEFAULT -1,
+                processed_frames INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS video_frame_results (
+                job_id TEXT NOT NULL,
+                frame_index INTEGER NOT NULL,
+                timestamp_sec REAL NOT NULL,
+                detections TEXT,
+                compliance_rate REAL,
+                hazard_level TEXT,
+                stf_hazard TEXT,
+                stf_confidence REAL,
+                PRIMARY KEY (job_id, frame_index)
+            )''')
+
+# ============================================================================
+# JOB MANAGER
+# ============================================================================
+class VideoJobManager:
+    """
+    Runs video analysis jobs in the background.
+
+    analyze_frames(rgb_arrays) analyzes a chunk in one batch and must
+    return, per frame, a dict with "detections", "compliance" and "stf"
+    (same shape as /detect/realtime).
+    prepare_frame(rgb_array) resizes a decoded frame for the models.
+    """
+
+    def __init__(self, video_dir: str,
+                 analyze_frames: Callable[[List[np.ndarray]], List[Dict]],
+                 prepare_frame: Callable[[np.ndarray], np.ndarray]):
+        self.video_dir = video_dir
+        self.analyze_frames = analyze_frames
+        self.prepare_frame = prepare_frame
+        self._stop = threading.Event()
+        self._job_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix="video-job")
+
+    # ---- lifecycle --------------------------------------------------------
+    def start(self):
+        """Create tables and resume any unfinished jobs"""
+        os.makedirs(self.video_dir, exist_ok=True)
+        init_video_tables()
+
+        rows = db.fetch_all(
+            f"SELECT job_id, last_frame FROM video_jobs WHERE status IN ({','.join('?' * len(RESUMABLE_STATES))}) ORDER BY created_at",
+            RESUMABLE_STATES
+        )
+        for row in rows:
+            print(f"[*] Resuming video job {row['job_id']} after frame {row['last_frame']}")
+            self._job_executor.submit(self._run_job, row["job_id"])
+
+    def shutdown(self):
+        """Stop after the current chunk; running and queued jobs resume on next start"""
+        self._stop.set()
+        self._job_executor.shutdown(wait=True, cancel_futures=True)
+
+    # ---- public API -------------------------------------------------------
+    def new_video_path(self, job_id: str, filename: Optional[str]) -> str:
+        ext = os.path.splitext(filename or "")[1].lower() or ".mp4"
+        return os.path.join(self.video_dir, f"{job_id}{ext}")
+
+    def create_job(self, job_id: str, filename: Optional[str], video_path: str, sample_fps: float) -> Dict:
+        """Register an uploaded video and queue it for analysis"""
+        capture = cv2.VideoCapture(video_path)
+        try:
+            if not capture.isOpened():
+                raise ValueError("Unable to decode video")
+            video_fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+            total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        finally:
+            capture.release()
+
+        now = datetime.now().isoformat()
+        db.execute('''INSERT INTO video_jobs
+            (job_id, filename, video_path, status, sample_fps, video_fps, total_frames, created_at, updated_at)
+            VALUES (?, ?, ?, 'queued', ?, ?, ?, ?, ?)''',
+            (job_id, filename, video_path, sample_fps, video_fps, total_frames, now, now))
+
+        self._job_executor.submit(self._run_job, job_id)
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Job row plus derived progress"""
+        job = db.fetch_one("SELECT * FROM video_jobs WHERE job_id = ?", (job_id,))
+        if job is None:
+            return None
+
+        job.pop("video_path", None)
+        total = job["total_frames"] or 0
+        job["progress"] = round(min(100.0, (job["last_frame"] + 1) / total * 100), 1) if total > 0 else 0.0
+        return job
+
+    def get_results(self, job_id: str, after_frame: int = -1, limit: int = 100) -> Dict:
+        """Page of per-frame results, keyed on frame_index"""
+        limit = max(1, min(limit, MAX_RESULTS_PAGE))
+        rows = db.fetch_all('''SELECT * FROM video_frame_results
+            WHERE job_id = ? AND frame_index > ?
+            ORDER BY frame_index LIMIT ?''', (job_id, after_frame, limit + 1))
+
+        has_more = len(rows) > limit
+        frames = []
+        for frame in rows[:limit]:
+            frame.pop("job_id")
+            frame["detections"] = json.loads(frame["detections"]) if frame["detections"] else []
+            frames.append(frame)
+
+        return {
+            "job_id": job_id,
+            "frames": frames,
+            "next_after_frame": frames[-1]["frame_index"] if has_more else None
+        }
+
+    # ---- worker -----------------------------------------------------------
+    def _set_status(self, job_id: str, status: str, error: Optional[str] = None):
+        db.execute("UPDATE video_jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                   (status, error, datetime.now().isoformat(), job_id))
+
+    def _commit_chunk(self, job_id: str, frames: List, results: List[Dict], last_frame: int):
+        """Frame results and job progress go in together, or not at all"""
+        rows = []
+        for (frame_index, timestamp_sec, _), result in zip(frames, results):
+            compliance = result["compliance"]
+            stf = result["stf"]
+            rows.append((
+                job_id, frame_index, timestamp_sec,
+                json.dumps(result["detections"]),
+                compliance["compliance_rate"], compliance["hazard_level"],
+                stf["hazard_type"], stf["confidence"]
+            ))
+
+        with db.get_pool().connection() as conn:
+            with conn:
+                conn.executemany('''INSERT OR REPLACE INTO video_frame_results
+                    (job_id, frame_index, timestamp_sec, detections, compliance_rate, hazard_level, stf_hazard, stf_confidence)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+                conn.execute('''UPDATE video_jobs
+                    SET last_frame = ?, processed_frames = processed_frames + ?, updated_at = ?
+                    WHERE job_id = ?''', (last_frame, len(rows), datetime.now().isoformat(), job_id))
+
+    def _analyze(self, chunk: List) -> List[Dict]:
+        return self.analyze_frames([self.prepare_frame(frame) for _, _, frame in chunk])
+
+    def _run_job(self, job_id: str):
+        capture = None
+        try:
+            row = db.fetch_one(
+                "SELECT video_path, sample_fps, video_fps, last_frame FROM video_jobs WHERE job_id = ?",
+                (job_id,)
+            )
+            if row is None:
+                return
+            video_path, sample_fps, video_fps, last_frame = (
+                row["video_path"], row["sample_fps"], row["video_fps"], row["last_frame"])
+
+            capture = cv2.VideoCapture(video_path)
+            if not capture.isOpened():
+                self._set_status(job_id, "failed", "Unable to decode video")
+                return
+
+            self._set_status(job_id, "running")
+
+            video_fps = video_fps or capture.get(cv2.CAP_PROP_FPS) or 25.0
+            step = max(1, int(round(video_fps / sample_fps))) if sample_fps > 0 else 1
+
+            # Resume: seek to the first frame after the last committed one
+            frame_index = last_frame + 1
+            if frame_index > 0:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+            chunk = []
+            while not self._stop.is_set():
+                # grab() skips decoding for frames we don't sample
+                if not capture.grab():
+                    break
+                if frame_index % step == 0:
+                    ok, bgr = capture.retrieve()
+                    if ok:
+                        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+                        chunk.append((frame_index, round(frame_index / video_fps, 3), rgb))
+
+                if len(chunk) >= VIDEO_CHUNK_FRAMES:
+                    self._commit_chunk(job_id, chunk, self._analyze(chunk), frame_index)
+                    chunk = []
+                frame_index += 1
+
+            if self._stop.is_set():
+                # Leave status "running" - uncommitted frames are redone on resume
+                print(f"[*] Video job {job_id} paused at frame {frame_index}")
+                return
+
+            results = self._analyze(chunk) if chunk else []
+            self._commit_chunk(job_id, chunk, results, frame_index - 1)
+            # Container frame counts are estimates; record what was actually decoded
+            db.execute("UPDATE video_jobs SET total_frames = ? WHERE job_id = ?", (frame_index, job_id))
+            self._set_status(job_id, "completed")
+            print(f"[OK] Video job {job_id} completed ({frame_index} frames)")
+
+        except Exception as e:
+            print(f"[!] Video job {job_id} failed: {e}")
+            try:
+                self._set_status(job_id, "failed", str(e))
+            except Exception:
+                pass
+        finally:
+            if capture is not None:
+                capture.release()
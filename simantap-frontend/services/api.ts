@@ -35,7 +35,7 @@ export interface DetectionResponse {
   success: boolean
   detections: Detection[]
   compliance: ComplianceAssessment
-  annotated_image: string
+  annotated_image?: string  // data URL, only when requested with ?annotate=true
   total_detections: number
 }
 